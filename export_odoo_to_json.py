@@ -3,147 +3,82 @@ Export Odoo Database to JSON Files
 
 This script exports customers and products from Odoo to JSON files
 for use by the RAG system's fuzzy matching.
+
+Only records written since the last export are fetched and merged into the
+files (see retriever_module/catalog_sync.py); --full re-reads everything.
+
+Usage:
+    python export_odoo_to_json.py [--dry-run] [--full]
 """
 
-import json
 import os
+import argparse
+from typing import Dict
 from dotenv import load_dotenv
 from retriever_module.odoo_connector import OdooConnector
+from retriever_module.catalog_sync import sync_catalog, format_summary
 
 # Load environment variables
 load_dotenv()
 
-def export_customers(odoo: OdooConnector, output_path: str = "odoo_database/odoo_customers.json"):
+
+def _execute(odoo: OdooConnector):
+    """execute(model, method, args, kwargs) on the connector's Odoo session"""
+    return lambda model, method, args, kwargs: odoo.models.execute_kw(
+        odoo.db, odoo.uid, odoo.password, model, method, args, kwargs
+    )
+
+
+def export_customers(odoo: OdooConnector, output_path: str = "odoo_database/odoo_customers.json",
+                     full: bool = False, dry_run: bool = False) -> Dict:
     """
     Export customers from Odoo to JSON
 
     Args:
         odoo: OdooConnector instance
         output_path: Path to save JSON file
+        full: Re-read all customers instead of the ones changed since the last export
+        dry_run: Only report what would change
+
+    Returns:
+        Sync summary (see sync_catalog)
     """
     print("="*80)
     print("EXPORTING CUSTOMERS FROM ODOO")
     print("="*80)
 
     try:
-        # Search for all companies (is_company = True)
-        print("\nSearching for customers in Odoo...")
-        partner_ids = odoo.models.execute_kw(
-            odoo.db, odoo.uid, odoo.password,
-            'res.partner', 'search',
-            [[('is_company', '=', True)]],
-            {'limit': 10000}
-        )
-
-        print(f"Found {len(partner_ids)} customer IDs")
-
-        # Read customer details
-        print("Fetching customer details...")
-        customers = odoo.models.execute_kw(
-            odoo.db, odoo.uid, odoo.password,
-            'res.partner', 'read',
-            [partner_ids],
-            {'fields': ['id', 'name', 'ref', 'email', 'phone', 'street', 'street2',
-                       'city', 'zip', 'country_id', 'state_id', 'vat', 'website']}
-        )
-
-        # Format customers
-        formatted_customers = []
-        for customer in customers:
-            formatted_customers.append({
-                'id': customer['id'],
-                'name': customer['name'],
-                'ref': customer.get('ref') or '',
-                'email': customer.get('email') or '',
-                'phone': customer.get('phone') or '',
-                'address': {
-                    'street': customer.get('street') or '',
-                    'street2': customer.get('street2') or '',
-                    'city': customer.get('city') or '',
-                    'zip': customer.get('zip') or '',
-                    'country': customer['country_id'][1] if customer.get('country_id') else '',
-                    'state': customer['state_id'][1] if customer.get('state_id') else ''
-                },
-                'vat': customer.get('vat') or '',
-                'website': customer.get('website') or ''
-            })
-
-        # Save to JSON
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(formatted_customers, f, indent=2, ensure_ascii=False)
-
-        print(f"\n[OK] SUCCESS: Exported {len(formatted_customers)} customers to {output_path}")
-        return formatted_customers
+        summary = sync_catalog(_execute(odoo), 'customers', output_path, full=full, dry_run=dry_run)
+        print(f"\n[OK] {format_summary(summary)}")
+        return summary
 
     except Exception as e:
         print(f"\n[ERROR] Failed to export customers: {e}")
         raise
 
 
-def export_products(odoo: OdooConnector, output_path: str = "odoo_database/odoo_products.json"):
+def export_products(odoo: OdooConnector, output_path: str = "odoo_database/odoo_products.json",
+                    full: bool = False, dry_run: bool = False) -> Dict:
     """
     Export products from Odoo to JSON
 
     Args:
         odoo: OdooConnector instance
         output_path: Path to save JSON file
+        full: Re-read all products instead of the ones changed since the last export
+        dry_run: Only report what would change
+
+    Returns:
+        Sync summary (see sync_catalog)
     """
     print("\n" + "="*80)
     print("EXPORTING PRODUCTS FROM ODOO")
     print("="*80)
 
     try:
-        # Search for all products (using product.template for Odoo 19)
-        print("\nSearching for products in Odoo...")
-        product_ids = odoo.models.execute_kw(
-            odoo.db, odoo.uid, odoo.password,
-            'product.template', 'search',
-            [[]],
-            {'limit': 20000}
-        )
-
-        print(f"Found {len(product_ids)} product IDs")
-
-        # Read product details (in batches for performance)
-        print("Fetching product details...")
-        batch_size = 500
-        all_products = []
-
-        for i in range(0, len(product_ids), batch_size):
-            batch_ids = product_ids[i:i+batch_size]
-            print(f"  Batch {i//batch_size + 1}/{(len(product_ids)-1)//batch_size + 1}...")
-
-            products = odoo.models.execute_kw(
-                odoo.db, odoo.uid, odoo.password,
-                'product.template', 'read',
-                [batch_ids],
-                {'fields': ['id', 'name', 'default_code', 'list_price', 'standard_price',
-                           'type', 'categ_id', 'description']}
-            )
-            all_products.extend(products)
-
-        # Format products
-        formatted_products = []
-        for product in all_products:
-            formatted_products.append({
-                'id': product['id'],
-                'name': product['name'],
-                'default_code': product.get('default_code') or '',
-                'list_price': product.get('list_price', 0.0),
-                'standard_price': product.get('standard_price', 0.0),
-                'type': product.get('type', ''),
-                'category': product['categ_id'][1] if product.get('categ_id') else '',
-                'description': product.get('description') or ''
-            })
-
-        # Save to JSON
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(formatted_products, f, indent=2, ensure_ascii=False)
-
-        print(f"\n[OK] SUCCESS: Exported {len(formatted_products)} products to {output_path}")
-        return formatted_products
+        summary = sync_catalog(_execute(odoo), 'products', output_path, full=full, dry_run=dry_run)
+        print(f"\n[OK] {format_summary(summary)}")
+        return summary
 
     except Exception as e:
         print(f"\n[ERROR] Failed to export products: {e}")
@@ -152,8 +87,13 @@ def export_products(odoo: OdooConnector, output_path: str = "odoo_database/odoo_
 
 def main():
     """Main export function"""
+    parser = argparse.ArgumentParser(description="Export Odoo customers and products to JSON")
+    parser.add_argument('--dry-run', action='store_true', help="Only show how many records changed")
+    parser.add_argument('--full', action='store_true', help="Re-read all records (ignore the sync watermark)")
+    args = parser.parse_args()
+
     print("="*80)
-    print("ODOO TO JSON EXPORT TOOL")
+    print("ODOO TO JSON EXPORT TOOL" + (" (DRY RUN)" if args.dry_run else ""))
     print("="*80)
     print(f"Odoo URL: {os.getenv('ODOO_URL')}")
     print(f"Database: {os.getenv('ODOO_DB_NAME')}")
@@ -166,23 +106,25 @@ def main():
     print()
 
     # Export customers
-    customers = export_customers(odoo)
+    customers = export_customers(odoo, full=args.full, dry_run=args.dry_run)
 
     # Export products
-    products = export_products(odoo)
+    products = export_products(odoo, full=args.full, dry_run=args.dry_run)
 
     # Summary
     print("\n" + "="*80)
-    print("EXPORT SUMMARY")
+    print("EXPORT SUMMARY" + (" (DRY RUN - nothing written)" if args.dry_run else ""))
     print("="*80)
-    print(f"[OK] Customers: {len(customers)} exported")
-    print(f"[OK] Products:  {len(products)} exported")
-    print()
-    print("Files saved:")
-    print("  - odoo_database/odoo_customers.json")
-    print("  - odoo_database/odoo_products.json")
+    print(f"  {format_summary(customers)}")
+    print(f"  {format_summary(products)}")
     print()
-    print("[OK] EXPORT COMPLETE!")
+    if not args.dry_run:
+        print("Files:")
+        for summary, path in [(customers, "odoo_database/odoo_customers.json"),
+                              (products, "odoo_database/odoo_products.json")]:
+            print(f"  - {path} ({'updated' if summary['written'] else 'unchanged'})")
+        print()
+        print("[OK] EXPORT COMPLETE!")
     print("="*80)
 
 
@@ -8,6 +8,7 @@ This module orchestrates the entire email processing workflow:
 4. Generate and send responses
 """
 
+import argparse
 import logging
 import sys
 from pathlib import Path
@@ -566,8 +567,51 @@ class RAGEmailSystem:
         logger.info("Shutdown complete")
 
 
+def run_model_host(address: Optional[str] = None):
+    """
+    Run the shared BERT model host (blocks until interrupted)
+
+    Worker processes started with BERT_MODEL_HOST=<address> query this process
+    instead of each loading their own copy of the model. Host and workers need
+    the same BERT_MODEL_HOST_KEY.
+
+    Args:
+        address: "host:port" to listen on (default 127.0.0.1:6011)
+    """
+    from retriever_module.bert_semantic_matcher import BertSemanticMatcher
+    from retriever_module.model_host import ModelHost, get_authkey
+
+    get_authkey()  # fail before loading the model when no key is configured
+    logger.info("Starting BERT model host...")
+    def load_matcher():
+        return BertSemanticMatcher(
+            products_json_path="odoo_database/odoo_products.json",
+            model_name="Alibaba-NLP/gte-modernbert-base"
+        )
+
+    # Rebuilt when a sync rewrites the products file or the model is re-trained
+    host = ModelHost(load_matcher(), address, loader=load_matcher)
+    logger.info(f"Start workers with BERT_MODEL_HOST={host.address}")
+
+    try:
+        host.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Received shutdown signal, stopping model host...")
+    finally:
+        host.close()
+
+
 def main():
     """Main entry point"""
+    parser = argparse.ArgumentParser(description="RAG Email System")
+    parser.add_argument('--model-host', nargs='?', const='', default=None, metavar='HOST:PORT',
+                        help="Run the shared BERT model host for worker processes instead of processing emails")
+    args = parser.parse_args()
+
+    if args.model_host is not None:
+        run_model_host(args.model_host or None)
+        return
+
     logger.info("=" * 60)
     logger.info("RAG Email System Starting...")
     logger.info("=" * 60)
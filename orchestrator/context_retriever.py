@@ -5,7 +5,9 @@ Handles retrieval of context from JSON databases and Odoo
 Separated from EmailProcessor for better modularity
 """
 
+import re
 import logging
+from functools import lru_cache
 from typing import Dict, List, Optional
 import sys
 import os
@@ -13,9 +15,30 @@ import os
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils.product_validator import is_valid_product_code, validate_product_codes
+from retriever_module.match_cache import MatchCache, MISS
 
 logger = logging.getLogger(__name__)
 
+VALIDATION_DIMENSION_PATTERNS = [
+    re.compile(r'\b(\d{2,4})\s*[xX*]\s*(\d{1,3}(?:[.,]\d{1,2})?)', re.IGNORECASE),  # 343x22.85
+    re.compile(r'\b(\d{3,5})\s*mm\b', re.IGNORECASE),  # 343mm
+]
+
+
+@lru_cache(maxsize=4096)
+def _extract_validation_dimensions(text: str) -> frozenset:
+    """Dimension numbers used by dimension validation (cached - the same lines recur)"""
+    dimensions = set()
+    for pattern in VALIDATION_DIMENSION_PATTERNS:
+        for match in pattern.finditer(text):
+            for group in match.groups():
+                if group:
+                    normalized = group.replace(' ', '').replace(',', '.')
+                    # Only keep significant dimensions (width/length, typically 3+ digits)
+                    if len(normalized.replace('.', '')) >= 2:
+                        dimensions.add(normalized)
+    return frozenset(dimensions)
+
 
 class ContextRetriever:
     """Handles context retrieval from JSON and Odoo databases"""
@@ -51,24 +74,33 @@ class ContextRetriever:
         # Keep reference for backward compatibility
         self.token_matcher = token_matcher
 
+        # Final matches of recurring product lines (MATCH_CACHE_SIZE=0 disables)
+        cache_size = int(os.getenv('MATCH_CACHE_SIZE', '2000'))
+        self.match_cache = MatchCache(max_entries=cache_size) if cache_size > 0 and self.matcher else None
+
+    def _get_match_cache_version(self) -> str:
+        """
+        Catalog + matcher version the cached matches belong to.
+
+        Changes when the products JSON is rewritten (e.g. by a sync) or the
+        matcher configuration / embedding model changes.
+        """
+        products_path = getattr(self.matcher, 'products_json_path', None) or getattr(self.matcher, 'products_json', '')
+        try:
+            stat = os.stat(products_path)
+            catalog_version = f"{products_path}:{stat.st_mtime_ns}:{stat.st_size}"
+        except (OSError, TypeError):
+            catalog_version = str(products_path)
+
+        if hasattr(self.matcher, 'get_config_signature'):
+            matcher_version = self.matcher.get_config_signature()
+        else:
+            matcher_version = type(self.matcher).__name__
+        return f"{catalog_version}|{matcher_version}"
+
     def _extract_dimensions(self, text: str) -> set:
         """Extract dimension numbers from text for validation."""
-        import re
-        patterns = [
-            r'\b(\d{2,4})\s*[xX*]\s*(\d{1,3}(?:[.,]\d{1,2})?)',  # 343x22.85
-            r'\b(\d{3,5})\s*mm\b',  # 343mm
-        ]
-        dimensions = set()
-        for pattern in patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
-                for group in match.groups():
-                    if group:
-                        normalized = group.replace(' ', '').replace(',', '.')
-                        # Only keep significant dimensions (width/length, typically 3+ digits)
-                        if len(normalized.replace('.', '')) >= 2:
-                            dimensions.add(normalized)
-        return dimensions
+        return set(_extract_validation_dimensions(text))
 
     def _validate_dimension_match(self, query: str, product_text: str) -> bool:
         """
@@ -104,6 +136,24 @@ class ContextRetriever:
         logger.info(f"      [DIMENSION OK] Matched dimensions: {matches}")
         return True
 
+    def _search_many(self, queries: List[str], top_k: int, min_score: float) -> List[List[Dict]]:
+        """
+        Run matcher searches for several queries, batched if the matcher supports it.
+
+        Args:
+            queries: Search queries
+            top_k: Number of results per query
+            min_score: Minimum score threshold
+
+        Returns:
+            One result list per query
+        """
+        if not queries:
+            return []
+        if hasattr(self.matcher, 'search_many'):
+            return self.matcher.search_many(queries, top_k=top_k, min_score=min_score)
+        return [self.matcher.search(query, top_k=top_k, min_score=min_score) for query in queries]
+
     def retrieve_order_context_json(self, entities: Dict) -> Dict:
         """
         Retrieve order-related context from JSON
@@ -153,11 +203,24 @@ class ContextRetriever:
 
                 if self.use_token_matching or self.use_hybrid_matching:
                     # HYBRID MATCHING: Always use full product name with dimensions for accurate matching
-                    matched_products = []
+                    import re
+                    if self.match_cache is not None:
+                        self.match_cache.set_version(self._get_match_cache_version())
+
+                    lines = []
                     for i, product_name in enumerate(product_names):
                         product_code = product_codes[i] if i < len(product_codes) else None
                         match = None
 
+                        # Recurring line: reuse its final match (or "no match")
+                        cache_key = cached = None
+                        if self.match_cache is not None:
+                            cache_key = self.match_cache.make_key(product_code, product_name)
+                            cached = self.match_cache.get(cache_key)
+                            if cached is not MISS:
+                                lines.append((product_name, product_code, None, cached, cache_key, True))
+                                continue
+
                         # Build search query: Always include product name (with dimensions)
                         # If code exists, prepend it to query
                         query = product_name
@@ -166,25 +229,45 @@ class ContextRetriever:
 
                         # STRATEGY 1: Try exact code lookup (only if no dimensions in product name)
                         # Skip exact code lookup if dimensions are present - they must be validated
-                        import re
                         has_dimensions = bool(re.search(r'\d{2,4}\s*[xX*]\s*\d{1,3}', product_name))
 
                         if product_code and not has_dimensions:
                             match = self.matcher.search_by_code(product_code)
 
+                        lines.append((product_name, product_code, query, match, cache_key, False))
+
+                    # Lines without an exact code match are searched together (one batched
+                    # BERT pass for the whole email)
+                    # Lowered threshold to 0.60 to match BERT semantic threshold
+                    pending_queries = [query for _, _, query, match, _, from_cache in lines
+                                       if not match and not from_cache]
+                    search_results = iter(self._search_many(pending_queries, top_k=1, min_score=0.60))
+
+                    matched_products = []
+                    for i, (product_name, product_code, query, match, cache_key, from_cache) in enumerate(lines):
+                        if from_cache:
                             if match:
-                                # Exact code match found (no dimensions to validate)
-                                match['match_score'] = 1.0  # 100% confidence for exact code
-                                match['match_method'] = 'exact_code'
                                 match['extracted_product_name'] = product_name
-                                match['requires_review'] = False
-                                logger.info(f"      [{i+1}] {product_code} [EXACT] (100%)")
+                                match['match_cache_hit'] = True
+                                code = match.get('default_code') or match.get('product_code', 'N/A')
+                                logger.info(f"      [{i+1}] {code} [CACHED] ({match.get('match_score', 0):.0%})")
+                                matched_products.append(match)
+                            else:
+                                logger.warning(f"      [{i+1}] NO MATCH for '{product_name[:40]}' [CACHED]")
+                            continue
+
+                        if match:
+                            # Exact code match found (no dimensions to validate)
+                            match['match_score'] = 1.0  # 100% confidence for exact code
+                            match['match_method'] = 'exact_code'
+                            match['extracted_product_name'] = product_name
+                            match['requires_review'] = False
+                            logger.info(f"      [{i+1}] {product_code} [EXACT] (100%)")
 
                         # STRATEGY 2: Hybrid/Token matching with dimension validation
                         if not match:
-                            # Search using matcher (hybrid or token)
-                            # Lowered threshold to 0.60 to match BERT semantic threshold
-                            results = self.matcher.search(query, top_k=1, min_score=0.60)
+                            # Search results from the batched matcher call
+                            results = next(search_results)
 
                             if results:
                                 candidate = results[0]
@@ -222,9 +305,13 @@ class ContextRetriever:
                                     logger.warning(f"      [{i+1}] REJECTED match {candidate.get('default_code', 'N/A')} - dimension mismatch")
 
                         if match:
+                            match['match_cache_hit'] = False
                             matched_products.append(match)
                         else:
                             logger.warning(f"      [{i+1}] NO MATCH for '{product_name[:40]}'")
+
+                        if cache_key is not None:
+                            self.match_cache.put(cache_key, match)
                 else:
                     # Fallback to VectorStore fuzzy matching
                     logger.info(f"   [!] Using VectorStore fallback (Token Matcher unavailable)")
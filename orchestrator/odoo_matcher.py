@@ -23,6 +23,100 @@ class OdooMatcher:
         """
         self.odoo = odoo_connector
 
+    @staticmethod
+    def _product_match(product: Dict, match_method: str, json_product: Dict) -> Dict:
+        """Odoo product match entry"""
+        return {
+            'found': True,
+            'id': product.get('id'),
+            'name': product.get('name'),
+            'code': product.get('default_code'),
+            'match_method': match_method,
+            'json_match_score': json_product.get('match_score', 'N/A')
+        }
+
+    def _match_products(self, json_products: List[Dict]) -> List[Dict]:
+        """
+        Match JSON products to Odoo products (in line order)
+
+        One call verifies the JSON Odoo IDs of all lines. Lines are then matched
+        in order, with the per-line code and name searches for what it did not
+        verify, so the result equals one lookup cascade per line. Once a lookup
+        creates a product variant, the batched results are dropped, so later
+        lines see the new variant.
+
+        Args:
+            json_products: JSON matches of the order lines
+
+        Returns:
+            Match entry per line
+        """
+        lines = []
+        for json_product in json_products:
+            json_odoo_id = json_product.get('id')
+            json_product_name = json_product.get('name', 'Unknown')[:50]
+            json_product_code = json_product.get('default_code', 'N/A')
+            # Lines with a JSON ID fall back to any code, lines without one skip 'N/A'
+            if json_odoo_id:
+                search_code = json_product_code or None
+            else:
+                search_code = json_product_code if json_product_code and json_product_code != 'N/A' else None
+            lines.append((json_product, json_odoo_id, json_product_name, json_product_code, search_code))
+
+        # Batched lookup of all JSON Odoo IDs
+        template_ids = list(dict.fromkeys(line[1] for line in lines if line[1]))
+        verified = self.odoo.query_products_by_template_ids(template_ids)
+        logger.info(f"      [OK] {len(verified)}/{len(template_ids)} JSON Odoo IDs verified")
+
+        matches = []
+        for i, (json_product, json_odoo_id, json_product_name, json_product_code, search_code) in enumerate(lines):
+            match = None
+
+            # Strategy 1: Verify JSON Odoo ID still exists in current Odoo
+            if json_odoo_id:
+                results = verified.get(json_odoo_id)
+                if not results:
+                    # Stale ID or template without a variant yet (query_products creates one)
+                    logger.info(f"      [{i + 1}] Verifying JSON Odoo ID {json_odoo_id} (code: {json_product_code})...")
+                    variants_created = getattr(self.odoo, 'variants_created', 0)
+                    results = self.odoo.query_products(product_id=json_odoo_id)
+                    if getattr(self.odoo, 'variants_created', 0) != variants_created:
+                        verified = {}
+                if results:
+                    match = self._product_match(results[0], 'json_id_verified', json_product)
+
+            # Strategy 2: Code search
+            if match is None and search_code:
+                logger.info(f"      [{i + 1}] Trying by code: {search_code}...")
+                results = self.odoo.query_products(product_code=search_code)
+                if results:
+                    match_method = 'code_fallback' if json_odoo_id else 'code_no_json_id'
+                    match = self._product_match(results[0], match_method, json_product)
+                    logger.info(f"      [{i + 1}] [OK] Found by code (ID: {results[0].get('id')})")
+
+            # Strategy 3: Name search
+            if match is None:
+                logger.info(f"      [{i + 1}] Trying by name: {json_product_name}...")
+                results = self.odoo.query_products(product_name=json_product_name)
+                if results:
+                    match_method = 'name_fallback' if json_odoo_id else 'name_no_json_id'
+                    match = self._product_match(results[0], match_method, json_product)
+                    logger.info(f"      [{i + 1}] [OK] Found by name (ID: {results[0].get('id')})")
+                else:
+                    logger.warning(f"      [{i + 1}] [!] Product '{json_product_name}' not found in Odoo")
+                    match = {
+                        'found': False,
+                        'id': None,
+                        'name': json_product_name,
+                        'code': json_product_code,
+                        'match_method': 'not_found',
+                        'json_match_score': json_product.get('match_score', 'N/A')
+                    }
+
+            matches.append(match)
+
+        return matches
+
     def match_in_odoo(self, context: Dict, entities: Dict) -> Dict:
         """
         Match JSON results to Odoo database records
@@ -115,115 +209,10 @@ class OdooMatcher:
                 logger.info(f"   [2/2] Matching {len(json_products)} products in Odoo...")
                 odoo_matches['match_summary']['products_total'] = len(json_products)
 
-                for idx, json_product in enumerate(json_products, 1):
-                    # Get the Odoo ID from JSON match
-                    json_odoo_id = json_product.get('id')
-                    json_product_name = json_product.get('name', 'Unknown')[:50]
-                    json_product_code = json_product.get('default_code', 'N/A')
-
-                    if json_odoo_id:
-                        # Strategy 1: Verify JSON's Odoo ID still exists in current Odoo
-                        logger.info(f"      [{idx}] Verifying JSON Odoo ID {json_odoo_id} (code: {json_product_code})...")
-                        results = self.odoo.query_products(product_id=json_odoo_id)
-
-                        if results:
-                            # ID still exists in Odoo - use it!
-                            odoo_matches['products'].append({
-                                'found': True,
-                                'id': results[0].get('id'),
-                                'name': results[0].get('name'),
-                                'code': results[0].get('default_code'),
-                                'match_method': 'json_id_verified',
-                                'json_match_score': json_product.get('match_score', 'N/A')
-                            })
-                            odoo_matches['match_summary']['products_matched'] += 1
-                            logger.info(f"         [OK] ID verified in Odoo! (ID: {results[0].get('id')})")
-                        else:
-                            # ID doesn't exist, fallback to code search
-                            logger.info(f"         ID not found, trying by code: {json_product_code}...")
-                            results = self.odoo.query_products(product_code=json_product_code)
-
-                            if results:
-                                odoo_matches['products'].append({
-                                    'found': True,
-                                    'id': results[0].get('id'),
-                                    'name': results[0].get('name'),
-                                    'code': results[0].get('default_code'),
-                                    'match_method': 'code_fallback',
-                                    'json_match_score': json_product.get('match_score', 'N/A')
-                                })
-                                odoo_matches['match_summary']['products_matched'] += 1
-                                logger.info(f"         [OK] Found by code (ID: {results[0].get('id')})")
-                            else:
-                                # Final fallback: try by name
-                                logger.info(f"         Code not found, trying by name: {json_product_name}...")
-                                results = self.odoo.query_products(product_name=json_product_name)
-
-                                if results:
-                                    odoo_matches['products'].append({
-                                        'found': True,
-                                        'id': results[0].get('id'),
-                                        'name': results[0].get('name'),
-                                        'code': results[0].get('default_code'),
-                                        'match_method': 'name_fallback',
-                                        'json_match_score': json_product.get('match_score', 'N/A')
-                                    })
-                                    odoo_matches['match_summary']['products_matched'] += 1
-                                    logger.info(f"         [OK] Found by name (ID: {results[0].get('id')})")
-                                else:
-                                    logger.warning(f"         [!] Product not found in Odoo")
-                                    odoo_matches['products'].append({
-                                        'found': False,
-                                        'id': None,
-                                        'name': json_product_name,
-                                        'code': json_product_code,
-                                        'match_method': 'not_found',
-                                        'json_match_score': json_product.get('match_score', 'N/A')
-                                    })
-                    else:
-                        # No JSON ID, try by code or name
-                        logger.info(f"      [{idx}] No JSON ID, searching by code/name...")
-
-                        # Try code first
-                        results = []
-                        if json_product_code and json_product_code != 'N/A':
-                            results = self.odoo.query_products(product_code=json_product_code)
-
-                        if results:
-                            odoo_matches['products'].append({
-                                'found': True,
-                                'id': results[0].get('id'),
-                                'name': results[0].get('name'),
-                                'code': results[0].get('default_code'),
-                                'match_method': 'code_no_json_id',
-                                'json_match_score': json_product.get('match_score', 'N/A')
-                            })
-                            odoo_matches['match_summary']['products_matched'] += 1
-                            logger.info(f"         [OK] Found by code (ID: {results[0].get('id')})")
-                        else:
-                            # Try by name
-                            results = self.odoo.query_products(product_name=json_product_name)
-                            if results:
-                                odoo_matches['products'].append({
-                                    'found': True,
-                                    'id': results[0].get('id'),
-                                    'name': results[0].get('name'),
-                                    'code': results[0].get('default_code'),
-                                    'match_method': 'name_no_json_id',
-                                    'json_match_score': json_product.get('match_score', 'N/A')
-                                })
-                                odoo_matches['match_summary']['products_matched'] += 1
-                                logger.info(f"         [OK] Found by name (ID: {results[0].get('id')})")
-                            else:
-                                logger.warning(f"         [!] Product '{json_product_name}' not found in Odoo")
-                                odoo_matches['products'].append({
-                                    'found': False,
-                                    'id': None,
-                                    'name': json_product_name,
-                                    'code': json_product_code,
-                                    'match_method': 'not_found',
-                                    'json_match_score': json_product.get('match_score', 'N/A')
-                                })
+                odoo_matches['products'] = self._match_products(json_products)
+                odoo_matches['match_summary']['products_matched'] = sum(
+                    1 for product in odoo_matches['products'] if product['found']
+                )
 
                 # Log summary
                 matched = odoo_matches['match_summary']['products_matched']
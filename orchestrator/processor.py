@@ -68,6 +68,8 @@ class EmailProcessor:
             )
 
             if use_bert:
+                # Load the model in the background while emails are fetched and extracted
+                hybrid_matcher.warm_up(background=True)
                 logger.info("[INFO] BERT semantic matching enabled (set USE_BERT=false to disable)")
             else:
                 logger.info("[INFO] BERT semantic matching disabled (token matching only)")
@@ -291,8 +293,13 @@ class EmailProcessor:
         # Prepare match stats for logging
         match_stats = {
             'customer_found': context.get('customer_info') is not None,
-            'products_matched': len(context.get('json_data', {}).get('products', []))
+            'products_matched': len(context.get('json_data', {}).get('products', [])),
+            'products_from_match_cache': sum(
+                1 for p in context.get('json_data', {}).get('products', []) if p.get('match_cache_hit')
+            )
         }
+        if self.context_retriever.match_cache is not None:
+            match_stats['match_cache'] = self.context_retriever.match_cache.stats()
 
         # LOG STEP 4: RAG Output
         self.step_logger.log_step_4_rag_output(context, match_stats)
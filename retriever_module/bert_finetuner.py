@@ -5,28 +5,56 @@ Fine-tunes the BERT semantic matcher on your specific product catalog
 to improve matching accuracy for domain-specific terminology.
 
 Training Strategy:
-1. Generate positive pairs: Similar products (same category, similar dimensions)
-2. Generate negative pairs: Different products (different categories)
+1. Generate positive pairs: Similar products (same category, similar dimensions),
+   found through blocking keys instead of comparing every pair of products
+2. Generate hard negative pairs: nearest neighbours in the product embedding
+   matrix that belong to a different category
 3. Use Contrastive Learning to fine-tune embeddings
 4. Save fine-tuned model for production use
 
+Re-training is cheap to repeat (e.g. nightly after a catalog sync): generated
+pairs are persisted per catalog hash, training writes periodic checkpoints and
+resumes from them, 'freeze' / 'head' modes train only the upper layers or a
+projection head on CPU, and the new model is published atomically so a running
+email batch never loads a half-written model.
+
 Author: Claude Code
 Date: 2025-10-09
 """
 
+import os
 import json
+import shutil
+import hashlib
 import logging
 import random
 import re
+from collections import defaultdict
 from pathlib import Path
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
 import numpy as np
 
 from sentence_transformers import SentenceTransformer, InputExample, losses
 from torch.utils.data import DataLoader
 
+from retriever_module.bert_semantic_matcher import BertSemanticMatcher, get_model_version
+from retriever_module.embedding_cache import EmbeddingCache
+from retriever_module.vector_index import create_vector_index
+
 logger = logging.getLogger(__name__)
 
+# Neighbours (each side) compared within a block when looking for positive pairs
+PAIR_WINDOW = 25
+
+# Bump when pair generation changes (invalidates persisted training pairs)
+PAIRS_VERSION = 1
+
+# full: all weights, freeze: lower transformer layers frozen, head: projection head only
+TRAIN_MODES = ('full', 'freeze', 'head')
+
+# Written next to the fine-tuned model (what it was trained on)
+TRAINING_INFO_FILE = "training_info.json"
+
 
 class BERTFineTuner:
     """
@@ -38,7 +66,12 @@ class BERTFineTuner:
         products_json_path: str,
         base_model: str = "Alibaba-NLP/gte-modernbert-base",
         output_model_path: str = "models/finetuned-product-matcher",
-        use_cuda_for_training: bool = True
+        use_cuda_for_training: bool = True,
+        seed: int = 42,
+        cache_dir: str = ".bert_cache",
+        train_mode: str = "full",
+        frozen_layers: int = 6,
+        warm_start: bool = False
     ):
         """
         Initialize fine-tuner.
@@ -48,11 +81,28 @@ class BERTFineTuner:
             base_model: Base BERT model to fine-tune
             output_model_path: Where to save fine-tuned model
             use_cuda_for_training: Use CUDA/GPU for training (faster, default: True)
+            seed: Random seed (training pairs are reproducible for a catalog)
+            cache_dir: BERT embeddings cache (product matrix used for hard negatives)
+                and persisted training pairs
+            train_mode: 'full', 'freeze' (lower layers frozen) or 'head' (only a
+                projection head on top of the frozen transformer - fastest on CPU)
+            frozen_layers: Number of lower transformer layers frozen in 'freeze' mode
+            warm_start: Continue from the current fine-tuned model instead of the base model
         """
+        if train_mode not in TRAIN_MODES:
+            raise ValueError(f"Unknown train_mode '{train_mode}' (expected one of {TRAIN_MODES})")
+
         self.products_json_path = Path(products_json_path)
         self.base_model = base_model
         self.output_model_path = Path(output_model_path)
-        self.output_model_path.mkdir(parents=True, exist_ok=True)
+        # The model directory itself only appears once a model is published
+        self.output_model_path.parent.mkdir(parents=True, exist_ok=True)
+        self.seed = seed
+        self.cache_dir = cache_dir
+        self.train_mode = train_mode
+        self.frozen_layers = frozen_layers
+        self.warm_start = warm_start
+        self._features = None
 
         # Determine training device (CUDA for training if available)
         import torch
@@ -137,19 +187,34 @@ class BERTFineTuner:
             'full_text': f"{code} {name}".strip()
         }
 
+    def _get_features(self) -> List[Dict]:
+        """Features of every product, extracted once per catalog"""
+        if self._features is None:
+            self._features = [self._extract_product_features(product) for product in self.products]
+        return self._features
+
     def _are_similar_products(self, prod1: Dict, prod2: Dict) -> bool:
         """
         Check if two products are similar (positive pair).
 
+        See _are_similar_features().
+        """
+        return self._are_similar_features(
+            self._extract_product_features(prod1),
+            self._extract_product_features(prod2)
+        )
+
+    @staticmethod
+    def _are_similar_features(feat1: Dict, feat2: Dict) -> bool:
+        """
+        Check if two products are similar, from their extracted features.
+
         Similar products:
         - Same category (L, E, G, etc.)
         - Similar dimensions (within 10%)
         - Same material type
         - Same seal sub-type (if applicable) - CRITICAL: Duro Seal != Foam Seal
         """
-        feat1 = self._extract_product_features(prod1)
-        feat2 = self._extract_product_features(prod2)
-
         # Must have same category
         if feat1['category'] and feat2['category']:
             if feat1['category'] != feat2['category']:
@@ -180,44 +245,53 @@ class BERTFineTuner:
 
         return True
 
-    def _generate_training_pairs(self) -> Tuple[List[InputExample], List[InputExample]]:
+    def _get_blocks(self) -> List[List[int]]:
         """
-        Generate positive and hard negative training pairs.
+        Candidate lists for positive pairs (blocking instead of all pairs).
 
-        Returns:
-            Tuple of (positive_pairs, negative_pairs)
+        Products are blocked on (category / code prefix, seal sub-type). Inside a
+        block, products with dimensions are ordered by their first dimension, so
+        products within 10% are neighbours; the others are ordered by code and
+        name. Only the PAIR_WINDOW neighbours on each side are compared.
         """
-        logger.info("Generating training pairs from product catalog...")
-
+        features = self._get_features()
+        blocks = defaultdict(list)
+        for idx, feat in enumerate(features):
+            if feat['full_text']:
+                blocks[(feat['category'] or '', feat['seal_subtype'] or '')].append(idx)
+
+        ordered = []
+        for key in sorted(blocks):
+            block = blocks[key]
+            with_dims = [i for i in block if features[i]['dimensions'] and features[i]['dimensions'][0][0]]
+            with_dims_set = set(with_dims)
+            without_dims = [i for i in block if i not in with_dims_set]
+            ordered.append(sorted(with_dims, key=lambda i: (features[i]['dimensions'][0][0], i)))
+            ordered.append(sorted(without_dims, key=lambda i: (features[i]['full_text'], i)))
+        return [order for order in ordered if len(order) > 1]
+
+    def _generate_positive_pairs(self, rng: random.Random) -> List[InputExample]:
+        """Up to 3 similar products per product, from the nearest block neighbours"""
+        features = self._get_features()
         positive_pairs = []
-        negative_pairs = []
-
-        # Strategy 1: Generate positive pairs (similar products)
-        for i, prod1 in enumerate(self.products):
-            if i % 100 == 0:
-                logger.info(f"Processing product {i}/{len(self.products)}")
-
-            feat1 = self._extract_product_features(prod1)
-            text1 = feat1['full_text']
-
-            if not text1:
-                continue
 
-            # Find similar products
-            similar_count = 0
-            for j, prod2 in enumerate(self.products):
-                if i == j:
-                    continue
-
-                if self._are_similar_products(prod1, prod2):
-                    feat2 = self._extract_product_features(prod2)
-                    text2 = feat2['full_text']
-
-                    if text2:
+        for order in self._get_blocks():
+            for pos, i in enumerate(order):
+                # Closest neighbours first (alternating after / before)
+                neighbours = []
+                for offset in range(1, PAIR_WINDOW + 1):
+                    if pos + offset < len(order):
+                        neighbours.append(order[pos + offset])
+                    if pos - offset >= 0:
+                        neighbours.append(order[pos - offset])
+
+                similar_count = 0
+                for j in neighbours:
+                    if self._are_similar_features(features[i], features[j]):
                         # Create positive pair (similarity score: 0.8-1.0)
-                        score = 0.9 + random.uniform(-0.1, 0.1)
+                        score = 0.9 + rng.uniform(-0.1, 0.1)
                         positive_pairs.append(InputExample(
-                            texts=[text1, text2],
+                            texts=[features[i]['full_text'], features[j]['full_text']],
                             label=score
                         ))
                         similar_count += 1
@@ -225,63 +299,150 @@ class BERTFineTuner:
                         if similar_count >= 3:  # Limit to 3 positive pairs per product
                             break
 
-        # Strategy 2: Generate hard negative pairs (different categories)
-        random.shuffle(self.products)
-        for i in range(min(len(positive_pairs) * 2, len(self.products) - 1)):
-            prod1 = self.products[i]
-            prod2 = self.products[i + 1]
+        return positive_pairs
 
-            feat1 = self._extract_product_features(prod1)
-            feat2 = self._extract_product_features(prod2)
+    def _load_catalog_embeddings(self, model: Optional[SentenceTransformer] = None) -> Optional[np.ndarray]:
+        """
+        Product embedding matrix for hard-negative mining.
 
-            # Only use as negative if categories are different
-            if feat1['category'] and feat2['category']:
-                if feat1['category'] != feat2['category']:
-                    text1 = feat1['full_text']
-                    text2 = feat2['full_text']
-
-                    if text1 and text2:
-                        # Create negative pair (similarity score: 0.0-0.3)
-                        score = random.uniform(0.0, 0.3)
+        Uses the matcher's cached matrix (fine-tuned model first, then the base
+        model); encodes the catalog with the given model if neither is cached.
+        """
+        texts = [BertSemanticMatcher._get_product_text(product) for product in self.products]
+        for model_id in (str(self.output_model_path), self.base_model):
+            embeddings = EmbeddingCache(self.cache_dir, model_id, get_model_version(model_id)).lookup(texts)
+            if embeddings is not None:
+                logger.info(f"Using cached product embeddings of {model_id} for hard negatives")
+                return embeddings
+
+        if model is None:
+            return None
+        logger.info("No cached product embeddings, encoding catalog for hard negatives...")
+        return model.encode(texts, batch_size=32, convert_to_numpy=True, normalize_embeddings=True)
+
+    def _mine_hard_negatives(
+        self,
+        embeddings: np.ndarray,
+        max_pairs: int,
+        rng: random.Random,
+        neighbours: int = 10
+    ) -> List[InputExample]:
+        """
+        Hard negative pairs: nearest product in embedding space with a different category.
+
+        Args:
+            embeddings: (num_products, dim) normalized product embeddings
+            max_pairs: Maximum number of pairs
+            rng: Random generator (anchor order and labels)
+            neighbours: Neighbours searched per anchor product
+
+        Returns:
+            Negative InputExamples (similarity label 0.0-0.3)
+        """
+        features = self._get_features()
+        anchors = [i for i, feat in enumerate(features) if feat['full_text'] and feat['category']]
+        rng.shuffle(anchors)
+
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        index = create_vector_index(embeddings, backend=os.getenv('BERT_INDEX_BACKEND', 'exact'))
+
+        negative_pairs = []
+        for start in range(0, len(anchors), 256):
+            if len(negative_pairs) >= max_pairs:
+                break
+            chunk = anchors[start:start + 256]
+            for anchor, (indices, _) in zip(chunk, index.search(embeddings[chunk], neighbours + 1)):
+                category = features[anchor]['category']
+                for idx in indices:
+                    other = features[idx]
+                    if other['category'] and other['category'] != category and other['full_text']:
                         negative_pairs.append(InputExample(
-                            texts=[text1, text2],
-                            label=score
+                            texts=[features[anchor]['full_text'], other['full_text']],
+                            label=rng.uniform(0.0, 0.3)
                         ))
+                        break
 
-        # Strategy 3: Generate explicit negative pairs for different seal types
-        # This is CRITICAL to prevent Duro Seal from matching with Foam Seal
-        logger.info("Generating explicit seal sub-type negative pairs...")
-        seal_products_by_type = {}
-        for prod in self.products:
-            feat = self._extract_product_features(prod)
-            if feat['seal_subtype']:
-                if feat['seal_subtype'] not in seal_products_by_type:
-                    seal_products_by_type[feat['seal_subtype']] = []
-                seal_products_by_type[feat['seal_subtype']].append(prod)
-
-        # Create negative pairs between different seal types
-        seal_types = list(seal_products_by_type.keys())
+        return negative_pairs[:max_pairs]
+
+    def _generate_random_negatives(self, max_pairs: int, rng: random.Random) -> List[InputExample]:
+        """Negative pairs of random products from different categories (no embeddings available)"""
+        features = self._get_features()
+        order = list(range(len(features)))
+        rng.shuffle(order)
+
+        negative_pairs = []
+        for i, j in list(zip(order, order[1:]))[:max_pairs]:
+            feat1, feat2 = features[i], features[j]
+            # Only use as negative if categories are different
+            if feat1['category'] and feat2['category'] and feat1['category'] != feat2['category']:
+                if feat1['full_text'] and feat2['full_text']:
+                    negative_pairs.append(InputExample(
+                        texts=[feat1['full_text'], feat2['full_text']],
+                        label=rng.uniform(0.0, 0.3)
+                    ))
+        return negative_pairs
+
+    def _generate_seal_negatives(self, rng: random.Random) -> List[InputExample]:
+        """
+        Explicit negative pairs between different seal sub-types.
+
+        This is CRITICAL to prevent Duro Seal from matching with Foam Seal.
+        """
+        features = self._get_features()
+        seal_products_by_type = defaultdict(list)
+        for idx, feat in enumerate(features):
+            if feat['seal_subtype'] and feat['full_text']:
+                seal_products_by_type[feat['seal_subtype']].append(idx)
+
+        negative_pairs = []
+        seal_types = sorted(seal_products_by_type)
         for i, type1 in enumerate(seal_types):
             for type2 in seal_types[i+1:]:
                 # Sample products from each type
                 prods1 = seal_products_by_type[type1]
                 prods2 = seal_products_by_type[type2]
 
-                for prod1 in random.sample(prods1, min(5, len(prods1))):
-                    for prod2 in random.sample(prods2, min(2, len(prods2))):
-                        feat1 = self._extract_product_features(prod1)
-                        feat2 = self._extract_product_features(prod2)
+                for idx1 in rng.sample(prods1, min(5, len(prods1))):
+                    for idx2 in rng.sample(prods2, min(2, len(prods2))):
+                        # Very low similarity (0.0-0.2) for different seal types
+                        negative_pairs.append(InputExample(
+                            texts=[features[idx1]['full_text'], features[idx2]['full_text']],
+                            label=rng.uniform(0.0, 0.2)
+                        ))
+        return negative_pairs
+
+    def _generate_training_pairs(
+        self,
+        embeddings: Optional[np.ndarray] = None
+    ) -> Tuple[List[InputExample], List[InputExample]]:
+        """
+        Generate positive and hard negative training pairs.
+
+        Near-linear in the catalog size and reproducible (seeded).
+
+        Args:
+            embeddings: Product embedding matrix for hard negatives (catalog order);
+                random different-category pairs are used without it
+
+        Returns:
+            Tuple of (positive_pairs, negative_pairs)
+        """
+        logger.info("Generating training pairs from product catalog...")
+        rng = random.Random(self.seed)
 
-                        text1 = feat1['full_text']
-                        text2 = feat2['full_text']
+        # Strategy 1: Positive pairs (similar products, via blocking keys)
+        positive_pairs = self._generate_positive_pairs(rng)
 
-                        if text1 and text2:
-                            # Very low similarity (0.0-0.2) for different seal types
-                            score = random.uniform(0.0, 0.2)
-                            negative_pairs.append(InputExample(
-                                texts=[text1, text2],
-                                label=score
-                            ))
+        # Strategy 2: Hard negative pairs (different categories)
+        max_negatives = min(len(positive_pairs) * 2, len(self.products) - 1)
+        if embeddings is not None and len(embeddings) == len(self.products):
+            negative_pairs = self._mine_hard_negatives(embeddings, max_negatives, rng)
+        else:
+            negative_pairs = self._generate_random_negatives(max_negatives, rng)
+
+        # Strategy 3: Explicit negative pairs for different seal types
+        logger.info("Generating explicit seal sub-type negative pairs...")
+        negative_pairs.extend(self._generate_seal_negatives(rng))
 
         logger.info(f"Generated {len(positive_pairs)} positive pairs")
         logger.info(f"Generated {len(negative_pairs)} negative pairs (including seal sub-type negatives)")
@@ -327,11 +488,186 @@ class BERTFineTuner:
         logger.info(f"Generated {len(augmented_pairs)} augmented pairs")
         return augmented_pairs
 
+    def get_catalog_hash(self) -> str:
+        """Hash of the catalog content the training pairs are generated from"""
+        digest = hashlib.sha1()
+        for product in self.products:
+            digest.update(json.dumps(
+                [product.get('default_code'), product.get('name'), product.get('display_name'),
+                 BertSemanticMatcher._get_product_text(product)],
+                ensure_ascii=False
+            ).encode('utf-8'))
+            digest.update(b'\n')
+        return digest.hexdigest()
+
+    def _get_pairs_path(self) -> Path:
+        """Persisted training pairs of this catalog (and seed)"""
+        key = hashlib.sha1(
+            f"{self.get_catalog_hash()}|{self.seed}|{PAIRS_VERSION}".encode('utf-8')
+        ).hexdigest()[:16]
+        return Path(self.cache_dir) / f"training_pairs_{key}.json"
+
+    def load_training_pairs(
+        self,
+        model: Optional[SentenceTransformer] = None
+    ) -> Tuple[List[InputExample], List[InputExample], List[InputExample]]:
+        """
+        Positive, negative and augmented pairs, generated once per catalog.
+
+        Pairs are stored in the cache directory keyed by the catalog hash; pairs
+        of an older catalog are removed when a new set is written.
+
+        Args:
+            model: Model to encode the catalog with for hard negatives (only used
+                when pairs are generated and no cached embeddings exist)
+
+        Returns:
+            Tuple of (positive_pairs, negative_pairs, augmented_pairs)
+        """
+        pairs_path = self._get_pairs_path()
+        if pairs_path.exists():
+            try:
+                with open(pairs_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                pairs = tuple(
+                    [InputExample(texts=[text1, text2], label=label) for text1, text2, label in data[name]]
+                    for name in ('positive', 'negative', 'augmented')
+                )
+                logger.info(f"[OK] Loaded training pairs from {pairs_path}")
+                return pairs
+            except Exception as e:
+                logger.warning(f"Failed to load training pairs {pairs_path}: {e}, generating them again")
+
+        positive_pairs, negative_pairs = self._generate_training_pairs(self._load_catalog_embeddings(model))
+        augmented_pairs = self._generate_augmented_pairs()
+
+        try:
+            pairs_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = pairs_path.with_suffix(f'.{os.getpid()}.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    name: [[*example.texts, example.label] for example in examples]
+                    for name, examples in (('positive', positive_pairs),
+                                           ('negative', negative_pairs),
+                                           ('augmented', augmented_pairs))
+                }, f, ensure_ascii=False)
+            os.replace(tmp_path, pairs_path)
+            for stale in pairs_path.parent.glob("training_pairs_*.json"):
+                if stale != pairs_path:
+                    stale.unlink()
+            logger.info(f"Saved training pairs to {pairs_path}")
+        except OSError as e:
+            logger.warning(f"Failed to save training pairs: {e}")
+
+        return positive_pairs, negative_pairs, augmented_pairs
+
+    def _load_training_model(self) -> SentenceTransformer:
+        """Model to train (base or current fine-tuned model) prepared for the train mode"""
+        import torch
+        from sentence_transformers import models
+
+        start_model = self.base_model
+        if self.warm_start and (self.output_model_path / "modules.json").exists():
+            start_model = str(self.output_model_path)
+        logger.info(f"Loading model: {start_model} on {self.device} (train mode: {self.train_mode})")
+        model = SentenceTransformer(start_model, device=self.device)
+
+        modules = list(model)
+        if self.train_mode == 'head':
+            if not any(isinstance(module, models.Dense) for module in modules):
+                # Identity-initialized projection before normalization: starts as the base model
+                dim = model.get_sentence_embedding_dimension()
+                head = models.Dense(dim, dim, bias=True, activation_function=torch.nn.Identity())
+                with torch.no_grad():
+                    head.linear.weight.copy_(torch.eye(dim))
+                    head.linear.bias.zero_()
+                position = len(modules) - 1 if isinstance(modules[-1], models.Normalize) else len(modules)
+                modules.insert(position, head)
+                model = SentenceTransformer(modules=modules, device=self.device)
+
+            for module in modules:
+                if not isinstance(module, models.Dense):
+                    for param in module.parameters():
+                        param.requires_grad = False
+
+        elif self.train_mode == 'freeze':
+            transformer = modules[0].auto_model
+            for name, param in transformer.named_parameters():
+                if 'embeddings' in name.split('.')[0:2]:
+                    param.requires_grad = False
+            # Encoder layers are the first ModuleList (encoder.layer for BERT, layers for ModernBERT)
+            layers = next((m for m in transformer.modules() if isinstance(m, torch.nn.ModuleList)), [])
+            for layer in list(layers)[:self.frozen_layers]:
+                for param in layer.parameters():
+                    param.requires_grad = False
+
+        trainable = sum(p.numel() for p in model.parameters() if p.requires_grad)
+        total = sum(p.numel() for p in model.parameters())
+        logger.info(f"Trainable parameters: {trainable:,} of {total:,}")
+        return model
+
+    def _get_checkpoint_path(self, epochs: int, batch_size: int) -> Path:
+        """Checkpoint directory of one training run (same catalog and settings resume)"""
+        start_version = get_model_version(str(self.output_model_path)) if self.warm_start else self.base_model
+        run_key = hashlib.sha1(json.dumps([
+            self.get_catalog_hash(), self.seed, self.train_mode, self.frozen_layers,
+            start_version, epochs, batch_size
+        ]).encode('utf-8')).hexdigest()[:12]
+        return self.output_model_path.with_name(f"{self.output_model_path.name}-checkpoints") / run_key
+
+    def _publish_model(self, staging_path: Path):
+        """
+        Replace the fine-tuned model with a newly trained one.
+
+        Two directory renames: the old model is kept as '<name>.previous'.
+        """
+        previous_path = self.output_model_path.with_name(f"{self.output_model_path.name}.previous")
+        if previous_path.exists():
+            shutil.rmtree(previous_path)
+        if self.output_model_path.exists():
+            os.replace(self.output_model_path, previous_path)
+        os.replace(staging_path, self.output_model_path)
+
+    def is_up_to_date(self) -> bool:
+        """True if the fine-tuned model was trained on this catalog with these settings"""
+        info_path = self.output_model_path / TRAINING_INFO_FILE
+        if not info_path.exists():
+            return False
+        try:
+            with open(info_path, 'r', encoding='utf-8') as f:
+                info = json.load(f)
+        except Exception:
+            return False
+        return (
+            info.get('catalog_hash') == self.get_catalog_hash()
+            and info.get('base_model') == self.base_model
+            and info.get('train_mode') == self.train_mode
+        )
+
+    def refresh_embedding_cache(self):
+        """
+        Embed the catalog with the published model.
+
+        Only the fine-tuned model's caches are rebuilt (its new version replaces
+        the old matrix and, with BERT_INFERENCE_BACKEND=onnx, the ONNX export),
+        so the next email run starts without encoding the catalog.
+        """
+        logger.info("Re-embedding catalog with the fine-tuned model...")
+        matcher = BertSemanticMatcher(
+            str(self.products_json_path),
+            model_name=str(self.output_model_path),
+            cache_dir=self.cache_dir,
+            device='cpu'
+        )
+        logger.info(f"[OK] Embedding cache ready for {matcher.model_version}")
+
     def fine_tune(
         self,
         epochs: int = 3,
         batch_size: int = 16,
-        warmup_steps: int = 100
+        warmup_steps: int = 100,
+        resume: bool = True,
+        checkpoint_steps: int = 200
     ):
         """
         Fine-tune the BERT model on product catalog.
@@ -340,22 +676,29 @@ class BERTFineTuner:
             epochs: Number of training epochs
             batch_size: Training batch size
             warmup_steps: Warmup steps for learning rate scheduler
+            resume: Continue from the last checkpoint of an interrupted run
+                (same catalog and settings)
+            checkpoint_steps: Save a checkpoint every N training steps
         """
         logger.info("="*80)
         logger.info("Starting BERT Fine-tuning for Product Matching")
         logger.info("="*80)
 
-        # Load base model on training device (CUDA for training, CPU for production)
-        logger.info(f"Loading base model: {self.base_model} on {self.device}")
-        model = SentenceTransformer(self.base_model, device=self.device)
+        import torch
+        torch.manual_seed(self.seed)
+        threads = os.getenv('BERT_TRAIN_THREADS')
+        if threads:
+            torch.set_num_threads(int(threads))
 
-        # Generate training data
-        positive_pairs, negative_pairs = self._generate_training_pairs()
-        augmented_pairs = self._generate_augmented_pairs()
+        # Load model on training device (CUDA for training, CPU for production)
+        model = self._load_training_model()
+
+        # Training data (generated once per catalog)
+        positive_pairs, negative_pairs, augmented_pairs = self.load_training_pairs(model)
 
         # Combine all training examples
         train_examples = positive_pairs + negative_pairs + augmented_pairs
-        random.shuffle(train_examples)
+        random.Random(self.seed).shuffle(train_examples)
 
         logger.info(f"Total training examples: {len(train_examples)}")
 
@@ -376,14 +719,38 @@ class BERTFineTuner:
         else:
             logger.info("Training on CPU - Expected time: 10-30 minutes")
 
+        # Train into a staging directory; the live model is only replaced when done
+        staging_path = self.output_model_path.with_name(f"{self.output_model_path.name}.staging")
+        if staging_path.exists():
+            shutil.rmtree(staging_path)
+        checkpoint_path = self._get_checkpoint_path(epochs, batch_size)
+
         model.fit(
             train_objectives=[(train_dataloader, train_loss)],
             epochs=epochs,
             warmup_steps=warmup_steps,
-            output_path=str(self.output_model_path),
-            show_progress_bar=True
+            output_path=str(staging_path),
+            show_progress_bar=True,
+            checkpoint_path=str(checkpoint_path),
+            checkpoint_save_steps=checkpoint_steps,
+            checkpoint_save_total_limit=2,
+            resume_from_checkpoint=resume
         )
 
+        with open(staging_path / TRAINING_INFO_FILE, 'w', encoding='utf-8') as f:
+            json.dump({
+                'catalog_hash': self.get_catalog_hash(),
+                'base_model': self.base_model,
+                'train_mode': self.train_mode,
+                'frozen_layers': self.frozen_layers if self.train_mode == 'freeze' else None,
+                'seed': self.seed,
+                'epochs': epochs,
+                'training_examples': len(train_examples)
+            }, f, indent=2)
+
+        self._publish_model(staging_path)
+        shutil.rmtree(checkpoint_path.parent, ignore_errors=True)
+
         # Model is saved and can be loaded on any device (CPU or GPU)
         logger.info("Model saved - can be loaded on CPU or GPU for inference")
 
@@ -9,7 +9,8 @@ Key Features:
 - Semantic understanding (tape vs seal, blade vs adhesive, etc.)
 - Multilingual support (German ↔ English)
 - Long context support (8192 tokens)
-- Cached embeddings for fast matching
+- Cached embeddings for fast matching (per product, memory-mapped)
+- Cached query embeddings for repeat orders (LRU + SQLite)
 - Filters semantically similar products for downstream token matching
 
 Architecture:
@@ -35,9 +36,28 @@ import platform
 from sentence_transformers import SentenceTransformer
 import torch
 
+from retriever_module.match_result import MatchResult
+from retriever_module.embedding_cache import EmbeddingCache
+from retriever_module.query_embedding_cache import QueryEmbeddingCache, normalize_query
+from retriever_module.vector_index import create_vector_index, QUANTIZED_DTYPES
+
 logger = logging.getLogger(__name__)
 
 
+def get_model_version(model_name: str) -> str:
+    """
+    Model identifier that changes when the model changes.
+
+    A local model directory (e.g. the fine-tuned model) is re-trained in
+    place, so its newest file modification time is part of the version.
+    """
+    model_path = Path(model_name)
+    if not model_path.is_dir():
+        return model_name
+    mtimes = [path.stat().st_mtime_ns for path in model_path.rglob('*') if path.is_file()]
+    return f"{model_name}@{max(mtimes, default=0)}"
+
+
 class BertSemanticMatcher:
     """
     Semantic product matcher using BERT embeddings.
@@ -52,7 +72,10 @@ class BertSemanticMatcher:
         products_json_path: str,
         model_name: str = "Alibaba-NLP/gte-modernbert-base",
         cache_dir: str = ".bert_cache",
-        device: Optional[str] = None
+        device: Optional[str] = None,
+        index_backend: Optional[str] = None,
+        embedding_dtype: Optional[str] = None,
+        inference_backend: Optional[str] = None
     ):
         """
         Initialize BERT Semantic Matcher.
@@ -62,12 +85,18 @@ class BertSemanticMatcher:
             model_name: HuggingFace model identifier (or path to fine-tuned model)
             cache_dir: Directory for caching embeddings
             device: Device to use ('cuda', 'cpu', or None for auto)
+            index_backend: Vector index ('exact', 'ivf', 'hnsw'; None = BERT_INDEX_BACKEND
+                env var, default 'exact')
+            embedding_dtype: Scan precision of the exact index ('float32', 'float16', 'int8';
+                None = BERT_EMBEDDING_DTYPE env var, default 'float32')
+            inference_backend: 'torch' or 'onnx' (CPU only, falls back to torch;
+                None = BERT_INFERENCE_BACKEND env var, default 'torch')
         """
         self.products_json_path = Path(products_json_path)
 
         # Check if fine-tuned model exists and use it automatically
         finetuned_model_path = Path("models/finetuned-product-matcher")
-        if finetuned_model_path.exists() and model_name == "Alibaba-NLP/gte-modernbert-base":
+        if (finetuned_model_path / "modules.json").exists() and model_name == "Alibaba-NLP/gte-modernbert-base":
             logger.info(f"Fine-tuned model found at {finetuned_model_path}, using it instead of base model")
             self.model_name = str(finetuned_model_path)
             self.is_finetuned = True
@@ -77,6 +106,7 @@ class BertSemanticMatcher:
 
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(exist_ok=True)
+        self.cache_path = None
 
         # Auto-detect device (GPU if available, CPU fallback)
         if device is None:
@@ -88,15 +118,27 @@ class BertSemanticMatcher:
         else:
             self.device = device
 
-        logger.info(f"Initializing BERT Semantic Matcher with {model_name} on {self.device}")
+        logger.info(f"Initializing BERT Semantic Matcher with {self.model_name} on {self.device}")
+        self.model_version = get_model_version(self.model_name)
+
+        # Optional ONNX Runtime backend (CPU), PyTorch otherwise; int8 quantization
+        # changes the embeddings slightly, so it is opt-in (BERT_ONNX_QUANTIZE=true)
+        self.inference_backend = (inference_backend or os.getenv('BERT_INFERENCE_BACKEND', 'torch')).strip().lower()
+        self.onnx_quantized = os.getenv('BERT_ONNX_QUANTIZE', 'false').lower() == 'true'
+        self.model = None
+        if self.inference_backend == 'onnx':
+            self.model = self._load_onnx_model(self.model_name)
+        if self.model is None:
+            self.inference_backend = 'torch'
 
         # Load model
         try:
             # Explicitly set device and avoid CUDA initialization issues
-            self.model = SentenceTransformer(model_name, device=self.device)
+            if self.model is None:
+                self.model = SentenceTransformer(self.model_name, device=self.device)
 
             # If CUDA failed but CPU is available, retry with CPU
-            if self.device == 'cuda':
+            if self.device == 'cuda' and self.inference_backend == 'torch':
                 try:
                     # Test if model actually loaded on CUDA
                     _ = self.model.encode("test", convert_to_numpy=True)
@@ -104,13 +146,29 @@ class BertSemanticMatcher:
                     logger.warning(f"CUDA model failed to initialize: {cuda_error}")
                     logger.info("Retrying with CPU...")
                     self.device = 'cpu'
-                    self.model = SentenceTransformer(model_name, device='cpu')
+                    self.model = SentenceTransformer(self.model_name, device='cpu')
 
-            logger.info(f"[OK] Model loaded: {model_name} on {self.device}")
+            logger.info(f"[OK] Model loaded: {self.model_name} on {self.device} ({self.inference_backend})")
         except Exception as e:
-            logger.error(f"Failed to load model {model_name}: {e}")
+            logger.error(f"Failed to load model {self.model_name}: {e}")
             raise
 
+        # Quantized ONNX vectors differ slightly from the float32 model: separate cache
+        cache_model_id, cache_version = self.model_name, self.model_version
+        if self.inference_backend == 'onnx' and self.onnx_quantized:
+            cache_model_id = f"{self.model_name}@onnx-qint8"
+            cache_version = f"{self.model_version}@onnx-qint8"
+        self.embedding_cache = EmbeddingCache(cache_dir, cache_model_id, cache_version)
+
+        # Query embeddings (repeat orders re-use them; BERT_QUERY_CACHE=false keeps them in memory only)
+        persist_queries = os.getenv('BERT_QUERY_CACHE', 'true').lower() == 'true'
+        self.query_cache = QueryEmbeddingCache(
+            str(self.cache_dir / "query_embeddings.sqlite") if persist_queries else None,
+            cache_version,
+            max_memory_entries=int(os.getenv('BERT_QUERY_CACHE_MEMORY', '2048')),
+            max_disk_entries=int(os.getenv('BERT_QUERY_CACHE_DISK', '50000'))
+        )
+
         # Load products
         self.products = self._load_products()
         logger.info(f"[OK] Loaded {len(self.products)} products")
@@ -119,6 +177,43 @@ class BertSemanticMatcher:
         self.embeddings = self._load_or_compute_embeddings()
         logger.info(f"[OK] Embeddings ready: {self.embeddings.shape}")
 
+        # Nearest-neighbour index over the embeddings (exact brute force by default)
+        self.index_backend = index_backend or os.getenv('BERT_INDEX_BACKEND', 'exact')
+        self.embedding_dtype = embedding_dtype or os.getenv('BERT_EMBEDDING_DTYPE', 'float32')
+        self.vector_index = create_vector_index(
+            self.embeddings,
+            backend=self.index_backend,
+            cache_path=self.cache_path,
+            dtype=self.embedding_dtype,
+            **self._get_index_options()
+        )
+        logger.info(f"[OK] Vector index: {self.vector_index.name}")
+
+    def _load_onnx_model(self, model_name: str) -> Optional[SentenceTransformer]:
+        """
+        Load the model through onnxruntime (exported and cached on first use).
+
+        Returns:
+            ONNX-backed SentenceTransformer, or None to use PyTorch
+        """
+        if self.device != 'cpu':
+            logger.info(f"ONNX backend only used on CPU, keeping PyTorch on {self.device}")
+            return None
+
+        try:
+            from retriever_module.onnx_encoder import load_onnx_model
+            threads = os.getenv('BERT_ONNX_THREADS')
+            return load_onnx_model(
+                model_name,
+                cache_dir=str(self.cache_dir),
+                quantize=self.onnx_quantized,
+                model_version=self.model_version,
+                num_threads=int(threads) if threads else None
+            )
+        except Exception as e:
+            logger.warning(f"ONNX backend unavailable ({e}), falling back to PyTorch")
+            return None
+
     def _load_products(self) -> List[Dict]:
         """Load products from JSON file."""
         try:
@@ -138,7 +233,8 @@ class BertSemanticMatcher:
             logger.error(f"Failed to load products: {e}")
             raise
 
-    def _get_product_text(self, product: Dict) -> str:
+    @staticmethod
+    def _get_product_text(product: Dict) -> str:
         """
         Convert product to searchable text.
 
@@ -176,17 +272,20 @@ class BertSemanticMatcher:
 
         return ' '.join(parts)
 
-    def _compute_embeddings(self) -> np.ndarray:
+    def _compute_embeddings(self, texts: Optional[List[str]] = None) -> np.ndarray:
         """
-        Compute embeddings for all products.
+        Compute embeddings for product texts.
+
+        Args:
+            texts: Texts to encode (default: all products)
 
         Returns:
-            Numpy array of shape (num_products, embedding_dim)
+            Numpy array of shape (num_texts, embedding_dim)
         """
-        logger.info("Computing embeddings for all products...")
+        if texts is None:
+            texts = [self._get_product_text(p) for p in self.products]
 
-        # Prepare texts
-        texts = [self._get_product_text(p) for p in self.products]
+        logger.info(f"Computing embeddings for {len(texts)} products...")
 
         # Compute embeddings in batches
         embeddings = self.model.encode(
@@ -200,109 +299,192 @@ class BertSemanticMatcher:
         logger.info(f"Computed embeddings: {embeddings.shape}")
         return embeddings
 
-    def _get_cache_path(self) -> Path:
-        """Get path to embeddings cache file."""
-        # Use model name and products file modification time in cache filename
-        mtime = self.products_json_path.stat().st_mtime
-        model_slug = self.model_name.replace('/', '_')
-        cache_file = f"embeddings_{model_slug}_{int(mtime)}.npy"
-        return self.cache_dir / cache_file
-
     def _load_or_compute_embeddings(self) -> np.ndarray:
         """
-        Load embeddings from cache or compute if not cached.
+        Load embeddings from the per-product cache, encoding only new or edited products.
 
         Returns:
-            Numpy array of product embeddings
+            Numpy array of product embeddings (read-only memory map when cached)
         """
-        cache_path = self._get_cache_path()
+        texts = [self._get_product_text(p) for p in self.products]
+        embeddings, self.cache_path = self.embedding_cache.load(
+            texts,
+            encode=self._compute_embeddings,
+            dimension=self.model.get_sentence_embedding_dimension()
+        )
+        return embeddings
 
-        # Try to load from cache
-        if cache_path.exists():
-            try:
-                logger.info(f"Loading cached embeddings from {cache_path}")
-                embeddings = np.load(cache_path)
+    def _get_index_options(self) -> Dict:
+        """Vector index parameters from the environment (unset = backend defaults)."""
+        options = {}
+        backend = self.index_backend.strip().lower()
+        env_options = {
+            'ivf': [('nlist', 'BERT_INDEX_NLIST'), ('nprobe', 'BERT_INDEX_NPROBE')],
+            'hnsw': [('m', 'BERT_INDEX_HNSW_M'), ('ef_search', 'BERT_INDEX_EF_SEARCH')],
+        }
+        if backend == 'exact' and self.embedding_dtype.strip().lower() in QUANTIZED_DTYPES:
+            env_options['exact'] = [('rescore_factor', 'BERT_RESCORE_FACTOR')]
+        for option, env_name in env_options.get(backend, []):
+            value = os.getenv(env_name)
+            if value:
+                options[option] = int(value)
+        return options
 
-                # Validate shape
-                if embeddings.shape[0] == len(self.products):
-                    logger.info("[OK] Cache valid, using cached embeddings")
-                    return embeddings
-                else:
-                    logger.warning("Cache invalid (product count mismatch), recomputing")
+    def search(
+        self,
+        query: str,
+        top_k: int = 20,
+        min_score: float = 0.60
+    ) -> List[Dict]:
+        """
+        Search for products semantically similar to query.
 
-            except Exception as e:
-                logger.warning(f"Failed to load cache: {e}, recomputing")
+        Args:
+            query: Search query (product name, code, description)
+            top_k: Maximum number of results to return
+            min_score: Minimum similarity score (0-1)
 
-        # Compute embeddings
-        embeddings = self._compute_embeddings()
+        Returns:
+            List of matching products with scores, sorted by relevance
+        """
+        return [match.to_dict() for match in self.search_results(query, top_k, min_score)]
 
-        # Save to cache
-        try:
-            np.save(cache_path, embeddings)
-            logger.info(f"[OK] Saved embeddings to cache: {cache_path}")
-        except Exception as e:
-            logger.warning(f"Failed to save cache: {e}")
+    def search_results(
+        self,
+        query: str,
+        top_k: int = 20,
+        min_score: float = 0.60
+    ) -> List[MatchResult]:
+        """
+        Same as search() but returns MatchResult objects (no product copies).
 
-        return embeddings
+        Args:
+            query: Search query (product name, code, description)
+            top_k: Maximum number of results to return
+            min_score: Minimum similarity score (0-1)
+
+        Returns:
+            List of MatchResult (score = BERT similarity), sorted by relevance
+        """
+        query_embeddings = self._encode_queries([query])
+        results = self._build_results(query_embeddings, top_k, min_score)[0]
+
+        logger.info(f"BERT search: '{query}' → {len(results)} results (min: {min_score})")
+        return results
 
-    def _cosine_similarity(self, query_embedding: np.ndarray) -> np.ndarray:
+    def search_many(
+        self,
+        queries: List[str],
+        top_k: int = 20,
+        min_score: float = 0.60
+    ) -> List[List[Dict]]:
         """
-        Compute cosine similarity between query and all products.
+        Search several queries at once (e.g. all product lines of an email).
 
         Args:
-            query_embedding: Query embedding vector (normalized)
+            queries: Search queries
+            top_k: Maximum number of results per query
+            min_score: Minimum similarity score (0-1)
 
         Returns:
-            Array of similarity scores (0-1)
+            One result list per query, same order and format as search()
         """
-        # Both are L2 normalized, so cosine = dot product
-        similarities = np.dot(self.embeddings, query_embedding)
-        return similarities
+        return [
+            [match.to_dict() for match in matches]
+            for matches in self.search_results_many(queries, top_k, min_score)
+        ]
 
-    def search(
+    def search_results_many(
         self,
-        query: str,
+        queries: List[str],
         top_k: int = 20,
         min_score: float = 0.60
-    ) -> List[Dict]:
+    ) -> List[List[MatchResult]]:
         """
-        Search for products semantically similar to query.
+        Batched search_results(): one encode call and one matrix product for all queries.
 
         Args:
-            query: Search query (product name, code, description)
-            top_k: Maximum number of results to return
+            queries: Search queries
+            top_k: Maximum number of results per query
             min_score: Minimum similarity score (0-1)
 
         Returns:
-            List of matching products with scores, sorted by relevance
+            One MatchResult list per query, sorted by relevance
         """
-        # Encode query
-        query_embedding = self.model.encode(
-            query,
-            convert_to_numpy=True,
-            normalize_embeddings=True
-        )
+        if not queries:
+            return []
 
-        # Compute similarities
-        similarities = self._cosine_similarity(query_embedding)
+        query_embeddings = self._encode_queries(queries)
 
-        # Filter by threshold
-        mask = similarities >= min_score
-        valid_indices = np.where(mask)[0]
+        all_results = []
+        for query, results in zip(queries, self._build_results(query_embeddings, top_k, min_score)):
+            logger.info(f"BERT search: '{query}' → {len(results)} results (min: {min_score})")
+            all_results.append(results)
 
-        # Sort by similarity (descending)
-        sorted_indices = valid_indices[np.argsort(-similarities[valid_indices])]
+        return all_results
 
-        # Build results
-        results = []
-        for idx in sorted_indices[:top_k]:
-            product = self.products[idx].copy()
-            product['bert_score'] = float(similarities[idx])
-            product['bert_score_percent'] = f"{similarities[idx] * 100:.1f}%"
-            results.append(product)
+    def _encode_queries(self, queries: List[str]) -> np.ndarray:
+        """
+        Embeddings of the queries, encoding only those not in the query cache.
 
-        logger.info(f"BERT search: '{query}' → {len(results)} results (min: {min_score})")
-        return results
+        Cache misses are encoded in one forward pass (batched).
+
+        Args:
+            queries: Search queries
+
+        Returns:
+            Normalized query embeddings (one row per query)
+        """
+        normalized = [normalize_query(query) for query in queries]
+        vectors = self.query_cache.get_many(normalized)
+
+        missing = list(dict.fromkeys(
+            text for text, vector in zip(normalized, vectors) if vector is None
+        ))
+        if missing:
+            encoded = self.model.encode(
+                missing,
+                batch_size=32,
+                convert_to_numpy=True,
+                normalize_embeddings=True
+            )
+            self.query_cache.put_many(missing, encoded)
+            by_text = dict(zip(missing, encoded))
+            vectors = [by_text[text] if vector is None else vector
+                       for text, vector in zip(normalized, vectors)]
+
+        return np.vstack(vectors).astype(np.float32, copy=False)
+
+    def _build_results(
+        self,
+        query_embeddings: np.ndarray,
+        top_k: int,
+        min_score: float
+    ) -> List[List[MatchResult]]:
+        """
+        Top-k products per query from the vector index, as MatchResult objects.
+
+        Args:
+            query_embeddings: (num_queries, dim) normalized query embeddings
+            top_k: Maximum number of results per query
+            min_score: Minimum similarity score (0-1)
+
+        Returns:
+            One sorted MatchResult list per query
+        """
+        all_results = []
+        for indices, scores in self.vector_index.search(query_embeddings, top_k):
+            results = []
+            for idx, score in zip(indices, scores):
+                if score < min_score:
+                    break  # sorted by score, the rest is lower
+                score = float(score)
+                results.append(MatchResult(self.products[idx], score, int(idx), {
+                    'bert_score': score,
+                    'bert_score_percent': f"{score * 100:.1f}%"
+                }))
+            all_results.append(results)
+        return all_results
 
     def search_by_code(
         self,
@@ -354,6 +536,22 @@ class BertSemanticMatcher:
             normalize_embeddings=True
         )
 
+    def get_stats(self) -> Dict:
+        """
+        Get matcher statistics.
+
+        Returns:
+            Dictionary with model, device, index and query cache info
+        """
+        return {
+            'bert_model': self.model_name,
+            'bert_model_version': self.model_version,
+            'bert_device': self.device,
+            'bert_index': self.vector_index.name,
+            'bert_inference': self.inference_backend,
+            'query_cache': self.query_cache.stats(),
+        }
+
 
 if __name__ == "__main__":
     # Test the matcher
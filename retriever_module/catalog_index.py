@@ -0,0 +1,425 @@
+"""
+Catalog Index Module
+
+In-memory indexes over the product catalog that prune candidates before the
+(expensive) similarity scoring in VectorStore. Every index here is exact: it
+only skips entries that provably cannot reach the requested threshold, so the
+matching results are identical to a full linear scan.
+"""
+
+import math
+import logging
+from collections import Counter
+from difflib import SequenceMatcher
+from typing import Callable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - pure Python fallback below
+    np = None
+
+try:
+    import Levenshtein
+except ImportError:
+    Levenshtein = None
+
+logger = logging.getLogger(__name__)
+
+# Slack for float rounding when comparing score upper bounds to thresholds
+BOUND_TOLERANCE = 1e-9
+
+
+def sequence_matcher_ratio(s1: str, s2: str) -> float:
+    """difflib ratio (reference scorer)"""
+    return SequenceMatcher(None, s1, s2).ratio()
+
+
+def get_ratio_function(name: Optional[str] = None) -> Callable[[str, str], float]:
+    """
+    Get a string ratio function by name
+
+    - "difflib" (default): difflib.SequenceMatcher.ratio, the reference scores
+    - "levenshtein": python-Levenshtein ratio (C implementation, 2*LCS/(la+lb)).
+      It is never lower than difflib's ratio (difflib's greedy matching finds at
+      most the LCS). Tolerance: for pairs scoring 0.6 or more on the product and
+      customer catalogs it is at most +0.11 above difflib, so borderline names
+      may pass the thresholds slightly earlier. Falls back to difflib if the
+      package is not installed.
+
+    Args:
+        name: Scorer name (case insensitive)
+
+    Returns:
+        Function ratio(s1, s2) -> 0.0-1.0
+    """
+    name = (name or 'difflib').strip().lower()
+    if name == 'levenshtein':
+        if Levenshtein is not None:
+            return Levenshtein.ratio
+        logger.warning("python-Levenshtein not installed, using difflib for name similarity")
+    elif name != 'difflib':
+        logger.warning(f"Unknown name similarity scorer '{name}', using difflib")
+    return sequence_matcher_ratio
+
+
+def _bigrams(text: str) -> Counter:
+    """Multiset of character bigrams in text"""
+    return Counter(text[i:i + 2] for i in range(len(text) - 1))
+
+
+class FuzzyCodeIndex:
+    """
+    Bigram index for fuzzy product-code matching (Level 2)
+
+    The scorer is assumed to be bounded by difflib's SequenceMatcher ratio on
+    the lowercased, stripped strings (true for VectorStore._calculate_similarity_safe).
+    Since ratio = 2*M/(la+lb) with M <= LCS, a code can only reach threshold t if
+    its longest common subsequence m with the query satisfies m >= t*(la+lb)/2.
+    That gives two filters applied before scoring:
+
+    - Length filter: m <= min(la, lb)
+    - Bigram count filter: the codes share at least
+      (la - 1) - 2*(la - m) - (lb - m) bigrams (and symmetrically for b)
+      because each unmatched character breaks at most two bigrams of its own
+      string and at most one bigram of the other string.
+
+    Candidates are generated from the rarest query bigrams (prefix filtering), so
+    codes sharing nothing with the query are never touched.
+    """
+
+    def __init__(self, codes: List[str], scorer: Callable[[str, str], float], min_length: int = 3):
+        """
+        Build the index
+
+        Args:
+            codes: Normalized product codes, one per catalog entry (empty for no code)
+            scorer: Similarity function scorer(query_code, db_code) -> 0.0-1.0
+            min_length: Codes shorter than this are never matched (as in Level 2)
+        """
+        self.scorer = scorer
+        self._codes = []          # distinct normalized codes
+        self._keys = []           # lowercased/stripped form the scorer compares
+        self._bigrams = []        # bigram multiset per distinct code
+        self._positions = []      # catalog indices per distinct code (catalog order)
+        self._by_length = {}      # key length -> distinct code ids
+        self._postings = {}       # bigram -> distinct code ids
+
+        code_ids = {}
+        for position, code in enumerate(codes):
+            if not code or len(code) < min_length:
+                continue
+
+            code_id = code_ids.get(code)
+            if code_id is None:
+                code_id = len(self._codes)
+                code_ids[code] = code_id
+                key = code.lower().strip()
+                grams = _bigrams(key)
+                self._codes.append(code)
+                self._keys.append(key)
+                self._bigrams.append(grams)
+                self._positions.append([])
+                self._by_length.setdefault(len(key), []).append(code_id)
+                for gram in grams:
+                    self._postings.setdefault(gram, []).append(code_id)
+
+            self._positions[code_id].append(position)
+
+        logger.debug(f"FuzzyCodeIndex: {len(self._codes)} distinct codes, {len(self._postings)} bigrams")
+
+    @staticmethod
+    def _min_common(la: int, lb: int, threshold: float) -> Tuple[int, int]:
+        """
+        Minimum LCS and minimum shared bigrams for a pair of lengths to reach threshold
+
+        Returns:
+            (min_lcs, min_shared_bigrams); min_lcs > min(la, lb) means unreachable
+        """
+        min_lcs = max(0, math.ceil(threshold * (la + lb) / 2 - BOUND_TOLERANCE))
+        shared = max(
+            (la - 1) - 2 * (la - min_lcs) - (lb - min_lcs),
+            (lb - 1) - 2 * (lb - min_lcs) - (la - min_lcs),
+        )
+        return min_lcs, shared
+
+    def _candidates(self, key: str, threshold: float) -> List[int]:
+        """Distinct code ids that pass the length and bigram filters"""
+        la = len(key)
+        query_grams = _bigrams(key)
+
+        # Required shared bigrams per admissible candidate length
+        required = {}
+        for lb in self._by_length:
+            min_lcs, shared = self._min_common(la, lb, threshold)
+            if min_lcs <= min(la, lb):
+                required[lb] = shared
+
+        if not required:
+            return []
+
+        candidates = set()
+
+        # Lengths that need no shared bigram at all are taken whole
+        for lb, shared in required.items():
+            if shared <= 0:
+                candidates.update(self._by_length[lb])
+
+        positive = [shared for shared in required.values() if shared > 0]
+        if positive:
+            # A code sharing >= c of the n query bigrams must contain one of the
+            # (n - c + 1) rarest ones (counting multiplicities)
+            probe = sum(query_grams.values()) - min(positive) + 1
+            for gram, count in sorted(query_grams.items(), key=lambda item: len(self._postings.get(item[0], ()))):
+                if probe <= 0:
+                    break
+                candidates.update(self._postings.get(gram, ()))
+                probe -= count
+
+        result = []
+        for code_id in candidates:
+            lb = len(self._keys[code_id])
+            shared_needed = required.get(lb)
+            if shared_needed is None:
+                continue
+            if shared_needed > 0:
+                grams = self._bigrams[code_id]
+                shared = sum(min(count, grams.get(gram, 0)) for gram, count in query_grams.items())
+                if shared < shared_needed:
+                    continue
+            result.append(code_id)
+        return result
+
+    def search(self, query_code: str, threshold: float) -> List[Tuple[int, float, str]]:
+        """
+        Find all catalog entries whose code scores >= threshold against the query
+
+        Args:
+            query_code: Normalized query code
+            threshold: Minimum similarity score
+
+        Returns:
+            List of (catalog_index, score, db_code) sorted by score descending;
+            ties keep catalog order, exactly like a stable sort over a full scan
+        """
+        if threshold <= 0:
+            code_ids = range(len(self._codes))
+        else:
+            key = query_code.lower().strip() if query_code else ''
+            if not key:
+                return []
+            code_ids = self._candidates(key, threshold)
+
+        matches = []
+        for code_id in code_ids:
+            score = self.scorer(query_code, self._codes[code_id])
+            if score >= threshold:
+                for position in self._positions[code_id]:
+                    matches.append((position, score, self._codes[code_id]))
+
+        matches.sort(key=lambda match: match[0])
+        matches.sort(key=lambda match: match[1], reverse=True)
+        return matches
+
+
+class NameSimilarityIndex:
+    """
+    Candidate pruning for name similarity (Level 4 and customer search)
+
+    The scorer is assumed to be bounded by 2*C/(la+lb) on the lowercased,
+    stripped strings, where C is the size of the character multiset
+    intersection (difflib's quick_ratio). Any common subsequence is part of that
+    intersection, so this holds for difflib and Levenshtein ratios alike, and is
+    multiplied by 0.7 when the lengths differ by more than 50% (the length
+    penalty in VectorStore._calculate_similarity_safe). Only names whose bound
+    reaches the threshold are scored, so results equal a full scan.
+
+    The bound is computed for all names at once with numpy (character count
+    matrix); without numpy a pure Python length filter + Counter check is used.
+    """
+
+    def __init__(self, texts: List[str], scorer: Callable[[str, str], float]):
+        """
+        Build the index
+
+        Args:
+            texts: Text per catalog entry (empty/None entries never match)
+            scorer: Similarity function scorer(query, text) -> 0.0-1.0
+        """
+        self.scorer = scorer
+        self._texts = [text if isinstance(text, str) else '' for text in texts]
+        self._keys = [text.lower().strip() for text in self._texts]
+        self._valid = [idx for idx, key in enumerate(self._keys) if key]
+
+        if np is not None:
+            vocabulary = sorted(set(''.join(self._keys)))
+            self._char_column = {char: col for col, char in enumerate(vocabulary)}
+            self._counts = np.zeros((len(self._keys), len(vocabulary)), dtype=np.int32)
+            for row, key in enumerate(self._keys):
+                for char, count in Counter(key).items():
+                    self._counts[row, self._char_column[char]] = count
+            self._lengths = np.array([len(key) for key in self._keys], dtype=np.float64)
+        else:
+            self._char_counts = [Counter(key) for key in self._keys]
+
+    def _bounds(self, key: str):
+        """Upper bound of the similarity of every entry to the query key (numpy array)"""
+        la = len(key)
+        query_counts = Counter(key)
+
+        columns = [self._char_column[char] for char in query_counts if char in self._char_column]
+        query_vector = np.array([query_counts[char] for char in query_counts if char in self._char_column],
+                                dtype=np.int32)
+        if columns:
+            common = np.minimum(self._counts[:, columns], query_vector).sum(axis=1)
+        else:
+            common = np.zeros(len(self._keys), dtype=np.int32)
+
+        totals = self._lengths + la
+        bound = np.divide(2.0 * common, totals, out=np.zeros_like(totals), where=totals > 0)
+        penalized = np.abs(self._lengths - la) > 0.5 * np.maximum(self._lengths, la)
+        bound[penalized] *= 0.7
+        bound[self._lengths == 0] = 0.0
+        return bound
+
+    def _candidates(self, key: str, min_score: float) -> List[int]:
+        """Indices whose similarity upper bound reaches min_score (catalog order)"""
+        if min_score <= 0:
+            return self._valid
+
+        if np is not None:
+            return np.nonzero(self._bounds(key) >= min_score - BOUND_TOLERANCE)[0].tolist()
+
+        la = len(key)
+        query_counts = Counter(key)
+        candidates = []
+        for idx in self._valid:
+            lb = len(self._keys[idx])
+            penalty = 0.7 if abs(la - lb) / max(la, lb) > 0.5 else 1.0
+            if penalty * 2.0 * min(la, lb) / (la + lb) < min_score - BOUND_TOLERANCE:
+                continue
+            common = sum(min(count, self._char_counts[idx].get(char, 0)) for char, count in query_counts.items())
+            if penalty * 2.0 * common / (la + lb) >= min_score - BOUND_TOLERANCE:
+                candidates.append(idx)
+        return candidates
+
+    def search(self, query: str, min_score: float) -> List[Tuple[int, float]]:
+        """
+        Find all entries scoring >= min_score against the query
+
+        Args:
+            query: Search text
+            min_score: Minimum similarity score
+
+        Returns:
+            List of (catalog_index, score) sorted by score descending;
+            ties keep catalog order
+        """
+        key = query.lower().strip() if isinstance(query, str) else ''
+        if not key:
+            return []
+
+        matches = []
+        for idx in self._candidates(key, min_score):
+            score = self.scorer(query, self._texts[idx])
+            if score >= min_score:
+                matches.append((idx, score))
+
+        matches.sort(key=lambda match: match[1], reverse=True)
+        return matches
+
+    def top_k(self, query: str, k: int = 5, min_score: float = 0.0) -> List[Tuple[int, float]]:
+        """
+        Get the k best entries scoring >= min_score
+
+        Entries are scored in decreasing order of their upper bound, stopping as
+        soon as no remaining entry can enter the top k.
+
+        Args:
+            query: Search text
+            k: Number of results
+            min_score: Minimum similarity score
+
+        Returns:
+            Up to k (catalog_index, score) pairs, best first (ties in catalog order)
+        """
+        key = query.lower().strip() if isinstance(query, str) else ''
+        if not key or k <= 0:
+            return []
+
+        if np is None or min_score <= 0:
+            return self.search(query, min_score)[:k]
+
+        bound = self._bounds(key)
+        best = []
+        for idx in np.argsort(-bound, kind='stable').tolist():
+            if bound[idx] < min_score - BOUND_TOLERANCE:
+                break
+            if len(best) >= k and bound[idx] < best[-1][1] - BOUND_TOLERANCE:
+                break
+            score = self.scorer(query, self._texts[idx])
+            if score >= min_score:
+                best.append((idx, score))
+                best.sort(key=lambda match: (-match[1], match[0]))
+                del best[k:]
+        return best
+
+
+class SubstringIndex:
+    """
+    Inverted n-gram index answering "which texts contain this substring"
+
+    Every text is indexed by all its character 1-, 2- and 3-grams. A pattern of
+    up to 3 characters is answered directly from its own posting list; longer
+    patterns intersect the posting lists of their trigrams (rarest first) and
+    verify the survivors with a plain `in` check, so results equal a full scan.
+    """
+
+    GRAM_SIZE = 3
+
+    def __init__(self, texts: List[str]):
+        """
+        Build the index
+
+        Args:
+            texts: Text per catalog entry, already normalized the way callers
+                   normalize their patterns (e.g. uppercased)
+        """
+        self._texts = texts
+        self._postings = {}
+
+        for idx, text in enumerate(texts):
+            grams = set()
+            for size in range(1, self.GRAM_SIZE + 1):
+                for start in range(len(text) - size + 1):
+                    grams.add(text[start:start + size])
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(idx)
+
+    def search(self, pattern: str) -> List[int]:
+        """
+        Get indices of all texts containing pattern
+
+        Args:
+            pattern: Substring to look for (normalized like the texts)
+
+        Returns:
+            Matching indices in catalog order
+        """
+        if not pattern:
+            return list(range(len(self._texts)))
+
+        if len(pattern) <= self.GRAM_SIZE:
+            return list(self._postings.get(pattern, []))
+
+        grams = {pattern[start:start + self.GRAM_SIZE] for start in range(len(pattern) - self.GRAM_SIZE + 1)}
+        postings = sorted((self._postings.get(gram, []) for gram in grams), key=len)
+        if not postings[0]:
+            return []
+
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                return []
+
+        return [idx for idx in sorted(candidates) if pattern in self._texts[idx]]
@@ -0,0 +1,230 @@
+"""
+Catalog Sync Module
+
+Incremental export of Odoo customers and products to the JSON files the
+matchers load (odoo_database/odoo_customers.json, odoo_products.json).
+
+Instead of reading every record again, a sync fetches only records with
+write_date >= the watermark of the previous sync (in ID-paginated batches),
+plus the IDs of all records still exported, to drop deleted and archived ones.
+Changes are merged into the existing file by ID, so unchanged records keep
+their position and content; new records are appended in Odoo's default order
+(the order of a full export):
+
+- a sync without changes leaves the file untouched (its mtime, and with it the
+  match cache version, stays the same)
+- a changed file is written to a temporary file and renamed over the old one;
+  the watermark is stored afterwards in odoo_database/sync_state.json, so an
+  interrupted sync is simply repeated
+- the watermark belongs to the file it was synced to; a sync to another file
+  is a full one
+- product embeddings are cached by text, so only added or edited products are
+  re-encoded by BERT
+- a dry run fetches and compares, but writes nothing
+"""
+
+import os
+import json
+import time
+import shutil
+import logging
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from retriever_module.odoo_mirror import fetch_records, fetch_ids, changed_since
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATE_PATH = "odoo_database/sync_state.json"
+
+
+def format_customer(customer: Dict) -> Dict:
+    """Customer entry of odoo_customers.json"""
+    return {
+        'id': customer['id'],
+        'name': customer['name'],
+        'ref': customer.get('ref') or '',
+        'email': customer.get('email') or '',
+        'phone': customer.get('phone') or '',
+        'address': {
+            'street': customer.get('street') or '',
+            'street2': customer.get('street2') or '',
+            'city': customer.get('city') or '',
+            'zip': customer.get('zip') or '',
+            'country': customer['country_id'][1] if customer.get('country_id') else '',
+            'state': customer['state_id'][1] if customer.get('state_id') else ''
+        },
+        'vat': customer.get('vat') or '',
+        'website': customer.get('website') or ''
+    }
+
+
+def format_product(product: Dict) -> Dict:
+    """Product entry of odoo_products.json"""
+    return {
+        'id': product['id'],
+        'name': product['name'],
+        'default_code': product.get('default_code') or '',
+        'list_price': product.get('list_price', 0.0),
+        'standard_price': product.get('standard_price', 0.0),
+        'type': product.get('type', ''),
+        'category': product['categ_id'][1] if product.get('categ_id') else '',
+        'description': product.get('description') or ''
+    }
+
+
+# Exported catalogs: Odoo model, records exported, fields read and JSON entry format
+CATALOGS = {
+    'customers': {
+        'model': 'res.partner',
+        'domain': [['is_company', '=', True]],
+        'fields': ['id', 'name', 'ref', 'email', 'phone', 'street', 'street2',
+                   'city', 'zip', 'country_id', 'state_id', 'vat', 'website'],
+        'format': format_customer,
+        'path': "odoo_database/odoo_customers.json",
+    },
+    'products': {
+        'model': 'product.template',
+        'domain': [],
+        'fields': ['id', 'name', 'default_code', 'list_price', 'standard_price',
+                   'type', 'categ_id', 'description'],
+        'format': format_product,
+        'path': "odoo_database/odoo_products.json",
+    },
+}
+
+
+def load_sync_state(state_path: str = DEFAULT_STATE_PATH) -> Dict:
+    """
+    Load watermarks of previous syncs
+
+    Args:
+        state_path: Sync state JSON file
+
+    Returns:
+        Dictionary catalog name -> {'watermark', 'synced_at', 'records', 'path'}
+    """
+    try:
+        with open(state_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        logger.warning(f"[!] Could not read sync state {state_path}: {e}")
+        return {}
+
+
+def _write_json(path: Path, data, indent: Optional[int] = None):
+    """Write JSON atomically (temp file + rename)"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=indent, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def sync_catalog(execute: Callable, name: str, output_path: Optional[str] = None,
+                 state_path: str = DEFAULT_STATE_PATH, full: bool = False,
+                 dry_run: bool = False, backup: bool = False, batch_size: int = 500) -> Dict:
+    """
+    Bring one exported catalog up to date with Odoo
+
+    Args:
+        execute: execute(model, method, args, kwargs) calling Odoo's execute_kw
+        name: Catalog name ('customers' or 'products')
+        output_path: JSON file (default: the catalog's file in odoo_database/)
+        state_path: Sync state JSON file
+        full: Fetch all records instead of the ones written since the watermark
+        dry_run: Compare only, write nothing
+        backup: Keep the previous file as <file>.backup when it is replaced
+        batch_size: Records per search_read call
+
+    Returns:
+        Summary: mode, fetched, added, updated, removed, total, written, watermark
+    """
+    catalog = CATALOGS[name]
+    path = Path(output_path or catalog['path'])
+    states = load_sync_state(state_path)
+    state = states.get(name, {})
+    # A watermark only describes the file it was synced to
+    watermark = state.get('watermark') if state.get('path') == str(path.resolve()) else None
+
+    existing = []
+    if path.exists():
+        with open(path, 'r', encoding='utf-8') as f:
+            existing = json.load(f)
+
+    # Without a watermark for an existing file, its records cannot be trusted to be current
+    incremental = not full and bool(watermark) and path.exists()
+    start = time.time()
+    fields = catalog['fields'] + ['write_date']
+    if incremental:
+        domain = catalog['domain'] + [['write_date', '>=', changed_since(watermark)]]
+        fetched = fetch_records(execute, catalog['model'], fields, domain, batch_size)
+        odoo_ids = fetch_ids(execute, catalog['model'], catalog['domain'])
+        exported_ids = set(odoo_ids)
+    else:
+        fetched = fetch_records(execute, catalog['model'], fields, catalog['domain'], batch_size)
+        odoo_ids = fetch_ids(execute, catalog['model'], catalog['domain'])
+        exported_ids = {record['id'] for record in fetched}
+
+    # Merge by ID: changed records in place, new ones appended (in Odoo's order), gone ones dropped
+    changed = {record['id']: catalog['format'](record) for record in fetched if record['id'] in exported_ids}
+    merged = []
+    added = updated = removed = 0
+    for entry in existing:
+        entry_id = entry.get('id')
+        if entry_id not in exported_ids:
+            removed += 1
+            continue
+        new_entry = changed.pop(entry_id, entry)
+        if new_entry != entry:
+            updated += 1
+        merged.append(new_entry)
+    odoo_position = {record_id: i for i, record_id in enumerate(odoo_ids)}
+    for entry_id in sorted(changed, key=lambda i: (odoo_position.get(i, len(odoo_position)), i)):
+        merged.append(changed[entry_id])
+        added += 1
+
+    write_dates = [record['write_date'] for record in fetched if record.get('write_date')]
+    if watermark and incremental:
+        write_dates.append(watermark)
+    new_watermark = max(write_dates) if write_dates else watermark
+
+    summary = {
+        'catalog': name,
+        'mode': 'incremental' if incremental else 'full',
+        'fetched': len(fetched),
+        'added': added,
+        'updated': updated,
+        'removed': removed,
+        'total': len(merged),
+        'written': False,
+        'watermark': new_watermark,
+        'seconds': round(time.time() - start, 2)
+    }
+    if dry_run:
+        return summary
+
+    if added or updated or removed or not path.exists():
+        if backup and path.exists():
+            shutil.copy2(path, f"{path}.backup")
+        _write_json(path, merged, indent=2)
+        summary['written'] = True
+
+    states = load_sync_state(state_path)
+    states[name] = {'watermark': new_watermark, 'synced_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+                    'records': len(merged), 'path': str(path.resolve())}
+    _write_json(Path(state_path), states, indent=2)
+
+    logger.info(f"Synced {name}: {summary['mode']}, {added} added, {updated} updated, {removed} removed, "
+                f"{len(merged)} total ({'written' if summary['written'] else 'unchanged'})")
+    return summary
+
+
+def format_summary(summary: Dict) -> str:
+    """One-line description of a sync_catalog() summary"""
+    changes = summary['added'] + summary['updated'] + summary['removed']
+    return (f"{summary['catalog']}: {changes} changed ({summary['added']} added, {summary['updated']} updated, "
+            f"{summary['removed']} removed), {summary['total']} total - {summary['mode']} sync, "
+            f"{summary['fetched']} fetched in {summary['seconds']}s")
@@ -0,0 +1,132 @@
+"""
+Dimension Index Module
+
+Precomputed product dimensions for HybridMatcher's Stage 2 re-ranking. Every
+product's dimension values (310x25 -> '310', '25'; Länge 1335mm -> '1335') are
+extracted once when the catalog is loaded and stored as a sparse posting array
+per normalized dimension value (sorted product rows). A query's dimensions are
+extracted once, and the number of matching dimensions of all candidates is then
+computed in a few vectorized np.isin calls instead of running the regexes on
+every candidate text.
+"""
+
+import re
+import logging
+from functools import lru_cache
+from typing import Callable, Dict, FrozenSet, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DIMENSION_PATTERNS = [
+    re.compile(r'\b(\d{2,4})\s*[xX*]\s*(\d{1,3}(?:[.,]\d{1,2})?)', re.IGNORECASE),  # 310x25, 35x0.20
+    re.compile(r'(?:Länge|Length|L)[\s:]*(\d{3,5})\s*mm', re.IGNORECASE),  # Länge 1335mm
+    re.compile(r'\b(\d{3,5})\s*mm\b', re.IGNORECASE),  # 1335mm
+]
+
+
+def extract_dimension_list(text: str) -> List[str]:
+    """
+    Extract dimension numbers from text (in match order, duplicates kept)
+
+    Args:
+        text: Text containing dimensions
+
+    Returns:
+        List of dimension numbers (e.g., ['310', '25', '1335'])
+    """
+    dimensions = []
+    for pattern in DIMENSION_PATTERNS:
+        for match in pattern.finditer(text):
+            # Add all captured groups
+            for group in match.groups():
+                if group:
+                    # Normalize: remove spaces, convert comma to dot
+                    dimensions.append(group.replace(' ', '').replace(',', '.'))
+    return dimensions
+
+
+@lru_cache(maxsize=4096)
+def extract_dimensions(text: str) -> FrozenSet[str]:
+    """
+    Distinct dimension numbers of a text (cached - queries repeat)
+
+    Args:
+        text: Text containing dimensions
+
+    Returns:
+        Frozen set of normalized dimension values
+    """
+    return frozenset(extract_dimension_list(text))
+
+
+class DimensionIndex:
+    """Sparse product x dimension-value index (posting array per value)"""
+
+    def __init__(self, products: List[Dict], text_fn: Callable[[Dict], str]):
+        """
+        Extract and index the dimensions of all products
+
+        Args:
+            products: Product catalog
+            text_fn: Product -> text the dimensions are extracted from
+        """
+        self.products = products
+        self._ids = [product.get('id') for product in products]
+        self._row_by_id = {}
+        for row, product_id in enumerate(self._ids):
+            if product_id is not None:
+                self._row_by_id.setdefault(product_id, row)
+
+        rows_by_value = {}
+        for row, product in enumerate(products):
+            for value in extract_dimension_list(text_fn(product)):
+                rows = rows_by_value.setdefault(value, [])
+                if not rows or rows[-1] != row:
+                    rows.append(row)
+
+        self.postings = {value: np.array(rows, dtype=np.int32) for value, rows in rows_by_value.items()}
+        self.text_fn = text_fn
+        logger.info(f"[OK] Dimension index: {len(self.postings)} values over {len(products)} products")
+
+    def get_row(self, product: Dict, index: Optional[int] = None) -> int:
+        """
+        Catalog row of a product (e.g. a BERT candidate loaded from the same catalog)
+
+        Args:
+            product: Product dict
+            index: Row of the product in the matcher that returned it
+
+        Returns:
+            Row in this index, or -1 if the product is not in it
+        """
+        product_id = product.get('id')
+        if index is not None and 0 <= index < len(self._ids) and self._ids[index] == product_id:
+            return index
+        return self._row_by_id.get(product_id, -1) if product_id is not None else -1
+
+    def match_counts(self, query_dims: FrozenSet[str], rows: np.ndarray,
+                     products: Optional[List[Dict]] = None) -> np.ndarray:
+        """
+        Number of query dimensions found in each candidate product
+
+        Args:
+            query_dims: Dimensions of the query (extract_dimensions())
+            rows: Candidate rows (get_row(); -1 = not indexed)
+            products: Candidate products (only used for rows that are -1)
+
+        Returns:
+            Match count per candidate
+        """
+        counts = np.zeros(len(rows), dtype=np.int32)
+        for value in query_dims:
+            posting = self.postings.get(value)
+            if posting is not None:
+                counts += np.isin(rows, posting, assume_unique=False)
+
+        # Products missing from the catalog (e.g. a newer host catalog): extract directly
+        if products is not None:
+            for i in np.flatnonzero(rows < 0):
+                counts[i] = len(query_dims & extract_dimensions(self.text_fn(products[i])))
+        return counts
@@ -0,0 +1,216 @@
+"""
+Embedding Cache Module
+
+Content-addressed cache of BERT product embeddings. Every product is keyed on a
+hash of the model ID plus the exact text that is embedded, so after a catalog
+sync only new or edited products are re-encoded; unchanged products reuse their
+cached vectors even if the products file was rewritten.
+
+The catalog matrix is stored as a plain .npy file (rows in product order) named
+after a fingerprint of all product keys, with the row keys in a .keys.json file
+next to it. Files are never modified once written - a changed catalog gets a new
+fingerprint - so they are opened with mmap_mode='r' and every worker process
+maps the same pages instead of holding its own copy.
+"""
+
+import os
+import re
+import json
+import hashlib
+import logging
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """Per-product embedding cache for one model, persisted as memory-mapped .npy"""
+
+    def __init__(self, cache_dir: str, model_name: str, model_version: Optional[str] = None):
+        """
+        Initialize embedding cache
+
+        Args:
+            cache_dir: Directory holding the cache files
+            model_name: Model identifier (part of the file names)
+            model_version: Model version (part of every key; default model_name). A
+                model re-trained in place gets a new version, so none of its old
+                vectors are reused and its old matrix is removed.
+        """
+        self.cache_dir = Path(cache_dir)
+        self.model_name = model_name
+        self.model_version = model_version or model_name
+        self.model_slug = model_name.replace('/', '_').replace('\\', '_')
+        # Matrix files of exactly this model (a glob would also match e.g. "<slug>_v2")
+        self._file_pattern = re.compile(rf"embeddings_{re.escape(self.model_slug)}_[0-9a-f]{{16}}\.npy")
+
+    def make_key(self, text: str) -> str:
+        """
+        Build the cache key of one product text
+
+        Args:
+            text: Text that is embedded for the product
+
+        Returns:
+            Hex digest key (model version + text)
+        """
+        return hashlib.sha1(f"{self.model_version}\n{text}".encode('utf-8')).hexdigest()
+
+    def get_path(self, keys: List[str]) -> Path:
+        """
+        Matrix file for a catalog (fingerprint of the ordered product keys)
+
+        Args:
+            keys: Product keys in catalog order
+
+        Returns:
+            Path of the .npy file
+        """
+        fingerprint = hashlib.sha1('\n'.join(keys).encode('utf-8')).hexdigest()[:16]
+        return self.cache_dir / f"embeddings_{self.model_slug}_{fingerprint}.npy"
+
+    @staticmethod
+    def _keys_path(matrix_path: Path) -> Path:
+        return matrix_path.with_suffix('.keys.json')
+
+    def _open(self, matrix_path: Path, keys: List[str]) -> Optional[np.ndarray]:
+        """Memory-map a cached matrix if it holds exactly these keys"""
+        keys_path = self._keys_path(matrix_path)
+        if not matrix_path.exists() or not keys_path.exists():
+            return None
+        try:
+            with open(keys_path, 'r', encoding='utf-8') as f:
+                if json.load(f) != keys:
+                    return None
+            embeddings = np.load(matrix_path, mmap_mode='r')
+            if embeddings.shape[0] != len(keys):
+                return None
+            return embeddings
+        except Exception as e:
+            logger.warning(f"Failed to open embedding cache {matrix_path}: {e}")
+            return None
+
+    def _previous_caches(self, exclude: Path) -> List[Path]:
+        """Older matrix files of this model that have a keys file, newest first"""
+        paths = [
+            path for path in self.cache_dir.glob("embeddings_*.npy")
+            if self._file_pattern.fullmatch(path.name) and path != exclude and self._keys_path(path).exists()
+        ]
+        return sorted(paths, key=lambda path: path.stat().st_mtime, reverse=True)
+
+    def _load_cached_rows(self, needed: set, exclude: Path) -> Dict[str, np.ndarray]:
+        """Vectors for the needed keys found in previous caches of this model"""
+        found = {}
+        for path in self._previous_caches(exclude):
+            try:
+                with open(self._keys_path(path), 'r', encoding='utf-8') as f:
+                    old_keys = json.load(f)
+                old_embeddings = np.load(path, mmap_mode='r')
+            except Exception as e:
+                logger.warning(f"Skipping unreadable embedding cache {path}: {e}")
+                continue
+
+            for row, key in enumerate(old_keys):
+                if key in needed and key not in found:
+                    found[key] = np.array(old_embeddings[row])
+            if len(found) == len(needed):
+                break
+        return found
+
+    def _write(self, matrix_path: Path, keys: List[str], embeddings: np.ndarray):
+        """Write matrix and keys atomically (temp file + rename)"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        tmp_matrix = matrix_path.with_suffix(f'.{os.getpid()}.tmp')
+        with open(tmp_matrix, 'wb') as f:
+            np.save(f, embeddings)
+        os.replace(tmp_matrix, matrix_path)
+
+        keys_path = self._keys_path(matrix_path)
+        tmp_keys = keys_path.with_suffix(f'.{os.getpid()}.tmp')
+        with open(tmp_keys, 'w', encoding='utf-8') as f:
+            json.dump(keys, f)
+        os.replace(tmp_keys, keys_path)
+
+    def _remove_stale(self, keep: Path):
+        """Delete older caches of this model (and their vector indexes)"""
+        for path in self._previous_caches(keep):
+            for stale in self.cache_dir.glob(f"{path.stem}.*"):
+                try:
+                    stale.unlink()
+                except OSError:
+                    # Still mapped by another process (Windows) - removed on a later run
+                    pass
+
+    def lookup(self, texts: List[str]) -> Optional[np.ndarray]:
+        """
+        Cached matrix for exactly these product texts, without encoding anything
+
+        Args:
+            texts: Product texts in catalog order
+
+        Returns:
+            Read-only memory-mapped matrix, or None if this catalog is not cached
+        """
+        keys = [self.make_key(text) for text in texts]
+        return self._open(self.get_path(keys), keys)
+
+    def load(
+        self,
+        texts: List[str],
+        encode: Callable[[List[str]], np.ndarray],
+        dimension: Optional[int] = None
+    ) -> Tuple[np.ndarray, Path]:
+        """
+        Embeddings for the product texts, encoding only texts that are not cached
+
+        Args:
+            texts: Product texts in catalog order
+            encode: Function encoding a list of texts to normalized float32 vectors
+            dimension: Embedding dimension (only needed for an empty catalog)
+
+        Returns:
+            (read-only memory-mapped matrix in catalog order, path of the matrix file)
+        """
+        keys = [self.make_key(text) for text in texts]
+        matrix_path = self.get_path(keys)
+
+        embeddings = self._open(matrix_path, keys)
+        if embeddings is not None:
+            logger.info(f"[OK] Embedding cache hit: {matrix_path}")
+            return embeddings, matrix_path
+
+        needed = set(keys)
+        vectors = self._load_cached_rows(needed, matrix_path)
+
+        # Encode each missing text once (duplicates share a key)
+        missing_texts = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors and key not in missing_texts:
+                missing_texts[key] = text
+
+        logger.info(f"Embedding cache: {len(needed) - len(missing_texts)} products reused, "
+                    f"{len(missing_texts)} to encode")
+
+        if missing_texts:
+            encoded = encode(list(missing_texts.values()))
+            for key, vector in zip(missing_texts, encoded):
+                vectors[key] = vector
+
+        if keys:
+            dimension = len(vectors[keys[0]])
+        matrix = np.empty((len(keys), dimension or 0), dtype=np.float32)
+        for row, key in enumerate(keys):
+            matrix[row] = vectors[key]
+
+        try:
+            self._write(matrix_path, keys, matrix)
+            self._remove_stale(matrix_path)
+            logger.info(f"[OK] Saved embeddings to cache: {matrix_path}")
+            return np.load(matrix_path, mmap_mode='r'), matrix_path
+        except Exception as e:
+            logger.warning(f"Failed to save embedding cache: {e}")
+            return matrix, matrix_path
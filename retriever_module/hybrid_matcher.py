@@ -27,11 +27,17 @@ Author: Claude Code
 Date: 2025-10-09
 """
 
-import re
+import os
 import logging
+import threading
 from typing import List, Dict, Optional
 from pathlib import Path
 
+import numpy as np
+
+from retriever_module.match_result import MatchResult
+from retriever_module.dimension_index import DimensionIndex, extract_dimension_list, extract_dimensions
+
 logger = logging.getLogger(__name__)
 
 
@@ -68,22 +74,86 @@ class HybridMatcher:
         self.token_matcher = TokenMatcher(str(products_json_path))
         logger.info("[OK] TokenMatcher initialized")
 
-        # Initialize BERT Matcher (optional)
-        self.bert_matcher = None
-        if use_bert:
+        # Product dimensions extracted once for Stage 2 re-ranking
+        self.dimension_index = DimensionIndex(self.token_matcher.products, self._get_product_text)
+
+        # Stage 1 candidate pool (re-ranking is vectorized, so a wider pool is cheap)
+        self.bert_candidates = int(os.getenv('HYBRID_BERT_CANDIDATES', '20'))
+
+        # BERT Matcher (optional) is loaded on first semantic query or by warm_up(),
+        # so torch / sentence_transformers are not imported at construction time
+        self.bert_model_name = bert_model_name
+        self.cache_dir = cache_dir
+        self._bert_matcher = None
+        self._bert_lock = threading.Lock()
+        self._warm_up_thread = None
+
+    @property
+    def bert_matcher(self):
+        """BERT matcher, loaded on first access (None if disabled or failed to load)"""
+        if self._bert_matcher is None and self.use_bert:
+            self._load_bert_matcher()
+        return self._bert_matcher
+
+    def _load_bert_matcher(self):
+        """
+        Load the BERT matcher once (thread-safe).
+
+        Uses the shared model host when BERT_MODEL_HOST is set, otherwise (or
+        if the host is unreachable) loads the model in this process.
+        """
+        with self._bert_lock:
+            if self._bert_matcher is not None or not self.use_bert:
+                return
+
+            model_host = os.getenv('BERT_MODEL_HOST')
+            if model_host:
+                try:
+                    from retriever_module.model_host import RemoteBertMatcher
+                    self._bert_matcher = RemoteBertMatcher(model_host)
+                    return
+                except Exception as e:
+                    logger.warning(f"BERT model host {model_host} unavailable ({e}), loading model locally")
+
             try:
                 from retriever_module.bert_semantic_matcher import BertSemanticMatcher
-                self.bert_matcher = BertSemanticMatcher(
-                    products_json_path=str(products_json_path),
-                    model_name=bert_model_name,
-                    cache_dir=cache_dir
+                self._bert_matcher = BertSemanticMatcher(
+                    products_json_path=str(self.products_json_path),
+                    model_name=self.bert_model_name,
+                    cache_dir=self.cache_dir
                 )
-                logger.info(f"[OK] BertSemanticMatcher initialized with {bert_model_name}")
+                logger.info(f"[OK] BertSemanticMatcher initialized with {self.bert_model_name}")
             except Exception as e:
                 logger.warning(f"Failed to initialize BERT matcher: {e}")
                 logger.warning("Falling back to TokenMatcher only")
                 self.use_bert = False
 
+    def warm_up(self, background: bool = True):
+        """
+        Load the BERT model ahead of the first query.
+
+        Args:
+            background: Load in a daemon thread (e.g. while emails are fetched);
+                the first search waits for it if it is not done yet
+        """
+        if not self.use_bert or self._bert_matcher is not None:
+            return
+
+        def _warm_up():
+            matcher = self.bert_matcher
+            if matcher is not None:
+                try:
+                    matcher.get_embedding("warm-up")  # first forward pass allocates buffers
+                except Exception as e:
+                    logger.warning(f"BERT warm-up encode failed: {e}")
+                logger.info("[OK] BERT model warmed up")
+
+        if not background:
+            _warm_up()
+        elif self._warm_up_thread is None:
+            self._warm_up_thread = threading.Thread(target=_warm_up, name="bert-warm-up", daemon=True)
+            self._warm_up_thread.start()
+
     def _extract_dimensions(self, text: str) -> List[str]:
         """
         Extract dimension numbers from text.
@@ -96,24 +166,7 @@ class HybridMatcher:
         Returns:
             List of dimension numbers (e.g., ['310', '25', '1335'])
         """
-        patterns = [
-            r'\b(\d{2,4})\s*[xX*]\s*(\d{1,3}(?:[.,]\d{1,2})?)',  # 310x25, 35x0.20
-            r'(?:Länge|Length|L)[\s:]*(\d{3,5})\s*mm',  # Länge 1335mm
-            r'\b(\d{3,5})\s*mm\b',  # 1335mm
-        ]
-
-        dimensions = []
-        for pattern in patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
-                # Add all captured groups
-                for group in match.groups():
-                    if group:
-                        # Normalize: remove spaces, convert comma to dot
-                        normalized = group.replace(' ', '').replace(',', '.')
-                        dimensions.append(normalized)
-
-        return dimensions
+        return extract_dimension_list(text)
 
     def _calculate_dimension_bonus(
         self,
@@ -135,8 +188,8 @@ class HybridMatcher:
         Returns:
             Bonus multiplier (0.0 to max_bonus)
         """
-        query_dims = set(self._extract_dimensions(query))
-        product_dims = set(self._extract_dimensions(product_text))
+        query_dims = extract_dimensions(query)
+        product_dims = extract_dimensions(product_text)
 
         if not query_dims or not product_dims:
             return 0.0
@@ -175,9 +228,9 @@ class HybridMatcher:
     def _token_rerank(
         self,
         query: str,
-        bert_candidates: List[Dict],
+        bert_candidates: List[MatchResult],
         top_k: int = 5
-    ) -> List[Dict]:
+    ) -> List[MatchResult]:
         """
         Re-rank BERT candidates using token-based dimension matching.
 
@@ -187,37 +240,49 @@ class HybridMatcher:
             top_k: Number of final results
 
         Returns:
-            Re-ranked products with final scores
+            Re-ranked candidates with final scores (score = final score)
         """
-        results = []
-
-        for candidate in bert_candidates:
-            # Get BERT score
-            bert_score = candidate.get('bert_score', 0.0)
-
-            # Calculate dimension bonus
-            product_text = self._get_product_text(candidate)
-            dimension_bonus = self._calculate_dimension_bonus(query, product_text)
-
-            # Calculate final score
-            # Formula: final = bert * (1.0 + dimension_bonus * 0.5)
-            # Example: 80% BERT + 40% dim bonus = 80% * 1.2 = 96%
-            final_score = bert_score * (1.0 + dimension_bonus * 0.5)
-
-            # Add to result
-            result = candidate.copy()
-            result['final_score'] = final_score
-            result['final_score_percent'] = f"{final_score * 100:.1f}%"
-            result['dimension_bonus'] = dimension_bonus
-            result['dimension_bonus_percent'] = f"{dimension_bonus * 100:.1f}%"
+        if not bert_candidates:
+            return []
+
+        # Dimension bonus of all candidates in one step (query dims extracted once,
+        # product dims precomputed at catalog load)
+        query_dims = extract_dimensions(query)
+        bert_scores = np.array([c.fields.get('bert_score', 0.0) for c in bert_candidates], dtype=np.float64)
+        if query_dims:
+            rows = np.array([self.dimension_index.get_row(c.product, c.index) for c in bert_candidates],
+                            dtype=np.int64)
+            matches = self.dimension_index.match_counts(
+                query_dims, rows, [c.product for c in bert_candidates]
+            )
+            # Award bonus proportional to match percentage (max +40%)
+            dimension_bonuses = matches / len(query_dims) * 0.4
+        else:
+            dimension_bonuses = np.zeros(len(bert_candidates))
 
-            results.append(result)
+        # Calculate final score
+        # Formula: final = bert * (1.0 + dimension_bonus * 0.5)
+        # Example: 80% BERT + 40% dim bonus = 80% * 1.2 = 96%
+        final_scores = bert_scores * (1.0 + dimension_bonuses * 0.5)
 
-        # Sort by final score
-        results.sort(key=lambda x: x['final_score'], reverse=True)
+        # Sort by final score (stable, like list.sort) and keep top K
+        order = np.argsort(-final_scores, kind='stable')[:top_k]
 
-        # Return top K
-        return results[:top_k]
+        results = []
+        for i in order:
+            candidate = bert_candidates[i]
+            final_score = float(final_scores[i])
+            dimension_bonus = float(dimension_bonuses[i])
+            candidate.score = final_score
+            candidate.fields.update({
+                'final_score': final_score,
+                'final_score_percent': f"{final_score * 100:.1f}%",
+                'dimension_bonus': dimension_bonus,
+                'dimension_bonus_percent': f"{dimension_bonus * 100:.1f}%"
+            })
+            results.append(candidate)
+
+        return results
 
     def search(
         self,
@@ -244,34 +309,85 @@ class HybridMatcher:
         if self.use_bert and self.bert_matcher:
             logger.info(f"Stage 1: BERT semantic filter for query: '{query}'")
 
-            bert_candidates = self.bert_matcher.search(
+            bert_candidates = self.bert_matcher.search_results(
                 query=query,
-                top_k=20,  # Get 20 candidates for refinement
+                top_k=self.bert_candidates,  # Candidates for refinement (20 by default)
                 min_score=0.60  # 60% semantic threshold
             )
 
-            if not bert_candidates:
-                logger.warning("No BERT candidates found, falling back to token matching")
-                # Fall back to pure token matching
-                return self.token_matcher.search(query, top_k=top_k, min_score=min_score)
+            return self._refine(query, bert_candidates, top_k, min_score)
 
-            logger.info(f"BERT stage: {len(bert_candidates)} candidates")
+        else:
+            # Fall back to pure token matching
+            logger.info("Using TokenMatcher only (BERT disabled)")
+            return self.token_matcher.search(query, top_k=top_k, min_score=min_score)
 
-            # Stage 2: Token Dimension Refinement
-            logger.info("Stage 2: Token dimension refinement")
-            final_results = self._token_rerank(query, bert_candidates, top_k=top_k)
+    def search_many(
+        self,
+        queries: List[str],
+        top_k: int = 5,
+        min_score: float = 0.5
+    ) -> List[List[Dict]]:
+        """
+        Search several queries at once (e.g. all product lines of an email).
 
-            # Filter by minimum final score
-            final_results = [r for r in final_results if r['final_score'] >= min_score]
+        The BERT stage encodes all queries in one batch and scores them with one
+        matrix product; the token refinement then runs per query as in search().
 
-            logger.info(f"Final results: {len(final_results)} products")
-            return final_results
+        Args:
+            queries: Search queries
+            top_k: Number of results per query
+            min_score: Minimum final score threshold (0-1)
 
-        else:
+        Returns:
+            One result list per query, same order and format as search()
+        """
+        if self.use_bert and self.bert_matcher:
+            logger.info(f"Stage 1: BERT semantic filter for {len(queries)} queries (batched)")
+
+            all_candidates = self.bert_matcher.search_results_many(
+                queries=queries,
+                top_k=self.bert_candidates,  # Candidates for refinement (20 by default)
+                min_score=0.60  # 60% semantic threshold
+            )
+
+            return [
+                self._refine(query, bert_candidates, top_k, min_score)
+                for query, bert_candidates in zip(queries, all_candidates)
+            ]
+
+        logger.info("Using TokenMatcher only (BERT disabled)")
+        return [self.token_matcher.search(query, top_k=top_k, min_score=min_score) for query in queries]
+
+    def _refine(
+        self,
+        query: str,
+        bert_candidates: List[MatchResult],
+        top_k: int,
+        min_score: float
+    ) -> List[Dict]:
+        """
+        Stage 2 for one query: token re-rank of the BERT candidates.
+
+        Falls back to pure token matching when BERT found no candidates.
+        """
+        if not bert_candidates:
+            logger.warning("No BERT candidates found, falling back to token matching")
             # Fall back to pure token matching
-            logger.info("Using TokenMatcher only (BERT disabled)")
             return self.token_matcher.search(query, top_k=top_k, min_score=min_score)
 
+        logger.info(f"BERT stage: {len(bert_candidates)} candidates")
+
+        # Stage 2: Token Dimension Refinement
+        logger.info("Stage 2: Token dimension refinement")
+        final_results = self._token_rerank(query, bert_candidates, top_k=top_k)
+
+        # Filter by minimum final score (dicts are only built for the survivors)
+        final_results = [r.to_dict() for r in final_results if r.score >= min_score]
+
+        logger.info(f"Final results: {len(final_results)} products")
+        return final_results
+
     def search_by_code(
         self,
         product_code: str,
@@ -308,6 +424,21 @@ class HybridMatcher:
         logger.warning(f"No match found for product code: {product_code}")
         return None
 
+    def get_config_signature(self) -> str:
+        """
+        Matching configuration that results depend on (for result caches).
+
+        Includes the embedding model version once the BERT matcher is loaded.
+
+        Returns:
+            Signature string
+        """
+        parts = [f"bert={self.use_bert}", self.bert_model_name, f"candidates={self.bert_candidates}"]
+        if self._bert_matcher is not None:
+            parts.append(getattr(self._bert_matcher, 'model_version', self._bert_matcher.model_name))
+            parts.append(getattr(self._bert_matcher, 'inference_backend', ''))
+        return '|'.join(str(part) for part in parts)
+
     def get_stats(self) -> Dict:
         """
         Get matcher statistics.
@@ -321,9 +452,9 @@ class HybridMatcher:
             'products_loaded': len(self.token_matcher.products),
         }
 
-        if self.bert_matcher:
-            stats['bert_model'] = self.bert_matcher.model_name
-            stats['bert_device'] = self.bert_matcher.device
+        stats['bert_loaded'] = self._bert_matcher is not None
+        if self._bert_matcher:
+            stats.update(self._bert_matcher.get_stats())
             stats['embeddings_cached'] = True
 
         return stats
@@ -0,0 +1,117 @@
+"""
+Match Cache Module
+
+End-to-end cache of product line matches for ContextRetriever. The same
+(product code, product name) lines recur across emails - standing orders,
+forwarded duplicates, the same PDF attached to every reply - so the final match
+of a line (exact code lookup, hybrid search and dimension validation) is
+remembered, including "no match".
+
+Entries are keyed on the normalized line and are only valid for one catalog and
+matcher version (products JSON file + matcher configuration / embedding model).
+When the version changes the whole cache is dropped. The cache is in-process and
+bounded with LRU eviction.
+"""
+
+import re
+import copy
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# get() result for lines that are not cached (None is a cached "no match")
+MISS = object()
+
+
+class MatchCache:
+    """LRU cache of final product matches, invalidated on catalog / matcher change"""
+
+    def __init__(self, max_entries: int = 2000):
+        """
+        Initialize match cache
+
+        Args:
+            max_entries: Maximum number of cached lines (least recently used evicted)
+        """
+        self.max_entries = max_entries
+        self.version = None
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(product_code: Optional[str], product_name: str) -> str:
+        """
+        Build cache key of a product line (whitespace-normalized code and name)
+
+        Args:
+            product_code: Extracted product code (may be None)
+            product_name: Extracted product name
+
+        Returns:
+            Hex digest key
+        """
+        code = re.sub(r'\s+', ' ', (product_code or '').strip())
+        name = re.sub(r'\s+', ' ', (product_name or '').strip())
+        return hashlib.sha1(f"{code}|{name}".encode('utf-8')).hexdigest()
+
+    def set_version(self, version: str):
+        """
+        Set the current catalog / matcher version, dropping entries of an older one
+
+        Args:
+            version: Version string (catalog file state + matcher configuration)
+        """
+        if version == self.version:
+            return
+        if self._entries:
+            logger.info(f"   [MATCH CACHE] Catalog or matcher changed, dropping {len(self._entries)} cached matches")
+            self.invalidations += 1
+        self._entries.clear()
+        self.version = version
+
+    def get(self, key: str):
+        """
+        Get a cached match
+
+        Args:
+            key: Key from make_key()
+
+        Returns:
+            Copy of the match dict, None for a cached "no match", or MISS
+        """
+        if key not in self._entries:
+            self.misses += 1
+            return MISS
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        match = self._entries[key]
+        return copy.deepcopy(match) if match is not None else None
+
+    def put(self, key: str, match: Optional[Dict]):
+        """
+        Store the final match of a line (None = no match)
+
+        Args:
+            key: Key from make_key()
+            match: Match dict (copied) or None
+        """
+        self._entries[key] = copy.deepcopy(match) if match is not None else None
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict:
+        """Get cache statistics"""
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations
+        }
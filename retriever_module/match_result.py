@@ -0,0 +1,44 @@
+"""
+Match Result Module
+
+Lightweight holder for a scored catalog product. Matchers rank MatchResult
+objects (a reference to the catalog dict plus a few score fields) and only turn
+the final top-k into dicts at the API boundary, so copies scale with top_k
+instead of with the catalog size.
+"""
+
+from typing import Any, Dict, Optional
+
+
+class MatchResult:
+    """Reference to a catalog product plus the score fields to attach to it"""
+
+    __slots__ = ('product', 'score', 'index', 'fields')
+
+    def __init__(self, product: Dict, score: float, index: Optional[int] = None,
+                 fields: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            product: Catalog product dict (shared, never modified)
+            score: Score used for ranking
+            index: Position of the product in the catalog (optional)
+            fields: Extra keys to add when materialized (e.g. 'bert_score')
+        """
+        self.product = product
+        self.score = score
+        self.index = index
+        self.fields = fields if fields is not None else {}
+
+    def to_dict(self) -> Dict:
+        """
+        Materialize as a new dict: shallow copy of the product plus the score fields
+
+        Returns:
+            Product dict safe to modify by the caller
+        """
+        result = self.product.copy()
+        result.update(self.fields)
+        return result
+
+    def __repr__(self) -> str:
+        return f"MatchResult(code={self.product.get('default_code')!r}, score={self.score:.3f})"
@@ -0,0 +1,246 @@
+"""
+Model Host Module
+
+Lets several worker processes share one BERT model. A model-host process loads
+BertSemanticMatcher once and serves semantic searches over a local socket
+(multiprocessing.connection, authenticated); workers started with
+BERT_MODEL_HOST=host:port use RemoteBertMatcher, which has the same search API,
+instead of loading their own copy of the transformer.
+
+Host and workers must share a secret in BERT_MODEL_HOST_KEY: requests are
+unpickled by the host, so there is no default key.
+
+Before answering a request the host checks the products JSON (rewritten by a
+catalog sync) and the model version (a re-trained local model); when either
+changed, it builds a new matcher first. Every reply carries the host's model
+version, so workers' result caches follow a reload.
+
+Start the host with:
+    BERT_MODEL_HOST_KEY=<secret> python main.py --model-host [127.0.0.1:6011]
+"""
+
+import os
+import logging
+import threading
+from multiprocessing.connection import Listener, Client
+from typing import Callable, Dict, List, Optional, Tuple
+
+from retriever_module.match_result import MatchResult
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ADDRESS = "127.0.0.1:6011"
+
+# Matcher methods a worker may call on the host
+HOST_METHODS = ('search_results_many', 'get_embedding', 'get_stats')
+
+
+def parse_address(address: Optional[str]) -> Tuple[str, int]:
+    """
+    Parse a "host:port" address
+
+    Args:
+        address: "host:port", ":port" or None (DEFAULT_ADDRESS)
+
+    Returns:
+        (host, port) tuple
+    """
+    host, _, port = (address or DEFAULT_ADDRESS).rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+
+def get_authkey() -> bytes:
+    """
+    Shared secret of host and workers (BERT_MODEL_HOST_KEY env var)
+
+    Raises:
+        ValueError if BERT_MODEL_HOST_KEY is not set
+    """
+    key = os.getenv('BERT_MODEL_HOST_KEY')
+    if not key:
+        raise ValueError("BERT_MODEL_HOST_KEY is not set (shared secret of the BERT model host and its workers)")
+    return key.encode('utf-8')
+
+
+class ModelHost:
+    """Serves one BertSemanticMatcher to worker processes"""
+
+    def __init__(self, matcher, address: Optional[str] = None, loader: Optional[Callable] = None):
+        """
+        Initialize model host and bind its socket
+
+        Args:
+            matcher: Loaded BertSemanticMatcher
+            address: "host:port" to listen on (port 0 picks a free port)
+            loader: Builds a new matcher when the products file or the model
+                changed (None = never reload)
+
+        Raises:
+            ValueError if BERT_MODEL_HOST_KEY is not set
+        """
+        self.matcher = matcher
+        self.loader = loader
+        self.reloads = 0
+        self.listener = Listener(parse_address(address), authkey=get_authkey())
+        # One request at a time on the model; connections are handled in threads
+        self._lock = threading.Lock()
+        self._sources = self._source_version() if loader else None
+
+    def _source_version(self) -> Tuple:
+        """Products file (mtime, size) and model version the matcher was built from"""
+        from retriever_module.bert_semantic_matcher import get_model_version
+
+        try:
+            stat = os.stat(self.matcher.products_json_path)
+            products = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            products = None
+        return products, get_model_version(self.matcher.model_name)
+
+    def _refresh(self):
+        """Rebuild the matcher if its products file or model changed (call with the lock held)"""
+        if self.loader is None:
+            return
+        sources = self._source_version()
+        if sources == self._sources:
+            return
+        logger.info("Products file or BERT model changed, reloading model host matcher...")
+        self.matcher = self.loader()
+        self._sources = self._source_version()
+        self.reloads += 1
+        logger.info(f"[OK] Model host reloaded ({getattr(self.matcher, 'model_version', '')})")
+
+    @property
+    def address(self) -> str:
+        host, port = self.listener.address
+        return f"{host}:{port}"
+
+    def serve_forever(self):
+        """Accept worker connections until close() is called"""
+        logger.info(f"[OK] BERT model host listening on {self.address}")
+        while True:
+            try:
+                conn = self.listener.accept()
+            except OSError:
+                break  # listener closed
+            except Exception as e:
+                logger.warning(f"[!] Rejected model host connection: {e}")
+                continue
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn):
+        """Answer requests of one worker connection"""
+        try:
+            while True:
+                try:
+                    method, args = conn.recv()
+                except (EOFError, OSError):
+                    return
+
+                if method not in HOST_METHODS:
+                    conn.send(('error', f"Unknown method: {method}"))
+                    continue
+
+                try:
+                    with self._lock:
+                        self._refresh()
+                        result = getattr(self.matcher, method)(*args)
+                        if method == 'get_stats':
+                            result['bert_model_host_reloads'] = self.reloads
+                        model_version = getattr(self.matcher, 'model_version', None)
+                    conn.send(('ok', result, model_version))
+                except Exception as e:
+                    logger.error(f"Model host {method} failed: {e}")
+                    conn.send(('error', str(e)))
+        finally:
+            conn.close()
+
+    def close(self):
+        """Stop accepting connections"""
+        self.listener.close()
+
+
+class RemoteBertMatcher:
+    """BertSemanticMatcher API backed by a model host process"""
+
+    def __init__(self, address: Optional[str] = None):
+        """
+        Connect to a model host
+
+        Args:
+            address: "host:port" of the host (None = DEFAULT_ADDRESS)
+
+        Raises:
+            ValueError if BERT_MODEL_HOST_KEY is not set
+            ConnectionError / OSError if the host is not reachable
+        """
+        self.address = address or DEFAULT_ADDRESS
+        self._authkey = get_authkey()
+        self._conn = None
+        self._lock = threading.Lock()
+
+        stats = self._call('get_stats')
+        self.model_name = stats.get('bert_model')
+        self.device = stats.get('bert_device')
+        self.model_version = stats.get('bert_model_version', self.model_name)
+        logger.info(f"[OK] Using BERT model host at {self.address} ({self.model_name})")
+
+    def _connect(self):
+        self._conn = Client(parse_address(self.address), authkey=self._authkey)
+
+    def _call(self, method: str, *args):
+        """Send one request (reconnecting once if the connection dropped)"""
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._conn is None:
+                        self._connect()
+                    self._conn.send((method, args))
+                    status, result, *model_version = self._conn.recv()
+                    break
+                except (EOFError, OSError):
+                    self._conn = None
+                    if attempt:
+                        raise
+
+        if status != 'ok':
+            raise RuntimeError(f"Model host error: {result}")
+        if model_version and model_version[0]:
+            self.model_version = model_version[0]  # the host may have reloaded
+        return result
+
+    def search(self, query: str, top_k: int = 20, min_score: float = 0.60) -> List[Dict]:
+        return [match.to_dict() for match in self.search_results(query, top_k, min_score)]
+
+    def search_results(self, query: str, top_k: int = 20, min_score: float = 0.60) -> List[MatchResult]:
+        return self.search_results_many([query], top_k, min_score)[0]
+
+    def search_many(self, queries: List[str], top_k: int = 20, min_score: float = 0.60) -> List[List[Dict]]:
+        return [
+            [match.to_dict() for match in results]
+            for results in self.search_results_many(queries, top_k, min_score)
+        ]
+
+    def search_results_many(
+        self,
+        queries: List[str],
+        top_k: int = 20,
+        min_score: float = 0.60
+    ) -> List[List[MatchResult]]:
+        if not queries:
+            return []
+        return self._call('search_results_many', list(queries), top_k, min_score)
+
+    def get_embedding(self, text: str):
+        return self._call('get_embedding', text)
+
+    def get_stats(self) -> Dict:
+        stats = self._call('get_stats')
+        stats['bert_model_host'] = self.address
+        return stats
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -5,15 +5,71 @@ Handles connection to Odoo via XML-RPC API and data retrieval
 """
 
 import logging
+import threading
+import http.client
 import xmlrpc.client
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple
+
+from retriever_module.odoo_transport import ConnectionPool, make_transport
+from retriever_module.odoo_mirror import OdooMirror
 
 logger = logging.getLogger(__name__)
 
+# res.partner fields returned by query_customer_info()
+PARTNER_FIELDS = ['id', 'name', 'email', 'phone', 'street', 'city', 'zip', 'country_id']
+
+# product.product fields returned by the product queries
+PRODUCT_FIELDS = ['id', 'name', 'default_code', 'lst_price', 'standard_price', 'product_tmpl_id']
+
+# Candidate partners fetched for one customer lookup; above this, one query per strategy
+CUSTOMER_CANDIDATE_LIMIT = 500
+
+# Methods that are safe to send again after a connection error
+READ_METHODS = {'search_read', 'read', 'search', 'search_count', 'name_search', 'fields_get', 'read_group'}
+
+
+class _ObjectProxy:
+    """
+    Odoo 'object' endpoint that reconnects once when a call fails.
+
+    Reads are sent again after a connection error; any call is sent again after
+    an AccessDenied fault (session re-authenticated by reconnect()).
+    """
+
+    def __init__(self, connector, proxy):
+        self._connector = connector
+        self._proxy = proxy
+
+    def execute_kw(self, db, uid, password, model, method, *args):
+        try:
+            return self._proxy.execute_kw(db, uid, password, model, method, *args)
+        except xmlrpc.client.Fault as e:
+            if 'AccessDenied' not in str(e.faultString):
+                raise
+            error = e
+        except (OSError, http.client.HTTPException, xmlrpc.client.ProtocolError) as e:
+            if method not in READ_METHODS:
+                raise
+            error = e
+
+        logger.warning(f"Odoo {model}.{method} failed ({error}), reconnecting...")
+        connector = self._connector
+        connector.reconnect()
+        return connector.models._proxy.execute_kw(
+            connector.db, connector.uid, connector.password, model, method, *args
+        )
+
+    def __getattr__(self, name):
+        return getattr(self._proxy, name)
+
 
 class OdooConnector:
     """Class to handle Odoo API connections and queries"""
 
+    # Product variants created by query_products(product_id=...) (batched callers
+    # drop prefetched lookups when it changes)
+    variants_created = 0
+
     def __init__(self, config_path: str = "config/odoo_config.json"):
         """
         Initialize Odoo Connector
@@ -30,7 +86,15 @@ class OdooConnector:
         self.uid = None
         self.common = None
         self.models = None
+        # Keep-alive connections shared by the common and object endpoints
+        self.pool = ConnectionPool(
+            pool_size=self.config.get('pool_size', 4),
+            idle_timeout=self.config.get('pool_idle_timeout', 30.0),
+            timeout=self.config.get('timeout', 120.0)
+        )
+        self._reconnect_lock = threading.Lock()
         self._connect()
+        self.mirror = self._create_mirror()
 
     def _load_config(self) -> Dict:
         """
@@ -52,6 +116,12 @@ class OdooConnector:
                 "database": os.getenv('ODOO_DB_NAME', ''),
                 "username": os.getenv('ODOO_USERNAME', ''),
                 "password": os.getenv('ODOO_PASSWORD', ''),
+                "pool_size": int(os.getenv('ODOO_POOL_SIZE', '4')),
+                "pool_idle_timeout": float(os.getenv('ODOO_POOL_IDLE_TIMEOUT', '30')),
+                "timeout": float(os.getenv('ODOO_TIMEOUT', '120')),
+                "mirror_path": os.getenv('ODOO_MIRROR_PATH', '.odoo_cache/odoo_mirror.sqlite'),
+                "mirror_ttl": float(os.getenv('ODOO_MIRROR_TTL', '300')),
+                "mirror_max_stale": float(os.getenv('ODOO_MIRROR_MAX_STALE', '3600')),
             }
         except Exception as e:
             logger.error(f"Error loading config: {e}")
@@ -67,8 +137,10 @@ class OdooConnector:
         logger.info("Connecting to Odoo API...")
 
         try:
+            transport = make_transport(self.url, self.pool)
+
             # Common endpoint for authentication
-            self.common = xmlrpc.client.ServerProxy(f'{self.url}/xmlrpc/2/common')
+            self.common = xmlrpc.client.ServerProxy(f'{self.url}/xmlrpc/2/common', transport=transport)
 
             # Authenticate with English language context to avoid de_DE errors
             self.uid = self.common.authenticate(
@@ -82,17 +154,65 @@ class OdooConnector:
                 raise Exception("Authentication failed")
 
             # Models endpoint for queries
-            self.models = xmlrpc.client.ServerProxy(f'{self.url}/xmlrpc/2/object')
+            self.models = _ObjectProxy(
+                self, xmlrpc.client.ServerProxy(f'{self.url}/xmlrpc/2/object', transport=transport)
+            )
 
             logger.info(f"Successfully connected to Odoo (UID: {self.uid})")
         except Exception as e:
             logger.error(f"Failed to connect to Odoo: {str(e)}")
             raise
 
+    def _create_mirror(self) -> Optional[OdooMirror]:
+        """Local mirror of partners and products (None if ODOO_MIRROR_PATH is empty)"""
+        mirror_path = self.config.get('mirror_path')
+        if not mirror_path:
+            return None
+        return OdooMirror(
+            mirror_path,
+            lambda model, method, args, kwargs: self.models.execute_kw(
+                self.db, self.uid, self.password, model, method, args, kwargs
+            ),
+            ttl=self.config.get('mirror_ttl', 300.0),
+            max_stale=self.config.get('mirror_max_stale', 3600.0)
+        )
+
+    def _search_read(self, model: str, domain: List, fields: List[str],
+                     limit: Optional[int] = None, local: bool = True) -> List[Dict]:
+        """
+        search_read answered from the local mirror when it is fresh, else by Odoo
+
+        Args:
+            model: Odoo model name
+            domain: Search domain
+            fields: Fields to read
+            limit: Maximum number of records (None = all)
+            local: Allow answering from the mirror
+
+        Returns:
+            Records in the model's default order
+        """
+        if local and self.mirror is not None:
+            records = self.mirror.search_read(model, domain, fields, limit)
+            if records is not None:
+                return records
+
+        kwargs = {'fields': fields}
+        if limit:
+            kwargs['limit'] = limit
+        return self.models.execute_kw(
+            self.db, self.uid, self.password,
+            model, 'search_read',
+            [domain],
+            kwargs
+        )
+
     def reconnect(self):
-        """Reconnect to Odoo if connection is lost"""
+        """Reconnect to Odoo if connection is lost (new connections, authenticated again)"""
         logger.info("Attempting to reconnect to Odoo...")
-        self._connect()
+        with self._reconnect_lock:
+            self.pool.close()
+            self._connect()
 
     def query_customer_info(self, customer_id: Optional[int] = None, email: Optional[str] = None,
                            customer_name: Optional[str] = None, company_name: Optional[str] = None,
@@ -101,6 +221,10 @@ class OdooConnector:
         """
         Query customer information from Odoo with multi-field fuzzy matching support
 
+        The search strategies (ID, phone, zip/address, company name, customer
+        name, email) share one search_read; the first strategy with a match
+        wins, as if they had been queried one after another.
+
         Args:
             customer_id: Customer ID in Odoo
             email: Customer email address (used for reply-to only)
@@ -116,179 +240,27 @@ class OdooConnector:
         logger.info(f"Querying customer info: id={customer_id}, email={email}, name={customer_name}, company={company_name}, address={address}, zip={zip_code}, phone={phone}")
 
         try:
-            customers = None
-
-            # Strategy 1: Search by customer ID (highest priority)
-            if customer_id:
-                domain = [['id', '=', customer_id]]
-                customers = self.models.execute_kw(
-                    self.db, self.uid, self.password,
-                    'res.partner', 'search_read',
-                    [domain],
-                    {'fields': ['id', 'name', 'email', 'phone', 'street', 'city', 'zip', 'country_id'], 'limit': 1}
-                )
-                if customers:
-                    logger.info(f"Found customer by ID: {customers[0].get('name')}")
-                    return customers[0]
-
-            # Strategy 2: Multi-field matching (phone, zip, address)
-            # Try to match using phone, zip code, or address if provided
-            if phone or zip_code or address:
-                logger.info("Attempting multi-field matching with phone/zip/address")
-
-                # Sub-strategy 2a: Search by phone number (very reliable)
-                if phone:
-                    # Clean phone number (remove spaces, dashes, parentheses)
-                    clean_phone = ''.join(c for c in phone if c.isdigit() or c == '+')
-                    if len(clean_phone) >= 6:  # Minimum length for meaningful search
-                        # Try exact match first
-                        domain = [['phone', '=', phone]]
-                        customers = self.models.execute_kw(
-                            self.db, self.uid, self.password,
-                            'res.partner', 'search_read',
-                            [domain],
-                            {'fields': ['id', 'name', 'email', 'phone', 'street', 'city', 'zip', 'country_id'], 'limit': 5}
-                        )
-
-                        if customers:
-                            logger.info(f"Found {len(customers)} customer(s) by phone: {customers[0].get('name')}")
-                            return customers[0]
-
-                        # Try partial phone match
-                        domain = [['phone', 'ilike', clean_phone[-8:]]]  # Last 8 digits
-                        customers = self.models.execute_kw(
-                            self.db, self.uid, self.password,
-                            'res.partner', 'search_read',
-                            [domain],
-                            {'fields': ['id', 'name', 'email', 'phone', 'street', 'city', 'zip', 'country_id'], 'limit': 5}
-                        )
-
-                        if customers:
-                            logger.info(f"Found {len(customers)} customer(s) by partial phone match: {customers[0].get('name')}")
-                            return customers[0]
-
-                # Sub-strategy 2b: Search by zip code (reliable for unique locations)
-                if zip_code:
-                    domain = [['zip', '=', zip_code], ['is_company', '=', True]]
-                    customers = self.models.execute_kw(
-                        self.db, self.uid, self.password,
-                        'res.partner', 'search_read',
-                        [domain],
-                        {'fields': ['id', 'name', 'email', 'phone', 'street', 'city', 'zip', 'country_id'], 'limit': 5}
-                    )
-
-                    if customers:
-                        logger.info(f"Found {len(customers)} customer(s) by zip code '{zip_code}': {customers[0].get('name')}")
-                        # ALWAYS verify company name if provided, even with single result
-                        if company_name:
-                            # Normalize company name for better matching (remove special chars)
-                            import re
-                            clean_company = re.sub(r'[^\w\s]', '', company_name.lower()).strip()
-
-                            for customer in customers:
-                                clean_customer_name = re.sub(r'[^\w\s]', '', customer.get('name', '').lower()).strip()
-                                if clean_company in clean_customer_name or clean_customer_name in clean_company:
-                                    logger.info(f"Matched by zip+name: {customer.get('name')}")
-                                    return customer
-
-                            # No match found - log warning and return first (might be wrong)
-                            logger.warning(f"Company name '{company_name}' not found in {len(customers)} zip matches, returning first result")
-
-                        return customers[0]
-
-                # Sub-strategy 2c: Search by zip + address combination (more accurate than address alone)
-                # Only use address matching when we ALSO have a zip code to narrow results
-                if zip_code and address and len(address) > 10:
-                    import re
-                    # Extract key parts from address (street name, building number)
-                    address_parts = re.findall(r'\b\w{4,}\b', address)
-
-                    for part in address_parts[:3]:  # Try first 3 meaningful parts
-                        # Search with BOTH zip code AND address part for accuracy
-                        domain = [['zip', '=', zip_code], ['street', 'ilike', part], ['is_company', '=', True]]
-                        customers = self.models.execute_kw(
-                            self.db, self.uid, self.password,
-                            'res.partner', 'search_read',
-                            [domain],
-                            {'fields': ['id', 'name', 'email', 'phone', 'street', 'city', 'zip', 'country_id'], 'limit': 5}
-                        )
-
-                        if customers:
-                            logger.info(f"Found {len(customers)} customer(s) by zip+address ('{zip_code}' + '{part}'): {customers[0].get('name')}")
-                            # ALWAYS verify company name if provided
-                            if company_name:
-                                # Normalize company name for better matching
-                                clean_company = re.sub(r'[^\w\s]', '', company_name.lower()).strip()
-
-                                for customer in customers:
-                                    clean_customer_name = re.sub(r'[^\w\s]', '', customer.get('name', '').lower()).strip()
-                                    if clean_company in clean_customer_name or clean_customer_name in clean_company:
-                                        logger.info(f"Matched by zip+address+name: {customer.get('name')}")
-                                        return customer
-
-                                # No match found - log warning
-                                logger.warning(f"Company name '{company_name}' not found in zip+address matches")
-
-                            return customers[0]
-
-            # Strategy 3: Search by company name (preferred for B2B)
-            if company_name:
-                # Try exact match first
-                domain = [['name', 'ilike', company_name], ['is_company', '=', True]]
-                customers = self.models.execute_kw(
-                    self.db, self.uid, self.password,
-                    'res.partner', 'search_read',
-                    [domain],
-                    {'fields': ['id', 'name', 'email', 'phone', 'street', 'city', 'zip', 'country_id'], 'limit': 5}
-                )
+            strategies = self._customer_strategies(
+                customer_id, email, customer_name, company_name, address, zip_code, phone
+            )
 
-                if customers:
-                    logger.info(f"Found {len(customers)} company match(es) for '{company_name}': {customers[0].get('name')}")
-                    return customers[0]
-
-                # Try fuzzy variations
-                variations = self._normalize_search_term(company_name)
-                for variation in variations[1:]:  # Skip first (already tried)
-                    logger.info(f"Trying company name variation: '{variation}'")
-                    domain = [['name', 'ilike', variation], ['is_company', '=', True]]
-                    customers = self.models.execute_kw(
-                        self.db, self.uid, self.password,
-                        'res.partner', 'search_read',
-                        [domain],
-                        {'fields': ['id', 'name', 'email', 'phone', 'street', 'city', 'zip', 'country_id'], 'limit': 5}
-                    )
-                    if customers:
-                        logger.info(f"Found company using variation '{variation}': {customers[0].get('name')}")
-                        return customers[0]
-
-            # Strategy 4: Search by customer name
-            if customer_name:
-                # Try exact match
-                domain = [['name', 'ilike', customer_name]]
-                customers = self.models.execute_kw(
-                    self.db, self.uid, self.password,
-                    'res.partner', 'search_read',
-                    [domain],
-                    {'fields': ['id', 'name', 'email', 'phone', 'street', 'city', 'zip', 'country_id'], 'limit': 5}
-                )
+            # One search_read for the candidates of all strategies, ranked locally below
+            candidates = self._fetch_customer_candidates(strategies)
 
-                if customers:
-                    logger.info(f"Found {len(customers)} customer match(es) for '{customer_name}': {customers[0].get('name')}")
-                    return customers[0]
-
-            # Strategy 5: Search by email (fallback, mainly for reply-to)
-            if email:
-                domain = [['email', '=', email]]
-                customers = self.models.execute_kw(
-                    self.db, self.uid, self.password,
-                    'res.partner', 'search_read',
-                    [domain],
-                    {'fields': ['id', 'name', 'email', 'phone', 'street', 'city', 'zip', 'country_id'], 'limit': 1}
-                )
+            for label, domain, limit, verify_company in strategies:
+                if candidates is not None:
+                    customers = [c for c in candidates if all(self._matches_condition(c, cond) for cond in domain)]
+                    customers = customers[:limit]
+                else:
+                    customers = self._search_read('res.partner', domain, PARTNER_FIELDS, limit)
 
                 if customers:
-                    logger.info(f"Found customer by email: {customers[0].get('name')}")
-                    return customers[0]
+                    logger.info(f"Found {len(customers)} customer(s) by {label}: {customers[0].get('name')}")
+                    customer = customers[0]
+                    # ALWAYS verify company name if provided, even with single result
+                    if verify_company and company_name:
+                        customer = self._pick_by_company_name(customers, company_name, label)
+                    return {key: value for key, value in customer.items() if key in PARTNER_FIELDS}
 
             logger.warning("No customer found with provided criteria")
             return None
@@ -297,6 +269,124 @@ class OdooConnector:
             logger.error(f"Error querying customer info: {str(e)}")
             return None
 
+    def _customer_strategies(self, customer_id, email, customer_name, company_name,
+                             address, zip_code, phone) -> List[Tuple[str, List, int, bool]]:
+        """
+        Customer search strategies in priority order
+
+        Returns:
+            List of (description, res.partner domain, limit, verify company name)
+        """
+        import re
+        strategies = []
+
+        # Strategy 1: Search by customer ID (highest priority)
+        if customer_id:
+            strategies.append(("ID", [['id', '=', customer_id]], 1, False))
+
+        # Strategy 2: Multi-field matching (phone, zip, address)
+        if phone or zip_code or address:
+            # Sub-strategy 2a: Search by phone number (very reliable)
+            if phone:
+                # Clean phone number (remove spaces, dashes, parentheses)
+                clean_phone = ''.join(c for c in phone if c.isdigit() or c == '+')
+                if len(clean_phone) >= 6:  # Minimum length for meaningful search
+                    # Exact match first, then partial match on the last 8 digits
+                    strategies.append(("phone", [['phone', '=', phone]], 5, False))
+                    strategies.append(("partial phone match", [['phone', 'ilike', clean_phone[-8:]]], 5, False))
+
+            # Sub-strategy 2b: Search by zip code (reliable for unique locations)
+            if zip_code:
+                strategies.append((f"zip code '{zip_code}'",
+                                   [['zip', '=', zip_code], ['is_company', '=', True]], 5, True))
+
+            # Sub-strategy 2c: Search by zip + address combination (more accurate than address alone)
+            # Only use address matching when we ALSO have a zip code to narrow results
+            if zip_code and address and len(address) > 10:
+                # Extract key parts from address (street name, building number)
+                for part in re.findall(r'\b\w{4,}\b', address)[:3]:  # Try first 3 meaningful parts
+                    strategies.append((f"zip+address ('{zip_code}' + '{part}')",
+                                       [['zip', '=', zip_code], ['street', 'ilike', part], ['is_company', '=', True]],
+                                       5, True))
+
+        # Strategy 3: Search by company name (preferred for B2B), then fuzzy variations
+        if company_name:
+            for variation in self._normalize_search_term(company_name):
+                strategies.append((f"company name '{variation}'",
+                                   [['name', 'ilike', variation], ['is_company', '=', True]], 5, False))
+
+        # Strategy 4: Search by customer name
+        if customer_name:
+            strategies.append((f"customer name '{customer_name}'", [['name', 'ilike', customer_name]], 5, False))
+
+        # Strategy 5: Search by email (fallback, mainly for reply-to)
+        if email:
+            strategies.append(("email", [['email', '=', email]], 1, False))
+
+        return strategies
+
+    def _fetch_customer_candidates(self, strategies: List[Tuple[str, List, int, bool]]) -> Optional[List[Dict]]:
+        """
+        Partners matching any strategy, in Odoo's default partner order
+
+        Every strategy's domain starts with its most selective condition, so
+        OR-ing those conditions gives a superset of all strategy results.
+
+        Returns:
+            Candidate partners, or None if there are more than
+            CUSTOMER_CANDIDATE_LIMIT (strategies are then queried one by one)
+        """
+        if not strategies:
+            return []
+
+        conditions = []
+        for _, domain, _, _ in strategies:
+            if domain[0] not in conditions:
+                conditions.append(domain[0])
+        domain = ['|'] * (len(conditions) - 1) + conditions
+
+        candidates = self._search_read(
+            'res.partner', domain, PARTNER_FIELDS + ['is_company'], CUSTOMER_CANDIDATE_LIMIT + 1
+        )
+        if len(candidates) > CUSTOMER_CANDIDATE_LIMIT:
+            logger.info(f"More than {CUSTOMER_CANDIDATE_LIMIT} customer candidates, querying strategies one by one")
+            return None
+        logger.info(f"Fetched {len(candidates)} customer candidate(s) for {len(strategies)} search strategies")
+        return candidates
+
+    @staticmethod
+    def _matches_condition(record: Dict, condition: List) -> bool:
+        """Evaluate a '=' / 'ilike' domain condition on a fetched record (as Odoo does)"""
+        import re
+        field, operator, value = condition
+        actual = record.get(field)
+        if operator == '=':
+            return actual == value
+        if operator == 'ilike':
+            if not isinstance(actual, str):
+                return False
+            # SQL ILIKE '%value%': '%' and '_' in the value are wildcards
+            pattern = ''.join('.*' if c == '%' else '.' if c == '_' else re.escape(c) for c in str(value))
+            return re.search(pattern, actual, re.IGNORECASE | re.DOTALL) is not None
+        raise ValueError(f"Unsupported operator: {operator}")
+
+    @staticmethod
+    def _pick_by_company_name(customers: List[Dict], company_name: str, label: str) -> Dict:
+        """Customer whose name matches the company name, else the first one"""
+        import re
+        # Normalize company name for better matching (remove special chars)
+        clean_company = re.sub(r'[^\w\s]', '', company_name.lower()).strip()
+
+        for customer in customers:
+            clean_customer_name = re.sub(r'[^\w\s]', '', customer.get('name', '').lower()).strip()
+            if clean_company in clean_customer_name or clean_customer_name in clean_company:
+                logger.info(f"Matched by {label} + name: {customer.get('name')}")
+                return customer
+
+        # No match found - log warning and return first (might be wrong)
+        logger.warning(f"Company name '{company_name}' not found in {len(customers)} {label} matches, returning first result")
+        return customers[0]
+
     def query_orders(self, customer_id: int, limit: int = 10) -> List[Dict]:
         """
         Query customer orders from Odoo
@@ -435,15 +525,10 @@ class OdooConnector:
             if product_id:
                 # Query product.product by template ID to get variant
                 domain = [['product_tmpl_id', '=', product_id]]
-                products = self.models.execute_kw(
-                    self.db, self.uid, self.password,
-                    'product.product', 'search_read',
-                    [domain],
-                    {
-                        'fields': ['id', 'name', 'default_code', 'lst_price', 'standard_price', 'product_tmpl_id'],
-                        'limit': 20
-                    }
-                )
+                products = self._search_read('product.product', domain, PRODUCT_FIELDS, 20)
+                if not products and self.mirror is not None:
+                    # The variant may be newer than the mirror: check Odoo before creating one
+                    products = self._search_read('product.product', domain, PRODUCT_FIELDS, 20, local=False)
 
                 # If no variant found, try to create one
                 if not products:
@@ -455,15 +540,13 @@ class OdooConnector:
                             [{'product_tmpl_id': product_id}]
                         )
                         logger.info(f"Created variant ID {variant_id} for template {product_id}")
+                        self.variants_created += 1
                         # Query the newly created variant
                         products = self.models.execute_kw(
                             self.db, self.uid, self.password,
                             'product.product', 'search_read',
                             [[['id', '=', variant_id]]],
-                            {
-                                'fields': ['id', 'name', 'default_code', 'lst_price', 'standard_price', 'product_tmpl_id'],
-                                'limit': 1
-                            }
+                            {'fields': PRODUCT_FIELDS, 'limit': 1}
                         )
                     except Exception as e:
                         logger.error(f"Failed to create variant for template {product_id}: {e}")
@@ -476,15 +559,7 @@ class OdooConnector:
 
                 # Try exact match first (search product.product variants)
                 domain = [['default_code', '=', product_code]]
-                products = self.models.execute_kw(
-                    self.db, self.uid, self.password,
-                    'product.product', 'search_read',
-                    [domain],
-                    {
-                        'fields': ['id', 'name', 'default_code', 'lst_price', 'standard_price', 'product_tmpl_id'],
-                        'limit': 20
-                    }
-                )
+                products = self._search_read('product.product', domain, PRODUCT_FIELDS, 20)
 
                 if products:
                     logger.info(f"Found {len(products)} product(s) by exact code '{product_code}'")
@@ -492,15 +567,7 @@ class OdooConnector:
                     # Try normalized variations
                     for norm_code in normalized_codes:
                         domain = [['default_code', 'ilike', norm_code]]
-                        products = self.models.execute_kw(
-                            self.db, self.uid, self.password,
-                            'product.product', 'search_read',
-                            [domain],
-                            {
-                                'fields': ['id', 'name', 'default_code', 'lst_price', 'standard_price', 'product_tmpl_id'],
-                                'limit': 20
-                            }
-                        )
+                        products = self._search_read('product.product', domain, PRODUCT_FIELDS, 20)
 
                         if products:
                             logger.info(f"Found {len(products)} product(s) by normalized code '{norm_code}' (from '{product_code}')")
@@ -509,15 +576,7 @@ class OdooConnector:
                     if not products:
                         # Try fuzzy matching with original code
                         domain = [['default_code', 'ilike', product_code]]
-                        products = self.models.execute_kw(
-                            self.db, self.uid, self.password,
-                            'product.product', 'search_read',
-                            [domain],
-                            {
-                                'fields': ['id', 'name', 'default_code', 'lst_price', 'standard_price', 'product_tmpl_id'],
-                                'limit': 20
-                            }
-                        )
+                        products = self._search_read('product.product', domain, PRODUCT_FIELDS, 20)
 
                         if products:
                             logger.info(f"Found {len(products)} product(s) by fuzzy code match '{product_code}'")
@@ -527,15 +586,7 @@ class OdooConnector:
                             if product_code and product_code[-1].isalpha():
                                 truncated = product_code[:-1]
                                 domain = [['default_code', 'ilike', truncated]]
-                                products = self.models.execute_kw(
-                                    self.db, self.uid, self.password,
-                                    'product.product', 'search_read',
-                                    [domain],
-                                    {
-                                        'fields': ['id', 'name', 'default_code', 'lst_price', 'standard_price', 'product_tmpl_id'],
-                                        'limit': 20
-                                    }
-                                )
+                                products = self._search_read('product.product', domain, PRODUCT_FIELDS, 20)
                                 if products:
                                     logger.info(f"Found {len(products)} product(s) by truncated code '{truncated}'")
 
@@ -553,15 +604,7 @@ class OdooConnector:
                         logger.info(f"Trying variation {i+1}: '{variation}'")
                         domain = ['|', ['name', 'ilike', variation], ['default_code', 'ilike', variation]]
 
-                    products = self.models.execute_kw(
-                        self.db, self.uid, self.password,
-                        'product.product', 'search_read',
-                        [domain],
-                        {
-                            'fields': ['id', 'name', 'default_code', 'lst_price', 'standard_price', 'product_tmpl_id'],
-                            'limit': 20
-                        }
-                    )
+                    products = self._search_read('product.product', domain, PRODUCT_FIELDS, 20)
 
                     if products:
                         if i > 0:
@@ -576,6 +619,39 @@ class OdooConnector:
             logger.error(f"Error querying products: {str(e)}")
             return []
 
+    def query_products_by_template_ids(self, template_ids: List[int]) -> Dict[int, List[Dict]]:
+        """
+        Query product variants of many product templates in one call
+
+        Batched form of query_products(product_id=...) for existing variants
+        (templates without a variant are not in the result).
+
+        Args:
+            template_ids: Product template IDs
+
+        Returns:
+            Dictionary template ID -> variants (in Odoo's product order); empty on error
+        """
+        if not template_ids:
+            return {}
+        logger.info(f"Querying variants of {len(template_ids)} product templates")
+
+        try:
+            products = self._search_read(
+                'product.product', [['product_tmpl_id', 'in', list(template_ids)]], PRODUCT_FIELDS
+            )
+
+            by_template = {}
+            for product in products:
+                template = product.get('product_tmpl_id')
+                template_id = template[0] if isinstance(template, (list, tuple)) else template
+                by_template.setdefault(template_id, []).append(product)
+            return by_template
+
+        except Exception as e:
+            logger.error(f"Error querying products by template IDs: {str(e)}")
+            return {}
+
     def search_by_reference(self, reference: str) -> Optional[Dict]:
         """
         Search for order/invoice by reference number
@@ -781,6 +857,9 @@ class OdooConnector:
             return None
 
     def close(self):
-        """Close Odoo connection (XML-RPC is stateless, so just log)"""
+        """Close Odoo connection (XML-RPC is stateless: closes the pooled connections)"""
         logger.info("Odoo connection session ended")
+        self.pool.close()
+        if self.mirror is not None:
+            self.mirror.close()
         self.uid = None
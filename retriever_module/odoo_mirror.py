@@ -0,0 +1,572 @@
+"""
+Odoo Mirror Module
+
+Local read-through mirror of Odoo partners (res.partner) and products
+(product.product). Every email searches both models several times; while the
+mirror of a model is fresh, OdooConnector answers these searches locally
+instead of waiting for Odoo.
+
+- Records are kept in an SQLite file (shared by all processes using it) and in
+  memory, indexed by ID, default_code and the other exact-match keys, with
+  lower-cased names for 'ilike' searches. Searches are evaluated with Odoo's
+  domain semantics ('=', 'in', 'ilike', '|', '&') and sorted by the model's
+  default order. PostgreSQL sorts text by its collation, which the mirror only
+  approximates, so a search with several hits whose order depends on how text
+  collates (letter case, punctuation) is sent to Odoo.
+- A sync pulls only records with write_date >= the stored watermark, in
+  ID-paginated batches, and drops records that were deleted or archived.
+  Variants are also pulled when their template was written (name and prices
+  are stored on product.template).
+- A model is fresh for ttl seconds after its last sync. Up to max_stale seconds
+  it is still served while a background sync refreshes it, so slow Odoo
+  responses do not block email processing. A model that was never loaded, or
+  is older than that, is synced first; searches go to Odoo if that fails.
+"""
+
+import re
+import json
+import time
+import sqlite3
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Mirrored models: fields stored per record, exact-match keys indexed in memory,
+# the write_date fields a sync checks for changes and the model's default order
+# (_order) as a sort key; order(record, text) applies text() to the text columns
+# and ends with the record ID
+MIRROR_MODELS = {
+    'res.partner': {
+        'fields': ['id', 'name', 'complete_name', 'email', 'phone', 'street', 'city', 'zip',
+                   'country_id', 'is_company'],
+        'indexed': ['email', 'phone', 'zip'],
+        'changed': ['write_date'],
+        # _order = 'complete_name ASC, id DESC'
+        'order': lambda record, text: (text(record.get('complete_name') or ''), -record['id']),
+    },
+    'product.product': {
+        'fields': ['id', 'name', 'default_code', 'lst_price', 'standard_price', 'product_tmpl_id',
+                   'is_favorite'],
+        'indexed': ['default_code', 'product_tmpl_id'],
+        # name, lst_price, is_favorite and product_tmpl_id come from the (inherited) template
+        'changed': ['write_date', 'product_tmpl_id.write_date'],
+        # _order = 'is_favorite desc, default_code, name, id' (products without code last)
+        'order': lambda record, text: (not record.get('is_favorite'), not record.get('default_code'),
+                                       text(record.get('default_code') or ''), text(record.get('name') or ''),
+                                       record['id']),
+    },
+}
+
+
+def _alphanumeric(text: str) -> str:
+    """Text as compared by a collation that ignores case, spaces and punctuation"""
+    return re.sub(r'[\W_]+', '', text).casefold()
+
+
+# Approximations of PostgreSQL's text order: the mirror's order is trusted where
+# both agree (glibc locales compare case-insensitively first, and depending on
+# the version skip spaces and punctuation)
+COLLATION_KEYS = (str.casefold, _alphanumeric)
+
+# Changes are fetched from this long before the watermark: write_date is the
+# start time of the writing transaction, which may commit after a sync
+SYNC_OVERLAP = timedelta(minutes=5)
+
+ODOO_DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def fetch_records(execute: Callable, model: str, fields: List[str], domain: Optional[List] = None,
+                  batch_size: int = 500) -> List[Dict]:
+    """
+    Fetch all records matching a domain in ID-paginated batches
+
+    Pages are selected by ID (id > last ID of the previous page) rather than by
+    offset, so records changed during the fetch do not shift the pages.
+
+    Args:
+        execute: execute(model, method, args, kwargs) calling Odoo's execute_kw
+        model: Odoo model name
+        fields: Fields to read
+        domain: Search domain (None = all active records)
+        batch_size: Records per search_read call
+
+    Returns:
+        Records sorted by ID
+    """
+    records = []
+    last_id = 0
+    while True:
+        batch = execute(model, 'search_read', [list(domain or []) + [['id', '>', last_id]]],
+                        {'fields': fields, 'order': 'id', 'limit': batch_size})
+        records.extend(batch)
+        if len(batch) < batch_size:
+            return records
+        last_id = batch[-1]['id']
+
+
+def fetch_ids(execute: Callable, model: str, domain: Optional[List] = None) -> List[int]:
+    """
+    IDs of all active records (to find deleted and archived ones)
+
+    Args:
+        execute: execute(model, method, args, kwargs) calling Odoo's execute_kw
+        model: Odoo model name
+        domain: Search domain (None = all active records)
+
+    Returns:
+        Record IDs
+    """
+    return execute(model, 'search', [list(domain or [])], {})
+
+
+def changed_since(watermark: str) -> str:
+    """
+    Lower write_date bound of a sync from the previous sync's watermark
+
+    Args:
+        watermark: Latest write_date seen ("YYYY-MM-DD HH:MM:SS")
+
+    Returns:
+        write_date to fetch changes from (SYNC_OVERLAP earlier)
+    """
+    since = datetime.strptime(watermark[:19], ODOO_DATETIME_FORMAT) - SYNC_OVERLAP
+    return since.strftime(ODOO_DATETIME_FORMAT)
+
+
+def changed_domain(fields: List[str], since: str) -> List:
+    """
+    Domain of records written since a date
+
+    Args:
+        fields: write_date fields to check (e.g. of the record and of its template)
+        since: Lower write_date bound ("YYYY-MM-DD HH:MM:SS")
+
+    Returns:
+        Search domain matching records with any of the fields >= since
+    """
+    return ['|'] * (len(fields) - 1) + [[field, '>=', since] for field in fields]
+
+
+def _field_value(record: Dict, field: str):
+    """Value compared by '=' / 'in' (ID of a many2one)"""
+    value = record.get(field)
+    if isinstance(value, (list, tuple)):
+        return value[0] if value else False
+    return value
+
+
+def _compile_condition(condition: List, stored_fields: set) -> Callable[[Dict], bool]:
+    """Predicate of one (field, operator, value) condition"""
+    field, operator, value = condition
+    if field not in stored_fields:
+        raise ValueError(f"Field not mirrored: {field}")
+
+    if operator == '=':
+        return lambda record: _field_value(record, field) == value
+    if operator == 'in':
+        values = set(value)
+        return lambda record: _field_value(record, field) in values
+    if operator == 'ilike':
+        needle = str(value).lower()
+        if '%' in needle or '_' in needle:
+            raise ValueError(f"Wildcards in ilike value: {value}")
+
+        def ilike(record):
+            text = record.get(field)
+            if isinstance(text, (list, tuple)):
+                text = text[1] if len(text) > 1 else False  # many2one: display name
+            return isinstance(text, str) and needle in text.lower()
+        return ilike
+    raise ValueError(f"Unsupported operator: {operator}")
+
+
+def compile_domain(domain: List, stored_fields: set) -> Callable[[Dict], bool]:
+    """
+    Predicate of an Odoo domain (prefix '|' / '&', implicit AND between terms)
+
+    Args:
+        domain: Search domain
+        stored_fields: Fields available on the records
+
+    Returns:
+        Function record -> bool
+
+    Raises:
+        ValueError: Operator or field the mirror cannot evaluate
+    """
+    def node(i):
+        if i >= len(domain):
+            raise ValueError("Incomplete domain")
+        term = domain[i]
+        if term in ('|', '&'):
+            left, i = node(i + 1)
+            right, i = node(i)
+            if term == '|':
+                return (lambda record: left(record) or right(record)), i
+            return (lambda record: left(record) and right(record)), i
+        if isinstance(term, str):
+            raise ValueError(f"Unsupported domain operator: {term}")
+        return _compile_condition(term, stored_fields), i + 1
+
+    predicates = []
+    i = 0
+    while i < len(domain):
+        predicate, i = node(i)
+        predicates.append(predicate)
+    return lambda record: all(predicate(record) for predicate in predicates)
+
+
+class _MirrorTable:
+    """In-memory copy of one model, sorted in its default order and indexed"""
+
+    def __init__(self, model: str, records: List[Dict]):
+        spec = MIRROR_MODELS[model]
+        self.records = sorted(records, key=lambda record: spec['order'](record, str.casefold))
+        # Sort keys without the ID, verbatim and per collation approximation
+        self._text_keys = [spec['order'](record, str)[:-1] for record in self.records]
+        self._collation_keys = [[spec['order'](record, text)[:-1] for record in self.records]
+                                for text in COLLATION_KEYS]
+        self.position = {record['id']: i for i, record in enumerate(self.records)}
+        self.index = {field: {} for field in spec['indexed']}
+        for record in self.records:
+            for field, values in self.index.items():
+                values.setdefault(_field_value(record, field), []).append(record['id'])
+        self._lowered = {}
+
+    def _lowered_column(self, field: str) -> List[str]:
+        """Lower-cased text of a field per record (built on first 'ilike' search)"""
+        column = self._lowered.get(field)
+        if column is None:
+            column = []
+            for record in self.records:
+                text = record.get(field)
+                if isinstance(text, (list, tuple)):
+                    text = text[1] if len(text) > 1 else False
+                column.append(text.lower() if isinstance(text, str) else '')
+            self._lowered[field] = column
+        return column
+
+    def _candidates(self, domain: List) -> Optional[set]:
+        """
+        IDs that can match a domain, from the indexes and lower-cased columns
+
+        Returns:
+            Candidate IDs, or None if the domain needs a full scan
+        """
+        def node(i):
+            term = domain[i]
+            if term in ('|', '&'):
+                left, i = node(i + 1)
+                right, i = node(i)
+                if term == '|':
+                    return (None if left is None or right is None else left | right), i
+                if left is None:
+                    return right, i
+                return (left if right is None else left & right), i
+            field, operator, value = term
+            if operator == 'ilike':
+                needle = str(value).lower()
+                return {self.records[n]['id'] for n, text in enumerate(self._lowered_column(field))
+                        if needle in text}, i + 1
+            if operator not in ('=', 'in') or (field != 'id' and field not in self.index):
+                return None, i + 1
+            values = value if operator == 'in' else [value]
+            if field == 'id':
+                return set(values), i + 1
+            ids = set()
+            for v in values:
+                ids.update(self.index[field].get(v, ()))
+            return ids, i + 1
+
+        candidates = None
+        i = 0
+        while i < len(domain):
+            ids, i = node(i)
+            if ids is not None:
+                candidates = ids if candidates is None else candidates & ids
+        return candidates
+
+    def _collation_safe(self, positions: List[int]) -> bool:
+        """
+        Whether PostgreSQL sorts these records (in table order) the same way
+
+        Holds when each record's key is identical to the next one's except for
+        the ID, or sorts strictly before it under every collation approximation.
+        """
+        for a, b in zip(positions, positions[1:]):
+            if self._text_keys[a] == self._text_keys[b]:
+                continue
+            if not all(keys[a] < keys[b] for keys in self._collation_keys):
+                return False
+        return True
+
+    def search(self, domain: List, stored_fields: set, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Records matching a domain, in the model's default order
+
+        Raises:
+            ValueError: Domain the mirror cannot evaluate, or several hits whose
+                order depends on PostgreSQL's text collation
+        """
+        predicate = compile_domain(domain, stored_fields)
+        candidates = self._candidates(domain)
+        if candidates is None:
+            positions = range(len(self.records))
+        else:
+            positions = sorted(self.position[i] for i in candidates if i in self.position)
+
+        found = [n for n in positions if predicate(self.records[n])]
+        if not self._collation_safe(found):
+            raise ValueError("Order of the hits depends on the text collation")
+        return [self.records[n] for n in found[:limit or None]]
+
+
+class OdooMirror:
+    """SQLite + in-memory mirror of Odoo partners and products"""
+
+    def __init__(self, db_path: Optional[str], execute: Callable, ttl: float = 300.0,
+                 max_stale: float = 3600.0, batch_size: int = 500):
+        """
+        Initialize Odoo mirror
+
+        Args:
+            db_path: SQLite file (None or "" keeps the mirror in memory only)
+            execute: execute(model, method, args, kwargs) calling Odoo's execute_kw
+            ttl: Seconds a synced model is answered without checking Odoo
+            max_stale: Seconds a model is still answered while it is synced in the background
+            batch_size: Records per search_read call of a sync
+        """
+        self.db_path = Path(db_path) if db_path else None
+        self.execute = execute
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.batch_size = batch_size
+        self._tables: Dict[str, _MirrorTable] = {}
+        self._synced_at: Dict[str, float] = {}
+        self._watermarks: Dict[str, str] = {}
+        self._lock = threading.RLock()
+        self._sync_locks = {model: threading.Lock() for model in MIRROR_MODELS}
+        self._db = None
+        self.local_hits = 0
+        self.fallbacks = 0
+        self.syncs = 0
+
+        self._open()
+
+    def _open(self):
+        """Open (or create) the SQLite store; memory-only if that fails"""
+        if not self.db_path:
+            return
+
+        try:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(self.db_path), timeout=10, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS mirror_records "
+                "(model TEXT NOT NULL, id INTEGER NOT NULL, data TEXT NOT NULL, PRIMARY KEY (model, id))"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS mirror_state "
+                "(model TEXT PRIMARY KEY, watermark TEXT NOT NULL, synced_at REAL NOT NULL)"
+            )
+            self._db.commit()
+        except Exception as e:
+            logger.warning(f"[!] Could not open Odoo mirror {self.db_path}: {e}")
+            self._db = None
+
+    def _stored_state(self, model: str):
+        """(watermark, synced_at) of the last sync recorded on disk, or None"""
+        if self._db is None:
+            return None
+        try:
+            return self._db.execute(
+                "SELECT watermark, synced_at FROM mirror_state WHERE model = ?", (model,)
+            ).fetchone()
+        except Exception as e:
+            logger.warning(f"[!] Could not read Odoo mirror state: {e}")
+            return None
+
+    def _load(self, model: str):
+        """Load a model from disk if another process (or a previous run) synced it later"""
+        state = self._stored_state(model)
+        if state is None or state[1] <= self._synced_at.get(model, 0.0):
+            return
+        try:
+            rows = self._db.execute("SELECT data FROM mirror_records WHERE model = ?", (model,)).fetchall()
+        except Exception as e:
+            logger.warning(f"[!] Could not read Odoo mirror: {e}")
+            return
+        records = [json.loads(data) for (data,) in rows]
+        if records and not set(MIRROR_MODELS[model]['fields']) <= set(records[0]):
+            logger.info(f"Odoo mirror of {model} lacks newly mirrored fields, reloading it")
+            return
+        self._tables[model] = _MirrorTable(model, records)
+        self._watermarks[model], self._synced_at[model] = state
+        logger.info(f"Loaded {len(rows)} {model} records from Odoo mirror")
+
+    def _fresh_table(self, model: str) -> Optional[_MirrorTable]:
+        """Mirrored table if it may be answered from, syncing it when needed"""
+        with self._lock:
+            if time.time() - self._synced_at.get(model, 0.0) > self.ttl:
+                self._load(model)
+            table = self._tables.get(model)
+            age = time.time() - self._synced_at.get(model, 0.0)
+
+        if table is not None and age <= self.ttl:
+            return table
+        if table is not None and age <= self.max_stale:
+            self.sync_in_background(model)
+            return table
+        if self.sync(model):
+            return self._tables.get(model)
+        return None
+
+    def search_read(self, model: str, domain: List, fields: List[str],
+                    limit: Optional[int] = None) -> Optional[List[Dict]]:
+        """
+        Answer a search_read from the mirror
+
+        Args:
+            model: Odoo model name
+            domain: Search domain
+            fields: Fields to return ('id' is always included)
+            limit: Maximum number of records
+
+        Returns:
+            Records in the model's default order, or None if the mirror cannot
+            answer (model or fields not mirrored, unsupported domain, no fresh copy)
+        """
+        spec = MIRROR_MODELS.get(model)
+        if spec is None or not set(fields) <= set(spec['fields']):
+            return None
+
+        table = self._fresh_table(model)
+        if table is None:
+            self.fallbacks += 1
+            return None
+
+        try:
+            records = table.search(domain, set(spec['fields']), limit)
+        except ValueError as e:
+            logger.debug(f"Odoo mirror cannot evaluate {domain}: {e}")
+            self.fallbacks += 1
+            return None
+
+        self.local_hits += 1
+        returned = set(fields) | {'id'}
+        return [{key: value for key, value in record.items() if key in returned} for record in records]
+
+    def sync(self, model: str) -> bool:
+        """
+        Bring a mirrored model up to date with Odoo
+
+        The first sync loads all records; later ones fetch records written since
+        the watermark and drop records that are no longer active.
+
+        Args:
+            model: Mirrored model name
+
+        Returns:
+            True if the model is now in sync
+        """
+        with self._sync_locks[model]:
+            with self._lock:
+                self._load(model)
+                if time.time() - self._synced_at.get(model, 0.0) <= self.ttl:
+                    return True  # synced by another thread or process meanwhile
+                table = self._tables.get(model)
+                watermark = self._watermarks.get(model)
+
+            fields = MIRROR_MODELS[model]['fields'] + ['write_date']
+            start = time.time()
+            try:
+                if table is None:
+                    changed = fetch_records(self.execute, model, fields, batch_size=self.batch_size)
+                    active_ids = None
+                else:
+                    domain = changed_domain(MIRROR_MODELS[model]['changed'], changed_since(watermark))
+                    changed = fetch_records(self.execute, model, fields, domain, self.batch_size)
+                    active_ids = set(fetch_ids(self.execute, model))
+            except Exception as e:
+                logger.warning(f"[!] Could not sync Odoo mirror of {model}: {e}")
+                return False
+
+            records = {} if table is None else {record['id']: record for record in table.records}
+            changed = [record for record in changed if active_ids is None or record['id'] in active_ids]
+            removed = [] if active_ids is None else [i for i in records if i not in active_ids]
+            for record in changed:
+                records[record['id']] = record
+            for record_id in removed:
+                del records[record_id]
+
+            write_dates = [record['write_date'] for record in changed if record.get('write_date')]
+            if watermark:
+                write_dates.append(watermark)
+            watermark = max(write_dates) if write_dates else \
+                datetime.now(timezone.utc).strftime(ODOO_DATETIME_FORMAT)
+            synced_at = time.time()
+
+            with self._lock:
+                self._save(model, table is None, changed, removed, watermark, synced_at)
+                self._tables[model] = _MirrorTable(model, list(records.values()))
+                self._watermarks[model] = watermark
+                self._synced_at[model] = synced_at
+                self.syncs += 1
+
+            logger.info(f"Synced Odoo mirror of {model} in {time.time() - start:.2f}s: "
+                        f"{len(changed)} changed, {len(removed)} removed, {len(records)} records")
+            return True
+
+    def _save(self, model: str, replace: bool, changed: List[Dict], removed: List[int],
+              watermark: str, synced_at: float):
+        """Write a sync to disk in one transaction"""
+        if self._db is None:
+            return
+        try:
+            with self._db:
+                if replace:
+                    self._db.execute("DELETE FROM mirror_records WHERE model = ?", (model,))
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO mirror_records (model, id, data) VALUES (?, ?, ?)",
+                    [(model, record['id'], json.dumps(record)) for record in changed]
+                )
+                self._db.executemany(
+                    "DELETE FROM mirror_records WHERE model = ? AND id = ?",
+                    [(model, record_id) for record_id in removed]
+                )
+                self._db.execute(
+                    "INSERT OR REPLACE INTO mirror_state (model, watermark, synced_at) VALUES (?, ?, ?)",
+                    (model, watermark, synced_at)
+                )
+        except Exception as e:
+            logger.warning(f"[!] Could not save Odoo mirror: {e}")
+
+    def sync_in_background(self, model: str):
+        """Start a sync of a model unless one is already running"""
+        if self._sync_locks[model].locked():
+            return
+        threading.Thread(target=self.sync, args=(model,), name=f"odoo-mirror-{model}", daemon=True).start()
+
+    def stats(self) -> Dict:
+        """Get mirror statistics"""
+        with self._lock:
+            records = {model: len(table.records) for model, table in self._tables.items()}
+            ages = {model: round(time.time() - synced_at, 1) for model, synced_at in self._synced_at.items()}
+        return {
+            'records': records,
+            'age_seconds': ages,
+            'local_hits': self.local_hits,
+            'fallbacks': self.fallbacks,
+            'syncs': self.syncs
+        }
+
+    def close(self):
+        """Close the SQLite store (the mirror stays usable in memory)"""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -0,0 +1,234 @@
+"""
+Odoo Transport Module
+
+Keep-alive XML-RPC transport for OdooConnector. xmlrpc.client's default
+Transport holds a single connection per ServerProxy, cannot be shared between
+threads and opens a new connection whenever the server or a proxy in between
+does not keep it alive. PooledTransport keeps a thread-safe pool of persistent
+HTTP(S) connections per host, shared by Odoo's 'common' and 'object'
+endpoints:
+
+- idle connections are reused, up to pool_size per host, and closed after
+  idle_timeout seconds (before the server's keep-alive timeout drops them)
+- a request on a pooled connection the server closed in the meantime is sent
+  again once on a new connection
+"""
+
+import time
+import logging
+import threading
+import http.client
+import xmlrpc.client
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Errors of a reused connection that was closed by the other side (request not processed)
+STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    ConnectionResetError,
+    ConnectionAbortedError,
+    BrokenPipeError,
+)
+
+
+class ConnectionPool:
+    """Thread-safe pool of idle HTTP(S) connections per host"""
+
+    def __init__(self, pool_size: int = 4, idle_timeout: float = 30.0,
+                 timeout: Optional[float] = None, ssl_context=None):
+        """
+        Initialize connection pool
+
+        Args:
+            pool_size: Idle connections kept open per host
+            idle_timeout: Seconds after which an idle connection is closed
+            timeout: Socket timeout of new connections (None = no timeout)
+            ssl_context: SSL context for HTTPS connections (None = default)
+        """
+        self.pool_size = pool_size
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.ssl_context = ssl_context
+        self._idle: Dict[Tuple[str, str], List[Tuple[http.client.HTTPConnection, float]]] = {}
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+
+    def _new_connection(self, scheme: str, host: str) -> http.client.HTTPConnection:
+        if scheme == 'https':
+            return http.client.HTTPSConnection(host, timeout=self.timeout, context=self.ssl_context)
+        return http.client.HTTPConnection(host, timeout=self.timeout)
+
+    def acquire(self, scheme: str, host: str) -> Tuple[http.client.HTTPConnection, bool]:
+        """
+        Get a connection to a host (most recently used idle one, or a new one)
+
+        Args:
+            scheme: 'http' or 'https'
+            host: "host[:port]"
+
+        Returns:
+            (connection, True if it was reused from the pool)
+        """
+        now = time.monotonic()
+        expired = []
+        connection = None
+        with self._lock:
+            idle = self._idle.get((scheme, host), [])
+            while idle:
+                candidate, last_used = idle.pop()
+                if now - last_used <= self.idle_timeout:
+                    connection = candidate
+                    self.reused += 1
+                    break
+                expired.append(candidate)
+            if connection is None:
+                self.created += 1
+
+        for stale in expired:
+            stale.close()
+        if connection is not None:
+            return connection, True
+        return self._new_connection(scheme, host), False
+
+    def release(self, scheme: str, host: str, connection: http.client.HTTPConnection):
+        """
+        Return a connection after its response was read completely
+
+        Args:
+            scheme: 'http' or 'https'
+            host: "host[:port]"
+            connection: Connection from acquire()
+        """
+        if connection.sock is None:
+            return  # closed by http.client (e.g. "Connection: close" response)
+
+        now = time.monotonic()
+        to_close = []
+        with self._lock:
+            idle = self._idle.setdefault((scheme, host), [])
+            # Drop expired connections (oldest first in the list)
+            while idle and now - idle[0][1] > self.idle_timeout:
+                to_close.append(idle.pop(0)[0])
+            if len(idle) < self.pool_size:
+                idle.append((connection, now))
+            else:
+                to_close.append(connection)
+
+        for stale in to_close:
+            stale.close()
+
+    def close(self):
+        """Close all idle connections"""
+        with self._lock:
+            connections = [conn for idle in self._idle.values() for conn, _ in idle]
+            self._idle.clear()
+        for connection in connections:
+            connection.close()
+
+    def stats(self) -> Dict:
+        """Get pool statistics"""
+        with self._lock:
+            idle = sum(len(connections) for connections in self._idle.values())
+        return {'created': self.created, 'reused': self.reused, 'idle': idle}
+
+
+class PooledTransport(xmlrpc.client.Transport):
+    """XML-RPC transport sending every request over a pooled keep-alive connection"""
+
+    def __init__(self, pool: ConnectionPool, use_https: bool = False, **kwargs):
+        """
+        Initialize transport
+
+        Args:
+            pool: Connection pool (may be shared by several transports / proxies)
+            use_https: Connect with TLS
+            **kwargs: xmlrpc.client.Transport options (use_datetime, use_builtin_types, headers)
+        """
+        super().__init__(**kwargs)
+        self.pool = pool
+        self.scheme = 'https' if use_https else 'http'
+
+    def request(self, host, handler, request_body, verbose=False):
+        """Send one XML-RPC request and parse the response"""
+        for attempt in range(2):
+            connection, reused = self.pool.acquire(self.scheme, self._pool_host(host))
+            try:
+                response = self._send(connection, host, handler, request_body, verbose)
+            except STALE_CONNECTION_ERRORS:
+                connection.close()
+                if reused and attempt == 0:
+                    logger.debug(f"Pooled connection to {host} was closed, retrying on a new one")
+                    continue
+                raise
+            except BaseException:
+                connection.close()
+                raise
+
+            return self._read(connection, host, handler, response, verbose)
+
+    def _pool_host(self, host) -> str:
+        chost, _, _ = self.get_host_info(host)
+        return chost
+
+    def _send(self, connection, host, handler, request_body, verbose) -> http.client.HTTPResponse:
+        """Write request headers and body, return the response"""
+        _, extra_headers, _ = self.get_host_info(host)
+        headers = self._headers + extra_headers
+        if verbose:
+            connection.set_debuglevel(1)
+        if self.accept_gzip_encoding:
+            connection.putrequest("POST", handler, skip_accept_encoding=True)
+            headers.append(("Accept-Encoding", "gzip"))
+        else:
+            connection.putrequest("POST", handler)
+        headers.append(("User-Agent", self.user_agent))
+        self.send_headers(connection, headers)
+        self.send_content(connection, request_body)
+        return connection.getresponse()
+
+    def _read(self, connection, host, handler, response, verbose):
+        """Parse the response and return the connection to the pool"""
+        if response.status != 200:
+            connection.close()
+            raise xmlrpc.client.ProtocolError(
+                host + handler, response.status, response.reason, dict(response.getheaders())
+            )
+
+        self.verbose = verbose
+        try:
+            result = self.parse_response(response)
+        except xmlrpc.client.Fault:
+            # Complete response: the connection stays usable
+            self._release(connection, host, response)
+            raise
+        except BaseException:
+            connection.close()
+            raise
+
+        self._release(connection, host, response)
+        return result
+
+    def _release(self, connection, host, response):
+        if response.will_close:
+            connection.close()
+        else:
+            self.pool.release(self.scheme, self._pool_host(host), connection)
+
+    def close(self):
+        """Connections belong to the pool (ConnectionPool.close())"""
+
+
+def make_transport(url: str, pool: ConnectionPool) -> PooledTransport:
+    """
+    Pooled transport for a server URL
+
+    Args:
+        url: Server URL (http:// or https://)
+        pool: Connection pool
+
+    Returns:
+        PooledTransport using TLS for https URLs
+    """
+    return PooledTransport(pool, use_https=url.lower().startswith('https://'))
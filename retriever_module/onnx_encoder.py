@@ -0,0 +1,117 @@
+"""
+ONNX Encoder Module
+
+Optional ONNX Runtime inference backend for the BERT matcher on CPU. The
+sentence-transformers model is exported to ONNX once (optionally with dynamic
+int8 quantization) into the embeddings cache directory, then loaded through
+sentence-transformers' "onnx" backend with a tuned onnxruntime session, so
+model.encode() keeps its usual signature.
+
+Needs sentence-transformers >= 3.2 with optimum[onnxruntime]; callers fall
+back to the PyTorch model when anything here fails.
+"""
+
+import os
+import logging
+import shutil
+import platform
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+ONNX_FILE = "onnx/model.onnx"
+
+# Version of the model an export was made from (a re-trained local model is exported again)
+VERSION_FILE = "source_version.txt"
+
+
+def _quantization_config() -> str:
+    """Dynamic int8 quantization target for this CPU"""
+    if platform.machine().lower() in ('arm64', 'aarch64'):
+        return 'arm64'
+    return 'avx512_vnni' if _cpu_has('avx512_vnni') else 'avx2'
+
+
+def _cpu_has(flag: str) -> bool:
+    """CPU feature check (Linux /proc/cpuinfo; False elsewhere)"""
+    try:
+        with open('/proc/cpuinfo', 'r') as f:
+            return flag in f.read()
+    except OSError:
+        return False
+
+
+def get_export_dir(cache_dir: str, model_name: str) -> Path:
+    """Directory holding the exported ONNX model for a model name"""
+    model_slug = model_name.replace('/', '_').replace('\\', '_')
+    return Path(cache_dir) / f"onnx_{model_slug}"
+
+
+def load_onnx_model(
+    model_name: str,
+    cache_dir: str = ".bert_cache",
+    quantize: bool = False,
+    num_threads: Optional[int] = None,
+    model_version: Optional[str] = None
+):
+    """
+    Load a SentenceTransformer served by onnxruntime, exporting it on first use
+
+    Args:
+        model_name: HuggingFace model identifier or local model path
+        cache_dir: Directory for the exported model
+        quantize: Use the dynamically int8-quantized export
+        num_threads: onnxruntime intra-op threads (default: os.cpu_count(), i.e. logical CPUs)
+        model_version: Version of the source model (default model_name); an export
+            of another version is replaced
+
+    Returns:
+        SentenceTransformer with backend="onnx"
+    """
+    import onnxruntime as ort
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+    export_dir = get_export_dir(cache_dir, model_name)
+    quantization = _quantization_config()
+    quantized_file = f"onnx/model_qint8_{quantization}.onnx"
+
+    version_path = export_dir / VERSION_FILE
+    model_version = model_version or model_name
+    if (export_dir / ONNX_FILE).exists():
+        exported = version_path.read_text(encoding='utf-8') if version_path.exists() else None
+        if exported != model_version:
+            logger.info(f"{model_name} changed since its ONNX export, exporting again")
+            shutil.rmtree(export_dir, ignore_errors=True)
+
+    if not (export_dir / ONNX_FILE).exists():
+        logger.info(f"Exporting {model_name} to ONNX in {export_dir} (one time)...")
+        model = SentenceTransformer(model_name, device='cpu', backend='onnx')
+        model.save_pretrained(str(export_dir))
+        version_path.write_text(model_version, encoding='utf-8')
+
+    if quantize and not (export_dir / quantized_file).exists():
+        logger.info(f"Quantizing ONNX model (dynamic int8, {quantization})...")
+        model = SentenceTransformer(str(export_dir), device='cpu', backend='onnx',
+                                    model_kwargs={'file_name': ONNX_FILE})
+        export_dynamic_quantized_onnx_model(model, quantization, str(export_dir))
+
+    session_options = ort.SessionOptions()
+    session_options.intra_op_num_threads = num_threads or os.cpu_count() or 1
+    session_options.inter_op_num_threads = 1
+    session_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+    file_name = quantized_file if quantize else ONNX_FILE
+    model = SentenceTransformer(
+        str(export_dir),
+        device='cpu',
+        backend='onnx',
+        model_kwargs={
+            'file_name': file_name,
+            'provider': 'CPUExecutionProvider',
+            'session_options': session_options,
+        }
+    )
+    logger.info(f"[OK] ONNX model loaded: {export_dir / file_name} "
+                f"({session_options.intra_op_num_threads} threads)")
+    return model
@@ -0,0 +1,224 @@
+"""
+Query Embedding Cache Module
+
+Cache of BERT query embeddings. Customers reorder the same items, so the same
+extracted product strings are searched again and again; their embeddings are
+looked up instead of re-encoded.
+
+A query is keyed on its normalized text (Unicode NFC, whitespace collapsed) plus
+the model ID. Lookups go through an in-process LRU first, then an SQLite store
+that survives restarts and is shared by all processes using the same cache
+directory. The store is bounded: least recently used rows are evicted once it
+holds more than max_disk_entries vectors.
+"""
+
+import re
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a query for caching (and encoding)
+
+    Case is kept: the model distinguishes it, so cached vectors stay exact.
+
+    Args:
+        query: Raw search query
+
+    Returns:
+        NFC-normalized query with collapsed whitespace
+    """
+    return re.sub(r'\s+', ' ', unicodedata.normalize('NFC', query or '')).strip()
+
+
+class QueryEmbeddingCache:
+    """In-process LRU in front of an SQLite store of query embeddings"""
+
+    def __init__(self, cache_path: Optional[str], model_name: str,
+                 max_memory_entries: int = 2048, max_disk_entries: int = 50000):
+        """
+        Initialize query embedding cache
+
+        Args:
+            cache_path: SQLite file (None or "" keeps the cache in memory only)
+            model_name: Model identifier (part of every key)
+            max_memory_entries: Size of the in-process LRU
+            max_disk_entries: Maximum number of vectors kept on disk
+        """
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.model_name = model_name
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._open()
+
+    def make_key(self, query: str) -> str:
+        """
+        Build the cache key of a normalized query
+
+        Args:
+            query: Query from normalize_query()
+
+        Returns:
+            Hex digest key (model ID + query)
+        """
+        return hashlib.sha1(f"{self.model_name}\n{query}".encode('utf-8')).hexdigest()
+
+    def _open(self):
+        """Open (or create) the SQLite store; memory-only if that fails"""
+        if not self.cache_path:
+            return
+
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(self.cache_path), timeout=10, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS query_embeddings "
+                "(key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS idx_query_embeddings_last_used ON query_embeddings (last_used)"
+            )
+            self._db.commit()
+        except Exception as e:
+            logger.warning(f"[!] Could not open query embedding cache {self.cache_path}: {e}")
+            self._db = None
+
+    def _remember(self, key: str, vector: np.ndarray):
+        """Add to the in-process LRU"""
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_memory_entries:
+            self._entries.popitem(last=False)
+
+    def get_many(self, queries: List[str]) -> List[Optional[np.ndarray]]:
+        """
+        Look up cached embeddings
+
+        Args:
+            queries: Queries from normalize_query()
+
+        Returns:
+            Embedding per query, None where not cached
+        """
+        keys = [self.make_key(query) for query in queries]
+        found = [None] * len(keys)
+
+        with self._lock:
+            disk_keys = []
+            for i, key in enumerate(keys):
+                vector = self._entries.get(key)
+                if vector is not None:
+                    self._entries.move_to_end(key)
+                    found[i] = vector
+                    self.hits += 1
+                elif self._db is not None:
+                    disk_keys.append(key)
+
+            if disk_keys:
+                rows = self._read(sorted(set(disk_keys)))
+                for i, key in enumerate(keys):
+                    if found[i] is None and key in rows:
+                        found[i] = rows[key]
+                        self._remember(key, rows[key])
+                        self.disk_hits += 1
+
+            self.misses += sum(1 for vector in found if vector is None)
+
+        return found
+
+    def _read(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """Vectors stored on disk for these keys (refreshes their last_used)"""
+        rows = {}
+        try:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ','.join('?' * len(chunk))
+                cursor = self._db.execute(
+                    f"SELECT key, vector FROM query_embeddings WHERE key IN ({placeholders})", chunk
+                )
+                for key, blob in cursor:
+                    rows[key] = np.frombuffer(blob, dtype=np.float32)
+
+            if rows:
+                now = time.time()
+                self._db.executemany(
+                    "UPDATE query_embeddings SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in rows]
+                )
+                self._db.commit()
+        except Exception as e:
+            logger.warning(f"[!] Could not read query embedding cache: {e}")
+        return rows
+
+    def put_many(self, queries: List[str], vectors: np.ndarray):
+        """
+        Store embeddings (memory and disk), evicting old rows if the store is full
+
+        Args:
+            queries: Queries from normalize_query()
+            vectors: One normalized embedding per query
+        """
+        entries = {}
+        for query, vector in zip(queries, vectors):
+            entries[self.make_key(query)] = np.asarray(vector, dtype=np.float32).copy()
+
+        with self._lock:
+            for key, vector in entries.items():
+                self._remember(key, vector)
+
+            if self._db is None or not entries:
+                return
+
+            try:
+                now = time.time()
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO query_embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                    [(key, vector.tobytes(), now) for key, vector in entries.items()]
+                )
+                self._db.execute(
+                    "DELETE FROM query_embeddings WHERE key IN ("
+                    "SELECT key FROM query_embeddings ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_disk_entries,)
+                )
+                self._db.commit()
+            except Exception as e:
+                logger.warning(f"[!] Could not save query embedding cache: {e}")
+
+    def stats(self) -> Dict:
+        """Get cache statistics"""
+        disk_entries = 0
+        if self._db is not None:
+            try:
+                with self._lock:
+                    disk_entries = self._db.execute("SELECT COUNT(*) FROM query_embeddings").fetchone()[0]
+            except Exception:
+                pass
+
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            'memory_entries': len(self._entries),
+            'disk_entries': disk_entries,
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': round((self.hits + self.disk_hits) / lookups, 3) if lookups else 0.0
+        }
@@ -7,6 +7,9 @@ instead of semantic similarity. Much more accurate for product matching.
 
 import re
 import json
+import math
+import heapq
+import bisect
 import logging
 from typing import List, Dict, Optional, Tuple
 from pathlib import Path
@@ -16,6 +19,7 @@ import os
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils.product_validator import is_valid_product_code, get_code_confidence
+from retriever_module.match_result import MatchResult
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +39,17 @@ class TokenMatcher:
         """
         self.products_json = products_json
         self.products = []
+        self._code_index_upper = {}
+        self._code_index_lower = {}
+
+        # Pre-tokenized catalog (see _build_token_index)
+        self._token_profiles = {}
+        self._product_tokens = []
+        self._product_first_pos = []
+        self._product_numbers = []
+        self._variation_index = {}
+        self._numeric_values = []
+        self._numeric_ids = []
 
         # Synonym mappings for common variations
         self.synonyms = {
@@ -69,6 +84,81 @@ class TokenMatcher:
             logger.error(f"Failed to load products: {e}")
             self.products = []
 
+        self._build_code_index()
+        self._build_token_index()
+
+    def _build_code_index(self):
+        """Index product codes (upper and lower case) to the first product carrying them"""
+        self._code_index_upper = {}
+        self._code_index_lower = {}
+
+        for idx, product in enumerate(self.products):
+            product_code = product.get('default_code', '')
+            if not product_code:
+                continue
+            self._code_index_upper.setdefault(product_code.upper(), idx)
+            self._code_index_lower.setdefault(product_code.lower(), idx)
+
+    def _get_product_text(self, product: Dict) -> str:
+        """Text that is tokenized for a product: code, name and display name"""
+        product_text_parts = []
+
+        if product.get('default_code'):
+            product_text_parts.append(product['default_code'])
+
+        if product.get('name'):
+            product_text_parts.append(product['name'])
+
+        if product.get('display_name'):
+            product_text_parts.append(product['display_name'])
+
+        return ' '.join(product_text_parts)
+
+    def _build_token_index(self):
+        """
+        Tokenize every product once and index its token variations
+
+        Per product we keep the token list, the first position of each variation
+        and the numeric tokens (position, value). The inverted index maps every
+        variation to the products containing it; numeric values go in a sorted
+        array so the numeric tolerance of _tokens_match_fuzzy is a range lookup.
+        """
+        self._token_profiles = {}
+        self._product_tokens = []
+        self._product_first_pos = []
+        self._product_numbers = []
+        self._variation_index = {}
+        numeric_entries = []
+
+        for idx, product in enumerate(self.products):
+            tokens = self._tokenize(self._get_product_text(product))
+            first_pos = {}
+            numbers = []
+
+            for pos, token in enumerate(tokens):
+                variations, is_numeric, value = self._token_profile(token)
+                for variation in variations:
+                    if variation not in first_pos:
+                        first_pos[variation] = pos
+                if is_numeric:
+                    numbers.append((pos, value))
+                    if math.isfinite(value):
+                        numeric_entries.append((value, idx))
+
+            for variation in first_pos:
+                self._variation_index.setdefault(variation, []).append(idx)
+
+            self._product_tokens.append(tokens)
+            self._product_first_pos.append(first_pos)
+            self._product_numbers.append(numbers)
+
+        numeric_entries.sort()
+        self._numeric_values = [value for value, _ in numeric_entries]
+        self._numeric_ids = [idx for _, idx in numeric_entries]
+
+        logger.info(f"Token index: {len(self._variation_index)} variations, "
+                    f"{len(self._token_profiles)} distinct tokens")
+
     def _extract_dimensions(self, text: str) -> List[str]:
         """
         Extract dimension patterns from text (e.g., 457x23, 685mm, 760x23mm)
@@ -245,6 +335,32 @@ class TokenMatcher:
 
         return list(set(variations))  # Remove duplicates
 
+    def _token_profile(self, token: str) -> Tuple[frozenset, bool, Optional[float]]:
+        """
+        Variations and numeric value of a token (cached per distinct token)
+
+        Returns:
+            (variations, is_numeric, value) - value is None for non-numeric tokens
+        """
+        profile = self._token_profiles.get(token)
+        if profile is None:
+            is_numeric = self._is_numeric(token)
+            value = float(token.replace(',', '.')) if is_numeric else None
+            profile = (frozenset(self._normalize_token(token)), is_numeric, value)
+            self._token_profiles[token] = profile
+        return profile
+
+    @staticmethod
+    def _numbers_close(num1: float, num2: float) -> bool:
+        """Match if very close OR differ by factor of 10 (common error)"""
+        if abs(num1 - num2) < 0.01:
+            return True
+        if abs(num1 * 10 - num2) < 0.01:
+            return True
+        if abs(num1 - num2 * 10) < 0.01:
+            return True
+        return False
+
     def _tokens_match_fuzzy(self, token1: str, token2: str) -> bool:
         """
         Check if two tokens match using fuzzy logic
@@ -254,29 +370,16 @@ class TokenMatcher:
         - One is in the other's variations
         - Numeric values are close
         """
-        # Get all variations
-        vars1 = set(self._normalize_token(token1))
-        vars2 = set(self._normalize_token(token2))
+        vars1, is_numeric1, num1 = self._token_profile(token1)
+        vars2, is_numeric2, num2 = self._token_profile(token2)
 
         # Check for intersection
         if vars1 & vars2:
             return True
 
         # Numeric tolerance check
-        if self._is_numeric(token1) and self._is_numeric(token2):
-            try:
-                num1 = float(token1.replace(',', '.'))
-                num2 = float(token2.replace(',', '.'))
-
-                # Match if very close OR differ by factor of 10 (common error)
-                if abs(num1 - num2) < 0.01:
-                    return True
-                if abs(num1 * 10 - num2) < 0.01:
-                    return True
-                if abs(num1 - num2 * 10) < 0.01:
-                    return True
-            except:
-                pass
+        if is_numeric1 and is_numeric2:
+            return self._numbers_close(num1, num2)
 
         return False
 
@@ -323,6 +426,77 @@ class TokenMatcher:
 
         return final_score
 
+    def _numeric_candidates(self, value: float) -> List[int]:
+        """
+        Products with a numeric token within _numbers_close tolerance of value
+
+        The ranges are widened by a tiny epsilon; callers re-check with
+        _numbers_close, so this is only a superset for float rounding.
+        """
+        if not math.isfinite(value):
+            return []
+
+        eps = 1e-9
+        ranges = [
+            (value - 0.01, value + 0.01),
+            (value * 10 - 0.01, value * 10 + 0.01),
+            ((value - 0.01) / 10, (value + 0.01) / 10),
+        ]
+        candidates = []
+        for low, high in ranges:
+            start = bisect.bisect_left(self._numeric_values, low - eps)
+            end = bisect.bisect_right(self._numeric_values, high + eps)
+            candidates.extend(self._numeric_ids[start:end])
+        return candidates
+
+    def _score_product(self, query_profiles: List[Tuple[str, frozenset, bool, Optional[float]]],
+                       idx: int) -> float:
+        """
+        _calculate_token_overlap(query_tokens, product_tokens) from the precomputed
+        product positions: a query token's match is the first product token that
+        shares a variation or is numerically close, exactly as in the nested loop.
+        """
+        tokens = self._product_tokens[idx]
+        if not tokens:
+            return 0.0
+
+        first_pos = self._product_first_pos[idx]
+        numbers = self._product_numbers[idx]
+
+        matched = 0
+        dimension_bonus = 0.0
+
+        for t1, vars1, is_numeric1, num1 in query_profiles:
+            pos = None
+            for variation in vars1:
+                variation_pos = first_pos.get(variation)
+                if variation_pos is not None and (pos is None or variation_pos < pos):
+                    pos = variation_pos
+
+            if is_numeric1:
+                for number_pos, num2 in numbers:
+                    if pos is not None and number_pos >= pos:
+                        break
+                    if self._numbers_close(num1, num2):
+                        pos = number_pos
+                        break
+
+            if pos is None:
+                continue
+
+            matched += 1
+            t2 = tokens[pos]
+
+            # BONUS: Check if this is a dimension/numeric match
+            if is_numeric1 or self._token_profile(t2)[1]:
+                if len(t1) >= 3 or len(t2) >= 3:
+                    dimension_bonus += 0.3  # +30% per dimension match
+            elif 'x' in t1 or 'x' in t2:
+                dimension_bonus += 0.4  # +40% for full dimension pattern
+
+        base_score = matched / len(query_profiles)
+        return base_score + dimension_bonus
+
     def search(
         self,
         query: str,
@@ -357,47 +531,45 @@ class TokenMatcher:
 
         logger.debug(f"Query tokens: {query_tokens}")
 
-        # Score all products
+        # Only products sharing a variation (or a close number) with the query can
+        # score above 0; with min_score <= 0 every product qualifies
+        query_profiles = [(token,) + self._token_profile(token) for token in query_tokens]
+        if min_score > 0:
+            candidate_ids = set()
+            for _, variations, is_numeric, value in query_profiles:
+                for variation in variations:
+                    candidate_ids.update(self._variation_index.get(variation, ()))
+                if is_numeric:
+                    candidate_ids.update(self._numeric_candidates(value))
+            candidate_ids = sorted(candidate_ids)
+        else:
+            candidate_ids = range(len(self.products))
+
+        # Score candidates (keep references only; copies are made for the top K)
         scored_products = []
 
-        for product in self.products:
-            # Build product text from code and name
-            product_text_parts = []
-
-            if product.get('default_code'):
-                product_text_parts.append(product['default_code'])
-
-            if product.get('name'):
-                product_text_parts.append(product['name'])
-
-            if product.get('display_name'):
-                product_text_parts.append(product['display_name'])
-
-            product_text = ' '.join(product_text_parts)
-            product_tokens = self._tokenize(product_text)
-
-            # Calculate overlap score
-            score = self._calculate_token_overlap(query_tokens, product_tokens)
+        for idx in candidate_ids:
+            score = self._score_product(query_profiles, idx)
 
             if score >= min_score:
-                product_copy = product.copy()
-                product_copy['similarity_score'] = score
-                product_copy['match_method'] = 'token_matching'
-
-                # Add confidence score based on match quality
-                match_type = "TOKEN" if score >= 0.75 else "FUZZY"
-                product_copy['confidence'] = get_code_confidence(
-                    product.get('default_code', ''),
-                    match_type
-                )
-
-                scored_products.append((score, product_copy))
-
-        # Sort by score (highest first)
-        scored_products.sort(reverse=True, key=lambda x: x[0])
-
-        # Return top K
-        results = [p for _, p in scored_products[:top_k]]
+                scored_products.append(MatchResult(self.products[idx], score, idx))
+
+        # Top K by score (highest first, ties in catalog order - same as a stable sort)
+        if top_k >= 0:
+            top_matches = heapq.nlargest(top_k, scored_products, key=lambda match: match.score)
+        else:
+            top_matches = sorted(scored_products, key=lambda match: match.score, reverse=True)[:top_k]
+
+        results = []
+        for match in top_matches:
+            # Add confidence score based on match quality
+            match_type = "TOKEN" if match.score >= 0.75 else "FUZZY"
+            match.fields = {
+                'similarity_score': match.score,
+                'match_method': 'token_matching',
+                'confidence': get_code_confidence(match.product.get('default_code', ''), match_type)
+            }
+            results.append(match.to_dict())
 
         if results:
             logger.debug(f"Top match: {results[0].get('default_code')} ({results[0]['similarity_score']:.2%})")
@@ -420,18 +592,16 @@ class TokenMatcher:
         code_upper = code.upper().strip()
         code_lower = code.lower().strip()
 
-        for product in self.products:
-            product_code = product.get('default_code', '')
-
-            if not product_code:
-                continue
-
-            # Try exact match (case insensitive)
-            if product_code.upper() == code_upper or product_code.lower() == code_lower:
-                result = product.copy()
-                result['similarity_score'] = 1.0
-                result['match_method'] = 'exact_code'
-                result['confidence'] = get_code_confidence(code, "EXACT")
-                return result
+        # Try exact match (case insensitive) - first product in catalog order wins
+        candidates = [
+            idx for idx in (self._code_index_upper.get(code_upper), self._code_index_lower.get(code_lower))
+            if idx is not None
+        ]
+        if not candidates:
+            return None
 
-        return None
+        result = self.products[min(candidates)].copy()
+        result['similarity_score'] = 1.0
+        result['match_method'] = 'exact_code'
+        result['confidence'] = get_code_confidence(code, "EXACT")
+        return result
@@ -0,0 +1,446 @@
+"""
+Vector Index Module
+
+Nearest-neighbour backends over the BERT product embedding matrix. Every
+backend answers the same question as the brute-force dot product in
+BertSemanticMatcher: the top-k products by cosine similarity (embeddings are
+L2 normalized, so cosine = dot product).
+
+Backends:
+- "exact" (default): full matrix product + argpartition. Exact results.
+- "ivf": inverted-file index in pure NumPy. Spherical k-means splits the
+  catalog into nlist cells; a query only scores the products in its nprobe
+  closest cells. Approximate, scores of returned products are exact.
+- "hnsw": faiss IndexHNSWFlat (inner product). Needs the optional faiss-cpu
+  package; falls back to "ivf" if it is not installed.
+
+The exact backend can scan a compact copy of the matrix instead (dtype
+"int8" with a per-vector scale, or "float16"): the coarse top-k runs on the
+quantized matrix and the best candidates are re-scored against the float32
+embeddings, so returned scores (and the min_score threshold) are unchanged.
+
+Approximate indexes are persisted next to the embeddings cache and rebuilt
+when the embeddings change. tools/analysis/benchmark_vector_index.py reports
+recall@20 against the exact backend.
+"""
+
+import logging
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+logger = logging.getLogger(__name__)
+
+# Rows per block when assigning vectors to IVF centroids (bounds temp memory)
+ASSIGN_BLOCK_SIZE = 8192
+
+# Rows per block when scanning a quantized matrix (upcast buffer stays in cache)
+SCAN_BLOCK_SIZE = 256
+
+QUANTIZED_DTYPES = ('float16', 'int8')
+
+
+class ExactIndex:
+    """Brute-force top-k over the full embedding matrix (reference backend)"""
+
+    name = 'exact'
+
+    def __init__(self, embeddings: np.ndarray):
+        """
+        Args:
+            embeddings: (num_products, dim) L2-normalized product embeddings
+        """
+        self.embeddings = embeddings
+
+    def search(self, query_embeddings: np.ndarray, top_k: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Top-k products for each query
+
+        Args:
+            query_embeddings: (num_queries, dim) L2-normalized query embeddings
+            top_k: Number of neighbours per query
+
+        Returns:
+            One (indices, scores) pair per query, best first
+        """
+        similarity_matrix = np.dot(query_embeddings, self.embeddings.T)
+        return [_top_k(np.arange(len(similarities)), similarities, top_k)
+                for similarities in similarity_matrix]
+
+    def save(self, path: Path):
+        """Nothing to persist: the embeddings cache is the index"""
+
+    def load(self, path: Path) -> bool:
+        """Nothing to load"""
+        return True
+
+
+class QuantizedIndex:
+    """
+    Brute-force top-k over a quantized copy of the matrix, re-scored in float32
+
+    int8 stores each vector as round(v / scale) with scale = max|v| / 127 (4x
+    smaller), float16 halves the matrix. The scan upcasts small blocks to
+    float32 for BLAS; int8 is the faster one (NumPy converts float16 in software).
+    The best rescore_factor * top_k candidates are re-scored exactly.
+    """
+
+    def __init__(self, embeddings: np.ndarray, dtype: str = 'int8', rescore_factor: int = 4):
+        """
+        Args:
+            embeddings: (num_products, dim) L2-normalized float32 embeddings (may be
+                a memory map; only the re-scored rows are read after build)
+            dtype: "int8" or "float16"
+            rescore_factor: Candidates re-scored in float32 per requested result
+        """
+        self.embeddings = embeddings
+        self.dtype = dtype
+        self.name = f'exact-{dtype}'
+        self.rescore_factor = rescore_factor
+        self.codes = None
+        self.scales = None
+
+    def build(self):
+        """Quantize the matrix block by block"""
+        num_products, dim = self.embeddings.shape
+        self.codes = np.empty((num_products, dim), dtype=np.int8 if self.dtype == 'int8' else np.float16)
+        self.scales = np.ones(num_products, dtype=np.float32)
+
+        for start in range(0, num_products, ASSIGN_BLOCK_SIZE):
+            block = np.asarray(self.embeddings[start:start + ASSIGN_BLOCK_SIZE], dtype=np.float32)
+            end = start + len(block)
+            if self.dtype == 'int8':
+                scales = np.maximum(np.abs(block).max(axis=1), 1e-12) / 127.0
+                self.codes[start:end] = np.round(block / scales[:, np.newaxis])
+                self.scales[start:end] = scales
+            else:
+                self.codes[start:end] = block
+
+    def _coarse_scores(self, query_embeddings: np.ndarray) -> np.ndarray:
+        """(num_queries, num_products) approximate similarities from the quantized matrix"""
+        num_products, dim = self.codes.shape
+        queries_t = np.ascontiguousarray(query_embeddings.T, dtype=np.float32)
+        scores = np.empty((num_products, len(query_embeddings)), dtype=np.float32)
+        buffer = np.empty((SCAN_BLOCK_SIZE, dim), dtype=np.float32)
+
+        for start in range(0, num_products, SCAN_BLOCK_SIZE):
+            block = self.codes[start:start + SCAN_BLOCK_SIZE]
+            upcast = buffer[:len(block)]
+            upcast[...] = block
+            np.dot(upcast, queries_t, out=scores[start:start + len(block)])
+
+        if self.dtype == 'int8':
+            scores *= self.scales[:, np.newaxis]
+        return scores.T
+
+    def search(self, query_embeddings: np.ndarray, top_k: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Top-k products for each query (coarse quantized scan + float32 re-scoring)
+
+        Returns:
+            One (indices, scores) pair per query, best first (scores are exact)
+        """
+        num_products = len(self.codes)
+        pool = min(num_products, max(top_k * self.rescore_factor, top_k + 16))
+
+        results = []
+        for query_embedding, coarse in zip(query_embeddings, self._coarse_scores(query_embeddings)):
+            candidates, _ = _top_k(np.arange(num_products), coarse, pool)
+            candidates = np.sort(candidates)
+            scores = np.dot(np.asarray(self.embeddings[candidates], dtype=np.float32), query_embedding)
+            results.append(_top_k(candidates, scores, top_k))
+        return results
+
+    @staticmethod
+    def _scales_path(path: Path) -> Path:
+        return path.with_suffix('.scale.npy')
+
+    def save(self, path: Path):
+        """Persist the quantized matrix (.npy, memory-mappable) and the int8 scales"""
+        np.save(path, self.codes)
+        if self.dtype == 'int8':
+            np.save(self._scales_path(path), self.scales)
+
+    def load(self, path: Path) -> bool:
+        """
+        Memory-map a persisted quantized matrix if it matches the embeddings
+
+        Returns:
+            True if loaded
+        """
+        codes = np.load(path, mmap_mode='r')
+        if codes.shape != self.embeddings.shape or codes.dtype != np.dtype(self.dtype):
+            return False
+        if self.dtype == 'int8':
+            self.scales = np.load(self._scales_path(path))
+        else:
+            self.scales = np.ones(len(codes), dtype=np.float32)
+        self.codes = codes
+        return True
+
+
+class IVFIndex:
+    """
+    Inverted-file index (pure NumPy)
+
+    Products are grouped by their closest k-means centroid. A query scores the
+    centroids, then only the products of the nprobe best cells.
+    """
+
+    name = 'ivf'
+
+    def __init__(self, embeddings: np.ndarray, nlist: Optional[int] = None, nprobe: int = 32,
+                 iterations: int = 10, seed: int = 42):
+        """
+        Args:
+            embeddings: (num_products, dim) L2-normalized product embeddings
+            nlist: Number of cells (default 4 * sqrt(num_products))
+            nprobe: Cells scanned per query
+            iterations: k-means iterations when building
+            seed: Random seed for the k-means initialization
+        """
+        self.embeddings = embeddings
+        num_products = len(embeddings)
+        self.nlist = max(1, min(nlist or int(4 * np.sqrt(num_products)), num_products))
+        self.nprobe = nprobe
+        self.iterations = iterations
+        self.seed = seed
+
+        self.centroids = None
+        self.list_offsets = None
+        self.list_ids = None
+
+    def build(self):
+        """Train the centroids (spherical k-means) and fill the inverted lists"""
+        rng = np.random.default_rng(self.seed)
+        num_products = len(self.embeddings)
+
+        # Train on a sample, like faiss (at most 256 points per centroid)
+        sample_size = min(num_products, self.nlist * 256)
+        sample = self.embeddings[rng.choice(num_products, sample_size, replace=False)]
+        centroids = sample[rng.choice(sample_size, self.nlist, replace=False)].astype(np.float32)
+
+        for _ in range(self.iterations):
+            assignment = self._assign(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            counts = np.bincount(assignment, minlength=self.nlist)
+
+            # Re-seed empty cells with random sample points
+            empty = np.flatnonzero(counts == 0)
+            if len(empty):
+                sums[empty] = sample[rng.choice(sample_size, len(empty), replace=False)]
+
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = (sums / np.maximum(norms, 1e-12)).astype(np.float32)
+
+        assignment = self._assign(self.embeddings, centroids)
+        order = np.argsort(assignment, kind='stable')
+        counts = np.bincount(assignment, minlength=self.nlist)
+
+        self.centroids = centroids
+        self.list_ids = order.astype(np.int64)
+        self.list_offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+    @staticmethod
+    def _assign(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        """Closest centroid (max dot product) for every vector, in blocks"""
+        assignment = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), ASSIGN_BLOCK_SIZE):
+            block = vectors[start:start + ASSIGN_BLOCK_SIZE]
+            assignment[start:start + len(block)] = np.argmax(np.dot(block, centroids.T), axis=1)
+        return assignment
+
+    def search(self, query_embeddings: np.ndarray, top_k: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Approximate top-k products for each query
+
+        Args:
+            query_embeddings: (num_queries, dim) L2-normalized query embeddings
+            top_k: Number of neighbours per query
+
+        Returns:
+            One (indices, scores) pair per query, best first (scores are exact)
+        """
+        nprobe = min(self.nprobe, self.nlist)
+        centroid_scores = np.dot(query_embeddings, self.centroids.T)
+        probes = np.argpartition(-centroid_scores, nprobe - 1, axis=1)[:, :nprobe]
+
+        results = []
+        for query_embedding, cells in zip(query_embeddings, probes):
+            candidates = np.concatenate([
+                self.list_ids[self.list_offsets[cell]:self.list_offsets[cell + 1]] for cell in cells
+            ])
+            scores = np.dot(self.embeddings[candidates], query_embedding)
+            results.append(_top_k(candidates, scores, top_k))
+        return results
+
+    def save(self, path: Path):
+        """Persist centroids and inverted lists (.npz)"""
+        np.savez(path, centroids=self.centroids, list_offsets=self.list_offsets, list_ids=self.list_ids,
+                 num_products=len(self.embeddings))
+
+    def load(self, path: Path) -> bool:
+        """
+        Load a persisted index if it matches the current embeddings
+
+        Returns:
+            True if loaded
+        """
+        with np.load(path) as data:
+            if (int(data['num_products']) != len(self.embeddings)
+                    or data['centroids'].shape != (self.nlist, self.embeddings.shape[1])):
+                return False
+            self.centroids = data['centroids']
+            self.list_offsets = data['list_offsets']
+            self.list_ids = data['list_ids']
+        return True
+
+
+class HNSWIndex:
+    """HNSW graph index through faiss (inner product metric)"""
+
+    name = 'hnsw'
+
+    def __init__(self, embeddings: np.ndarray, m: int = 32, ef_construction: int = 200, ef_search: int = 128):
+        """
+        Args:
+            embeddings: (num_products, dim) L2-normalized product embeddings
+            m: Graph neighbours per node
+            ef_construction: Build-time beam width
+            ef_search: Query-time beam width (higher = better recall, slower)
+        """
+        self.embeddings = embeddings
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.index = None
+
+    def build(self):
+        """Insert all embeddings into the HNSW graph"""
+        self.index = faiss.IndexHNSWFlat(self.embeddings.shape[1], self.m, faiss.METRIC_INNER_PRODUCT)
+        self.index.hnsw.efConstruction = self.ef_construction
+        self.index.add(np.ascontiguousarray(self.embeddings, dtype=np.float32))
+        self.index.hnsw.efSearch = self.ef_search
+
+    def search(self, query_embeddings: np.ndarray, top_k: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Approximate top-k products for each query
+
+        Returns:
+            One (indices, scores) pair per query, best first
+        """
+        self.index.hnsw.efSearch = max(self.ef_search, top_k)
+        scores, indices = self.index.search(np.ascontiguousarray(query_embeddings, dtype=np.float32), top_k)
+        results = []
+        for row_scores, row_indices in zip(scores, indices):
+            found = row_indices >= 0
+            results.append((row_indices[found], row_scores[found]))
+        return results
+
+    def save(self, path: Path):
+        """Persist the graph (faiss format)"""
+        faiss.write_index(self.index, str(path))
+
+    def load(self, path: Path) -> bool:
+        """
+        Load a persisted graph if it matches the current embeddings
+
+        Returns:
+            True if loaded
+        """
+        index = faiss.read_index(str(path))
+        if index.ntotal != len(self.embeddings) or index.d != self.embeddings.shape[1]:
+            return False
+        self.index = index
+        self.index.hnsw.efSearch = self.ef_search
+        return True
+
+
+INDEX_FILE_SUFFIXES = {
+    'ivf': '.ivf.npz',
+    'hnsw': '.hnsw.faiss',
+    'exact-int8': '.int8.npy',
+    'exact-float16': '.float16.npy',
+}
+
+
+def _top_k(indices: np.ndarray, scores: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Best top_k (indices, scores) by score, sorted descending (argpartition + sort of k)"""
+    if top_k <= 0:
+        return indices[:0], scores[:0]
+    if top_k < len(scores):
+        partition = np.sort(np.argpartition(-scores, top_k - 1)[:top_k])
+        indices, scores = indices[partition], scores[partition]
+    order = np.argsort(-scores, kind='stable')
+    return indices[order], scores[order]
+
+
+def create_vector_index(embeddings: np.ndarray, backend: Optional[str] = None,
+                        cache_path: Optional[Path] = None, dtype: Optional[str] = None, **options):
+    """
+    Create (or load from cache) a vector index over the embeddings
+
+    Args:
+        embeddings: (num_products, dim) L2-normalized product embeddings
+        backend: "exact" (default), "ivf" or "hnsw" (case insensitive)
+        cache_path: Embeddings cache file; approximate indexes are stored next
+            to it (same name + backend suffix) and reused while it is unchanged
+        dtype: Scan precision of the exact backend: "float32" (default),
+            "float16" or "int8" (quantized scan, float32 re-scoring)
+        **options: Backend parameters (nlist, nprobe, m, ef_search, ...)
+
+    Returns:
+        Index with search(query_embeddings, top_k) -> [(indices, scores), ...]
+    """
+    backend = (backend or 'exact').strip().lower()
+    dtype = (dtype or 'float32').strip().lower()
+    if backend == 'hnsw' and faiss is None:
+        logger.warning("faiss-cpu not installed, using the NumPy IVF index instead of HNSW")
+        backend = 'ivf'
+
+    if dtype != 'float32' and (backend != 'exact' or dtype not in QUANTIZED_DTYPES):
+        logger.warning(f"Embedding dtype '{dtype}' is only supported (as int8/float16) by the exact "
+                       f"backend, scanning float32")
+        dtype = 'float32'
+
+    if backend == 'ivf':
+        index = IVFIndex(embeddings, **options)
+    elif backend == 'hnsw':
+        index = HNSWIndex(embeddings, **options)
+    elif backend == 'exact' and dtype in QUANTIZED_DTYPES:
+        index = QuantizedIndex(embeddings, dtype=dtype, **options)
+    else:
+        if backend != 'exact':
+            logger.warning(f"Unknown vector index backend '{backend}', using exact search")
+        return ExactIndex(embeddings)
+
+    index_path = None
+    if cache_path is not None:
+        index_path = Path(cache_path).with_suffix(INDEX_FILE_SUFFIXES[index.name])
+        if index_path.exists():
+            try:
+                if index.load(index_path):
+                    logger.info(f"[OK] Loaded {index.name} vector index from {index_path}")
+                    return index
+                logger.warning(f"Vector index {index_path} does not match the embeddings, rebuilding")
+            except Exception as e:
+                logger.warning(f"Failed to load vector index: {e}, rebuilding")
+
+    logger.info(f"Building {index.name} vector index over {len(embeddings)} embeddings...")
+    index.build()
+
+    if index_path is not None:
+        try:
+            index.save(index_path)
+            logger.info(f"[OK] Saved vector index: {index_path}")
+        except Exception as e:
+            logger.warning(f"Failed to save vector index: {e}")
+
+    return index
@@ -9,9 +9,14 @@ import logging
 import json
 import re
 import os
-from typing import List, Dict, Optional, Any, Tuple
+from typing import List, Dict, Optional, Any, Tuple, Callable
 from pathlib import Path
-from difflib import SequenceMatcher
+
+from retriever_module.match_result import MatchResult
+from retriever_module.verdict_cache import AIVerdictCache, NO_MATCH
+from retriever_module.catalog_index import (
+    FuzzyCodeIndex, NameSimilarityIndex, SubstringIndex, get_ratio_function, sequence_matcher_ratio
+)
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +24,9 @@ logger = logging.getLogger(__name__)
 class VectorStore:
     """Class to handle JSON-based customer and product search with robust multi-level matching"""
 
+    # Scalar attributes produced by extract_attributes (stored as attribute table columns)
+    ATTRIBUTE_KEYS = ('width', 'thickness', 'dimensions', 'color', 'material', 'machine', 'brand')
+
     def __init__(self, customers_json: str = "odoo_database/odoo_customers.json",
                  products_json: str = "odoo_database/odoo_products.json"):
         """
@@ -41,6 +49,18 @@ class VectorStore:
         self.auto_approve_threshold = float(os.getenv('PRODUCT_AUTO_APPROVE_THRESHOLD', '0.95'))
         self.review_threshold = float(os.getenv('PRODUCT_REVIEW_THRESHOLD', '0.70'))
 
+        # Ratio used for name similarity (Level 4, customer search): difflib or levenshtein
+        self._name_ratio = get_ratio_function(os.getenv('NAME_SIMILARITY_SCORER', 'difflib'))
+
+        # Level 5: one long-lived AI matcher (created on first use) and its verdict cache
+        self._ai_matcher = None
+        self._ai_matcher_unavailable = False
+        self._ai_verdict_cache = AIVerdictCache(
+            cache_path=os.getenv('AI_VERDICT_CACHE_PATH', '.ai_cache/ai_verdicts.json'),
+            ttl_seconds=float(os.getenv('AI_VERDICT_CACHE_TTL_HOURS', '168')) * 3600,
+            max_entries=int(os.getenv('AI_VERDICT_CACHE_MAX_ENTRIES', '5000'))
+        )
+
         self._load_json_files()
 
     def _load_json_files(self):
@@ -69,6 +89,307 @@ class VectorStore:
             self.customers_data = []
             self.products_data = []
 
+        self._build_indexes()
+
+    def _get_ai_matcher(self):
+        """
+        Get the shared AIProductMatcher, creating it on first use
+
+        A failed import/initialization is remembered so Level 5 does not retry it
+        on every unmatched product.
+
+        Returns:
+            AIProductMatcher instance or None if unavailable
+        """
+        if self._ai_matcher is None and not self._ai_matcher_unavailable:
+            try:
+                from ai_product_matcher import AIProductMatcher
+                self._ai_matcher = AIProductMatcher()
+            except Exception as e:
+                logger.debug(f"   [L5] AI matcher unavailable: {e}")
+                self._ai_matcher_unavailable = True
+        return self._ai_matcher
+
+    def _ai_match(self, ai_matcher, product_name: str, product_code: str,
+                  candidates: List[Dict]) -> Optional[Dict]:
+        """
+        Ask the AI matcher for a verdict, using the verdict cache first
+
+        Args:
+            ai_matcher: AIProductMatcher instance
+            product_name: Product name from the email
+            product_code: Product code from the email
+            candidates: Candidate products shown to the model
+
+        Returns:
+            AI match dict (product, confidence, reasoning, requires_review) or None
+        """
+        cache_key = AIVerdictCache.make_key(product_name, product_code, candidates)
+        cached = self._ai_verdict_cache.get(cache_key)
+        if cached is not None:
+            if cached['product_id'] == NO_MATCH:
+                logger.info(f"   [L5] Cached AI verdict: no match")
+                return None
+            for candidate in candidates:
+                if candidate.get('id') == cached['product_id']:
+                    logger.info(f"   [L5] Cached AI verdict: {candidate.get('default_code')}")
+                    return {
+                        'product': candidate,
+                        'confidence': cached['confidence'],
+                        'method': 'ai_semantic_match',
+                        'reasoning': cached['reasoning'],
+                        'requires_review': cached['requires_review']
+                    }
+
+        # Prepare product for AI matching
+        search_product = {
+            'name': product_name or "",
+            'code': product_code or "",
+            'specifications': ""  # Could extract from product_name if needed
+        }
+
+        # Let AI decide the best match
+        ai_result = ai_matcher.match_product(search_product, candidates)
+
+        # Only cache real verdicts (match or NO_MATCH), never API/parse failures
+        if getattr(ai_matcher, 'last_response_valid', False):
+            if ai_result:
+                self._ai_verdict_cache.put(cache_key, ai_result['product'].get('id'),
+                                           ai_result['confidence'], ai_result.get('reasoning', ''),
+                                           ai_result.get('requires_review', True))
+            else:
+                self._ai_verdict_cache.put(cache_key, NO_MATCH)
+
+        return ai_result
+
+    def reload(self):
+        """Reload customers and products from JSON files and rebuild all lookup indexes"""
+        logger.info("Reloading JSON databases...")
+        self._load_json_files()
+
+    def _build_indexes(self):
+        """Build in-memory lookup indexes over the loaded catalog (called on every load)"""
+        self._build_component_index()
+        self._build_code_index()
+        self._build_attribute_table()
+        self._build_name_indexes()
+        self._build_relaxed_indexes()
+
+    def _build_code_index(self):
+        """
+        Index product codes for O(1) exact and variant lookups
+
+        - _code_index: normalized code -> product indices (Level 1 exact match)
+        - _code_prefix_index: every prefix (3+ chars) of a normalized code -> product
+          indices (Level 1.5 base code variants, e.g. SDS025 -> SDS025A)
+        - _three_m_family_index: 3M tape family "3M904-12" -> product indices
+          (Level 1.5 3M codes like 3M904-12-44, matched before normalization)
+        - _fuzzy_code_index: bigram index for Level 2 fuzzy code matching
+
+        All lists keep catalog order so results are identical to a linear scan.
+        """
+        self._code_index = {}
+        self._code_prefix_index = {}
+        self._three_m_family_index = {}
+        normalized_codes = []
+
+        for idx, product in enumerate(self.products_data):
+            raw_code = product.get('default_code', '')
+
+            if isinstance(raw_code, str):
+                family_match = re.match(r'^(3M\d{3}-\d{2})', raw_code.upper())
+                if family_match:
+                    self._three_m_family_index.setdefault(family_match.group(1), []).append(idx)
+
+            db_code = self.normalize_code(raw_code)
+            normalized_codes.append(db_code)
+            if not db_code:
+                continue
+
+            self._code_index.setdefault(db_code, []).append(idx)
+            for length in range(3, len(db_code) + 1):
+                self._code_prefix_index.setdefault(db_code[:length], []).append(idx)
+
+        # Level 2 fuzzy code candidates (only codes that can reach the fuzzy threshold)
+        self._fuzzy_code_index = FuzzyCodeIndex(normalized_codes, self._calculate_similarity_safe)
+
+        logger.debug(f"Code index: {len(self._code_index)} distinct codes")
+
+    def _indices_with_code_prefix(self, prefixes: List[str]) -> List[int]:
+        """
+        Get indices of products whose normalized code starts with any of the given prefixes
+
+        Args:
+            prefixes: Normalized code prefixes (at least 3 characters)
+
+        Returns:
+            Product indices in catalog order (no duplicates)
+        """
+        indices = set()
+        for prefix in prefixes:
+            indices.update(self._code_prefix_index.get(prefix, []))
+        return sorted(indices)
+
+    def _build_attribute_table(self):
+        """
+        Extract product attributes once into a column-oriented table
+
+        - _attribute_columns: attribute key -> list of values per product (None if absent)
+        - _attribute_types: list of type keyword tuples per product
+        - _attribute_index: (key, value) -> product indices (catalog order)
+        - _type_index: type keyword -> product indices (catalog order)
+
+        Uses the same "name display_name" text as the per-query extraction did.
+        """
+        self._attribute_columns = {key: [] for key in self.ATTRIBUTE_KEYS}
+        self._attribute_types = []
+        self._attribute_index = {}
+        self._type_index = {}
+
+        for idx, product in enumerate(self.products_data):
+            product_text = f"{product.get('name', '')} {product.get('display_name', '')}"
+            attrs = self.extract_attributes(product_text)
+
+            for key in self.ATTRIBUTE_KEYS:
+                value = attrs.get(key)
+                self._attribute_columns[key].append(value)
+                if value is not None:
+                    self._attribute_index.setdefault((key, value), []).append(idx)
+
+            types = tuple(attrs.get('types', []))
+            self._attribute_types.append(types)
+            for type_keyword in types:
+                self._type_index.setdefault(type_keyword, []).append(idx)
+
+    def _build_name_indexes(self):
+        """
+        Build name similarity indexes (candidate pruning for SequenceMatcher scans)
+
+        - _product_name_index: product name (or display_name) for Level 4
+        - _customer_company_index: customer name (or commercial_company_name), Strategy 1
+        - _customer_name_index: customer name, Strategy 2
+        """
+        self._product_name_index = NameSimilarityIndex(
+            [product.get('name', '') or product.get('display_name', '') for product in self.products_data],
+            self._calculate_name_similarity
+        )
+        self._customer_company_index = NameSimilarityIndex(
+            [customer.get('name', '') or customer.get('commercial_company_name', '') for customer in self.customers_data],
+            self._calculate_name_similarity
+        )
+        self._customer_name_index = NameSimilarityIndex(
+            [customer.get('name', '') for customer in self.customers_data],
+            self._calculate_name_similarity
+        )
+
+    def _build_relaxed_indexes(self):
+        """
+        Build substring indexes for relaxed candidate gathering (AI matching, Level 5)
+
+        Texts are normalized exactly like AIProductMatcher.get_relaxed_candidates
+        compares them:
+        - 'brand': "name code" uppercased, without spaces and '&'
+        - 'text': "name code" uppercased (dimension search)
+        - 'code': default_code as string (numeric code parts)
+        - 'name': name uppercased (keyword search)
+        """
+        brand_texts, full_texts, code_texts, name_texts = [], [], [], []
+        for product in self.products_data:
+            product_text = f"{product.get('name', '')} {product.get('default_code', '')}".upper()
+            full_texts.append(product_text)
+            brand_texts.append(product_text.replace(' ', '').replace('&', ''))
+            code_texts.append(str(product.get('default_code', '')))
+            name_texts.append(f"{product.get('name', '')}".upper())
+
+        self._relaxed_indexes = {
+            'brand': SubstringIndex(brand_texts),
+            'text': SubstringIndex(full_texts),
+            'code': SubstringIndex(code_texts),
+            'name': SubstringIndex(name_texts),
+        }
+
+    def find_products_containing(self, field: str, pattern: str) -> List[int]:
+        """
+        Get indices of products whose normalized field text contains pattern
+
+        Args:
+            field: 'brand', 'text', 'code' or 'name' (see _build_relaxed_indexes)
+            pattern: Substring, normalized like the field text
+
+        Returns:
+            Product indices in catalog order
+        """
+        return self._relaxed_indexes[field].search(pattern)
+
+    def _product_attributes(self, idx: int) -> Dict[str, Any]:
+        """
+        Get the pre-extracted attributes of a product (same shape as extract_attributes)
+
+        Args:
+            idx: Product index in products_data
+
+        Returns:
+            Dictionary of attributes
+        """
+        attrs = {}
+        for key in self.ATTRIBUTE_KEYS:
+            value = self._attribute_columns[key][idx]
+            if value is not None:
+                attrs[key] = value
+        attrs['types'] = list(self._attribute_types[idx])
+        return attrs
+
+    def _attribute_candidate_indices(self, search_attrs: Dict[str, Any]) -> List[int]:
+        """
+        Get products that share at least one attribute value or type with the search
+
+        Any product scoring above 0 in _calculate_attribute_similarity must share an
+        exact attribute value or a type keyword, so this is an exact pre-filter for
+        positive thresholds.
+
+        Args:
+            search_attrs: Attributes extracted from the search text
+
+        Returns:
+            Product indices in catalog order
+        """
+        indices = set()
+        for key in self.ATTRIBUTE_KEYS:
+            if key == 'dimensions':
+                continue  # Not compared by _calculate_attribute_similarity
+            value = search_attrs.get(key)
+            if value is not None:
+                indices.update(self._attribute_index.get((key, value), []))
+        for type_keyword in search_attrs.get('types', []):
+            indices.update(self._type_index.get(type_keyword, []))
+        return sorted(indices)
+
+    def _build_component_index(self):
+        """
+        Precompute name components for every product and index them by model
+
+        _match_by_full_name needs a model match to reach its 80% threshold
+        (brand 30 + dimension 25 + type 5 = 60 without it), so a lookup only
+        has to score products whose model is compatible with the search model.
+        """
+        self._product_components = []
+        self._components_by_model = {}
+
+        for idx, product in enumerate(self.products_data):
+            db_name = product.get('name', '')
+            if not db_name:
+                self._product_components.append(None)
+                continue
+
+            components = self._extract_components(db_name)
+            self._product_components.append(components)
+
+            if components['model']:
+                model_key = self._normalize_model(components['model'])
+                self._components_by_model.setdefault(model_key, []).append(idx)
+
+        logger.debug(f"Component index: {len(self._components_by_model)} models over {len(self.products_data)} products")
+
     def is_supplier_code(self, code: str) -> bool:
         """
         Check if a code matches supplier code patterns (vs customer internal codes)
@@ -351,13 +672,15 @@ class VectorStore:
 
         return matching_attributes / total_attributes
 
-    def _calculate_similarity_safe(self, str1: str, str2: str) -> float:
+    def _calculate_similarity_safe(self, str1: str, str2: str,
+                                   ratio: Optional[Callable[[str, str], float]] = None) -> float:
         """
         Calculate similarity score between two strings (SAFE - no dangerous substring logic)
 
         Args:
             str1: First string
             str2: Second string
+            ratio: String ratio function (default: difflib SequenceMatcher ratio)
 
         Returns:
             Similarity score (0.0 to 1.0)
@@ -365,6 +688,9 @@ class VectorStore:
         if not str1 or not str2:
             return 0.0
 
+        if ratio is None:
+            ratio = sequence_matcher_ratio
+
         # Normalize both strings
         s1 = str1.lower().strip()
         s2 = str2.lower().strip()
@@ -377,10 +703,18 @@ class VectorStore:
         len_diff = abs(len(s1) - len(s2)) / max(len(s1), len(s2))
         if len_diff > 0.5:
             # Lengths differ by more than 50% - unlikely to be same product
-            return SequenceMatcher(None, s1, s2).ratio() * 0.7
+            return ratio(s1, s2) * 0.7
 
         # Use SequenceMatcher for fuzzy matching
-        return SequenceMatcher(None, s1, s2).ratio()
+        return ratio(s1, s2)
+
+    def _calculate_name_similarity(self, str1: str, str2: str) -> float:
+        """
+        Name similarity with the configured scorer (NAME_SIMILARITY_SCORER)
+
+        Same rules as _calculate_similarity_safe; only the ratio function differs.
+        """
+        return self._calculate_similarity_safe(str1, str2, self._name_ratio)
 
     def _extract_components(self, product_name: str) -> Dict:
         """
@@ -452,6 +786,73 @@ class VectorStore:
 
         return components
 
+    def _normalize_model(self, model: str) -> str:
+        """Normalize a model component for comparison (drop spaces and dashes)"""
+        return model.replace(' ', '').replace('-', '')
+
+    def _score_components(self, search_components: Dict, db_components: Dict) -> Tuple[float, List[str]]:
+        """
+        Score a catalog product's components against the search components
+
+        Args:
+            search_components: Components extracted from the search string
+            db_components: Precomputed components of the catalog product
+
+        Returns:
+            Tuple of (score 0.0-1.0, list of match details for logging)
+        """
+        score = 0.0
+        max_score = 0.0
+        details = []
+
+        # Brand matching (30 points)
+        max_score += 30
+        if search_components['brand'] and db_components['brand']:
+            if search_components['brand'] == db_components['brand']:
+                score += 30
+                details.append(f"Brand[OK]")
+            else:
+                details.append(f"Brand[X]")
+
+        # Model matching (40 points - MOST IMPORTANT)
+        max_score += 40
+        if search_components['model'] and db_components['model']:
+            # Normalize models for comparison
+            search_model = self._normalize_model(search_components['model'])
+            db_model = self._normalize_model(db_components['model'])
+            if search_model == db_model or search_model in db_model or db_model in search_model:
+                score += 40
+                details.append(f"Model[OK]")
+            else:
+                details.append(f"Model[X]")
+
+        # Dimension matching (25 points)
+        max_score += 25
+        if search_components['dimensions'] and db_components['dimensions']:
+            # Check if any dimension matches
+            matched_dims = set(search_components['dimensions']) & set(db_components['dimensions'])
+            if matched_dims:
+                score += 25
+                details.append(f"Dim[OK]({','.join(matched_dims)})")
+            else:
+                details.append(f"Dim[X]")
+
+        # Type matching (5 points - bonus)
+        max_score += 5
+        if search_components['type'] and db_components['type']:
+            # Check if types overlap
+            if any(word in db_components['type'] for word in search_components['type'].split()):
+                score += 5
+                details.append(f"Type[OK]")
+
+        # Calculate final percentage
+        if max_score > 0:
+            final_score = score / max_score
+        else:
+            final_score = 0.0
+
+        return final_score, details
+
     def _match_by_full_name(self, product_name: str) -> Dict:
         """
         Match product by comparing KEY COMPONENTS (brand, model, dimensions)
@@ -481,64 +882,20 @@ class VectorStore:
         best_score = 0.0
         best_details = ""
 
-        for product in self.products_data:
-            db_name = product.get('name', '')
-            if not db_name:
-                continue
-
-            # Extract components from database name
-            db_components = self._extract_components(db_name)
+        # Only products sharing the model can reach the threshold (see _build_component_index)
+        candidate_indices = set()
+        if search_components['model']:
+            search_model = self._normalize_model(search_components['model'])
+            for model_key, indices in self._components_by_model.items():
+                if search_model in model_key or model_key in search_model:
+                    candidate_indices.update(indices)
 
-            # Calculate component-based score
-            score = 0.0
-            max_score = 0.0
-            details = []
+        # Iterate in catalog order so ties resolve to the same product as a full scan
+        for idx in sorted(candidate_indices):
+            product = self.products_data[idx]
+            db_components = self._product_components[idx]
 
-            # Brand matching (30 points)
-            max_score += 30
-            if search_components['brand'] and db_components['brand']:
-                if search_components['brand'] == db_components['brand']:
-                    score += 30
-                    details.append(f"Brand[OK]")
-                else:
-                    details.append(f"Brand[X]")
-
-            # Model matching (40 points - MOST IMPORTANT)
-            max_score += 40
-            if search_components['model'] and db_components['model']:
-                # Normalize models for comparison
-                search_model = search_components['model'].replace(' ', '').replace('-', '')
-                db_model = db_components['model'].replace(' ', '').replace('-', '')
-                if search_model == db_model or search_model in db_model or db_model in search_model:
-                    score += 40
-                    details.append(f"Model[OK]")
-                else:
-                    details.append(f"Model[X]")
-
-            # Dimension matching (25 points)
-            max_score += 25
-            if search_components['dimensions'] and db_components['dimensions']:
-                # Check if any dimension matches
-                matched_dims = set(search_components['dimensions']) & set(db_components['dimensions'])
-                if matched_dims:
-                    score += 25
-                    details.append(f"Dim[OK]({','.join(matched_dims)})")
-                else:
-                    details.append(f"Dim[X]")
-
-            # Type matching (5 points - bonus)
-            max_score += 5
-            if search_components['type'] and db_components['type']:
-                # Check if types overlap
-                if any(word in db_components['type'] for word in search_components['type'].split()):
-                    score += 5
-                    details.append(f"Type[OK]")
-
-            # Calculate final percentage
-            if max_score > 0:
-                final_score = score / max_score
-            else:
-                final_score = 0.0
+            final_score, details = self._score_components(search_components, db_components)
 
             if final_score > best_score:
                 best_score = final_score
@@ -655,11 +1012,8 @@ class VectorStore:
             normalized_search_code = self.normalize_code(product_code)
             logger.debug(f"   [L1] Exact code search: '{normalized_search_code}'")
 
-            code_matches = []
-            for product in self.products_data:
-                db_code = self.normalize_code(product.get('default_code', ''))
-                if db_code and db_code == normalized_search_code:
-                    code_matches.append(product)
+            code_match_indices = self._code_index.get(normalized_search_code, [])
+            code_matches = [self.products_data[idx] for idx in code_match_indices]
 
             # If single match, return it
             if len(code_matches) == 1:
@@ -679,9 +1033,9 @@ class VectorStore:
                     best_variant = None
                     best_attr_score = 0.0
 
-                    for product in code_matches:
-                        product_text = f"{product.get('name', '')} {product.get('display_name', '')}"
-                        product_attrs = self.extract_attributes(product_text)
+                    for idx in code_match_indices:
+                        product = self.products_data[idx]
+                        product_attrs = self._product_attributes(idx)
                         attr_score = self._calculate_attribute_similarity(search_attrs, product_attrs)
 
                         if attr_score > best_attr_score:
@@ -725,11 +1079,8 @@ class VectorStore:
                 logger.info(f"   [L1.5] 3M tape base code search: {base_codes_to_try}")
 
                 # Find all products that start with this base code
-                variant_matches = []
-                for product in self.products_data:
-                    db_code = product.get('default_code', '')
-                    if isinstance(db_code, str) and db_code.upper().startswith(base_code):
-                        variant_matches.append(product)
+                variant_indices = self._three_m_family_index.get(base_code, [])
+                variant_matches = [self.products_data[idx] for idx in variant_indices]
 
                 if len(variant_matches) > 0:
                     logger.info(f"   [L1.5] Found {len(variant_matches)} 3M tape variants for base code {base_code}")
@@ -740,9 +1091,9 @@ class VectorStore:
                         best_variant = None
                         best_score = 0.0
 
-                        for product in variant_matches:
-                            product_text = f"{product.get('name', '')} {product.get('display_name', '')}"
-                            product_attrs = self.extract_attributes(product_text)
+                        for idx in variant_indices:
+                            product = self.products_data[idx]
+                            product_attrs = self._product_attributes(idx)
                             attr_score = self._calculate_attribute_similarity(search_attrs, product_attrs)
 
                             if attr_score > best_score:
@@ -791,14 +1142,8 @@ class VectorStore:
                 logger.debug(f"   [L1.5] Base code variant search: {base_codes_to_try}")
 
                 # Find all products that start with any of these base codes
-                variant_matches = []
-                for product in self.products_data:
-                    db_code = self.normalize_code(product.get('default_code', ''))
-                    if db_code:
-                        for base_code in base_codes_to_try:
-                            if db_code.startswith(base_code):
-                                variant_matches.append(product)
-                                break  # Don't add same product twice
+                variant_indices = self._indices_with_code_prefix(base_codes_to_try)
+                variant_matches = [self.products_data[idx] for idx in variant_indices]
 
                 if len(variant_matches) > 0:
                     logger.info(f"   [L1.5] Found {len(variant_matches)} variants for base codes {base_codes_to_try}")
@@ -810,9 +1155,9 @@ class VectorStore:
                         best_variant = None
                         best_score = 0.0
 
-                        for product in variant_matches:
-                            product_text = f"{product.get('name', '')} {product.get('display_name', '')}"
-                            product_attrs = self.extract_attributes(product_text)
+                        for idx in variant_indices:
+                            product = self.products_data[idx]
+                            product_attrs = self._product_attributes(idx)
                             attr_score = self._calculate_attribute_similarity(search_attrs, product_attrs)
 
                             if attr_score > best_score:
@@ -849,21 +1194,19 @@ class VectorStore:
             normalized_search_code = self.normalize_code(product_code)
             logger.debug(f"   [L2] Fuzzy code search: '{normalized_search_code}'")
 
-            fuzzy_matches = []
-            for product in self.products_data:
-                db_code = self.normalize_code(product.get('default_code', ''))
-                if db_code and len(db_code) > 2:
-                    similarity = self._calculate_similarity_safe(normalized_search_code, db_code)
-                    if similarity >= self.code_fuzzy_threshold:
-                        fuzzy_matches.append({
-                            'product': product,
-                            'score': similarity,
-                            'db_code': db_code
-                        })
+            # Index returns only codes reaching the threshold, sorted by score
+            fuzzy_matches = [
+                {
+                    'product': self.products_data[idx],
+                    'score': similarity,
+                    'db_code': db_code
+                }
+                for idx, similarity, db_code in self._fuzzy_code_index.search(
+                    normalized_search_code, self.code_fuzzy_threshold
+                )
+            ]
 
             if fuzzy_matches:
-                # Sort by score
-                fuzzy_matches.sort(key=lambda x: x['score'], reverse=True)
                 best = fuzzy_matches[0]
 
                 # If top match is significantly better than second, use it
@@ -883,9 +1226,15 @@ class VectorStore:
             if search_attrs and len(search_attrs) >= 2:  # Need at least 2 attributes
                 attribute_matches = []
 
-                for product in self.products_data:
-                    product_text = f"{product.get('name', '')} {product.get('display_name', '')}"
-                    product_attrs = self.extract_attributes(product_text)
+                # Only products sharing an attribute value or type can score above 0
+                if self.attribute_threshold > 0:
+                    candidate_indices = self._attribute_candidate_indices(search_attrs)
+                else:
+                    candidate_indices = range(len(self.products_data))
+
+                for idx in candidate_indices:
+                    product = self.products_data[idx]
+                    product_attrs = self._product_attributes(idx)
 
                     attr_similarity = self._calculate_attribute_similarity(search_attrs, product_attrs)
                     if attr_similarity >= self.attribute_threshold:
@@ -915,20 +1264,16 @@ class VectorStore:
         # LEVEL 4: Name Similarity Matching (high threshold only)
         if product_name:
             logger.debug(f"   [L4] Name similarity search: '{product_name[:50]}...'")
-            name_matches = []
-
-            for product in self.products_data:
-                product_text = product.get('name', '') or product.get('display_name', '')
-                if product_text:
-                    similarity = self._calculate_similarity_safe(product_name, product_text)
-                    if similarity >= self.name_threshold:
-                        name_matches.append({
-                            'product': product,
-                            'score': similarity
-                        })
+            # Index scores only names that can reach the threshold, sorted by score
+            name_matches = [
+                {
+                    'product': self.products_data[idx],
+                    'score': similarity
+                }
+                for idx, similarity in self._product_name_index.search(product_name, self.name_threshold)
+            ]
 
             if name_matches:
-                name_matches.sort(key=lambda x: x['score'], reverse=True)
                 best = name_matches[0]
 
                 if best['score'] >= 0.90:  # Very high confidence
@@ -948,8 +1293,9 @@ class VectorStore:
         # LEVEL 5: AI Semantic Matching (fallback for difficult cases)
         logger.debug(f"   [L5] Attempting AI semantic matching...")
         try:
-            from ai_product_matcher import AIProductMatcher
-            ai_matcher = AIProductMatcher()
+            ai_matcher = self._get_ai_matcher()
+            if ai_matcher is None:
+                raise RuntimeError("AI matcher not available")
 
             # Get relaxed candidates for AI evaluation
             candidates = ai_matcher.get_relaxed_candidates(
@@ -960,15 +1306,7 @@ class VectorStore:
             )
 
             if candidates:
-                # Prepare product for AI matching
-                search_product = {
-                    'name': product_name or "",
-                    'code': product_code or "",
-                    'specifications': ""  # Could extract from product_name if needed
-                }
-
-                # Let AI decide the best match
-                ai_result = ai_matcher.match_product(search_product, candidates)
+                ai_result = self._ai_match(ai_matcher, product_name, product_code, candidates)
 
                 if ai_result:
                     result['match'] = ai_result['product']
@@ -1072,14 +1410,14 @@ class VectorStore:
             # Process result
             if match_result and match_result['match']:
                 # Make a COPY of the matched product to avoid modifying the original
-                import copy
-                product_copy = copy.deepcopy(match_result['match'])
-
-                # Add extracted product name for tracking
-                product_copy['extracted_product_name'] = name
-                product_copy['match_score'] = match_result['confidence']
-                product_copy['match_method'] = match_result['method']
-                product_copy['requires_review'] = match_result['requires_review']
+                # (catalog values are scalars, so a shallow copy is enough)
+                # and add extracted product name for tracking
+                product_copy = MatchResult(match_result['match'], match_result['confidence'], fields={
+                    'extracted_product_name': name,
+                    'match_score': match_result['confidence'],
+                    'match_method': match_result['method'],
+                    'requires_review': match_result['requires_review']
+                }).to_dict()
 
                 all_matches.append(product_copy)
 
@@ -1138,23 +1476,22 @@ class VectorStore:
         best_match = None
         best_score = 0.0
 
+        # Only scores >= threshold can produce a match, so the indexes skip
+        # customers whose similarity bound is below it (best score stays 0 then)
+
         # Strategy 1: Search by company name
         if company_name:
-            for customer in self.customers_data:
-                customer_company = customer.get('name', '') or customer.get('commercial_company_name', '')
-                score = self._calculate_similarity_safe(company_name, customer_company)
+            for idx, score in self._customer_company_index.top_k(company_name, k=1, min_score=threshold):
                 if score > best_score:
                     best_score = score
-                    best_match = customer
+                    best_match = self.customers_data[idx]
 
         # Strategy 2: Search by customer name
         if customer_name and best_score < threshold:
-            for customer in self.customers_data:
-                customer_contact = customer.get('name', '')
-                score = self._calculate_similarity_safe(customer_name, customer_contact)
+            for idx, score in self._customer_name_index.top_k(customer_name, k=1, min_score=threshold):
                 if score > best_score:
                     best_score = score
-                    best_match = customer
+                    best_match = self.customers_data[idx]
 
         # Strategy 3: Search by email
         if email and best_score < threshold:
@@ -1179,6 +1516,7 @@ class VectorStore:
             'total_products': len(self.products_data),
             'customers_file': self.customers_json,
             'products_file': self.products_json,
+            'ai_verdict_cache': self._ai_verdict_cache.stats(),
             'thresholds': {
                 'code_exact': self.code_exact_threshold,
                 'code_fuzzy': self.code_fuzzy_threshold,
@@ -0,0 +1,172 @@
+"""
+AI Verdict Cache Module
+
+Persistent cache for Level 5 AI product matching verdicts. A verdict is keyed on
+the normalized query (product name + code) plus the candidates shown to the model
+(ID, code and name), so the same question is only sent to Mistral once per TTL and
+a catalog edit to a candidate's code or name asks again.
+
+Entries expire after a TTL and the cache is bounded with LRU eviction. The cache
+is stored as a JSON file (written atomically) so it survives restarts.
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import tempfile
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Verdict value stored when the model answered "no match" (a string so it survives
+# the JSON file and cannot be confused with a matched candidate's ID)
+NO_MATCH = '__no_match__'
+
+
+class AIVerdictCache:
+    """LRU + TTL cache of AI matching verdicts, persisted to JSON"""
+
+    def __init__(self, cache_path: Optional[str] = ".ai_cache/ai_verdicts.json",
+                 ttl_seconds: float = 7 * 24 * 3600, max_entries: int = 5000):
+        """
+        Initialize verdict cache
+
+        Args:
+            cache_path: JSON file for persistence (None or "" keeps it in memory only)
+            ttl_seconds: Verdict lifetime in seconds
+            max_entries: Maximum number of cached verdicts (least recently used evicted)
+        """
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+        self._load()
+
+    @staticmethod
+    def make_key(product_name: str, product_code: str, candidates: List[Dict]) -> str:
+        """
+        Build cache key from normalized query and the candidates shown to the model
+
+        Args:
+            product_name: Product name from the email
+            product_code: Product code from the email
+            candidates: Candidate products shown to the model (id, default_code, name)
+
+        Returns:
+            Hex digest key
+        """
+        name = re.sub(r'\s+', ' ', (product_name or '').strip().lower())
+        code = re.sub(r'[\s\-_]', '', (product_code or '').strip().upper())
+        shown = sorted(
+            json.dumps([candidate.get('id'), candidate.get('default_code') or '',
+                        candidate.get('name') or ''], ensure_ascii=False)
+            for candidate in candidates
+        )
+        return hashlib.sha1(f"{name}|{code}|{','.join(shown)}".encode('utf-8')).hexdigest()
+
+    def _is_expired(self, entry: Dict, now: float) -> bool:
+        return now - entry.get('timestamp', 0) > self.ttl_seconds
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Get a cached verdict
+
+        Args:
+            key: Key from make_key()
+
+        Returns:
+            Verdict dict (product_id is NO_MATCH for "no match") or None if not cached
+        """
+        entry = self._entries.get(key)
+        if entry is None or self._is_expired(entry, time.time()):
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, product_id, confidence: float = 0.0, reasoning: str = '',
+            requires_review: bool = True):
+        """
+        Store a verdict and persist the cache
+
+        Args:
+            key: Key from make_key()
+            product_id: Matched product ID, or NO_MATCH
+            confidence: Model confidence (0-1)
+            reasoning: Model reasoning
+            requires_review: Whether the match needs human review
+        """
+        self._entries[key] = {
+            'product_id': product_id,
+            'confidence': confidence,
+            'reasoning': reasoning,
+            'requires_review': requires_review,
+            'timestamp': time.time()
+        }
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+        self._save()
+
+    def _load(self):
+        """Load non-expired verdicts from disk (oldest first, so LRU order is kept)"""
+        if not self.cache_path or not self.cache_path.exists():
+            return
+
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+
+            now = time.time()
+            items = sorted(data.items(), key=lambda item: item[1].get('timestamp', 0))
+            for key, entry in items:
+                if not self._is_expired(entry, now):
+                    self._entries[key] = entry
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+            logger.info(f"[OK] Loaded {len(self._entries)} cached AI verdicts from {self.cache_path}")
+        except Exception as e:
+            logger.warning(f"[!] Could not load AI verdict cache: {e}")
+            self._entries = OrderedDict()
+
+    def _save(self):
+        """Write cache to disk atomically (temp file + rename)"""
+        if not self.cache_path:
+            return
+
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_path.parent, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(self._entries, f, ensure_ascii=False)
+                os.replace(tmp_path, self.cache_path)
+            except Exception:
+                os.unlink(tmp_path)
+                raise
+        except Exception as e:
+            logger.warning(f"[!] Could not save AI verdict cache: {e}")
+
+    def stats(self) -> Dict:
+        """Get cache statistics"""
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses
+        }
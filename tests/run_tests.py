@@ -22,7 +22,21 @@ def run_unit_tests():
         "test_odoo_connection.py",
         "test_extraction_parsing.py",
         "test_pdf_extraction.py",
-        "test_attribute_extraction.py"
+        "test_attribute_extraction.py",
+        "test_catalog_index.py",
+        "test_vector_index.py",
+        "test_embedding_cache.py",
+        "test_query_embedding_cache.py",
+        "test_model_host.py",
+        "test_dimension_index.py",
+        "test_match_cache.py",
+        "test_verdict_cache.py",
+        "test_bert_finetuner.py",
+        "test_odoo_matcher.py",
+        "test_odoo_transport.py",
+        "test_customer_lookup.py",
+        "test_odoo_mirror.py",
+        "test_catalog_sync.py"
     ]
 
     passed = 0
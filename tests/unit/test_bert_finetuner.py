@@ -0,0 +1,121 @@
+"""
+Test blocking-based training pair generation of BERTFineTuner
+"""
+
+import os
+import sys
+import json
+import random
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from retriever_module.bert_finetuner import BERTFineTuner
+
+
+def _make_products():
+    products = []
+    for i in range(40):
+        products.append({'id': i, 'default_code': f"L{1300 + i}", 'name': f"Doctor Blade Steel 35x0.20 Length {1300 + i * 10}"})
+    for i in range(30):
+        products.append({'id': 100 + i, 'default_code': f"E{1000 + i}", 'name': f"3M Cushion Mount tape {300 + i * 40} x 23"})
+    for i in range(10):
+        products.append({'id': 200 + i, 'default_code': f"SDS{2600 + i}", 'name': f"Duro Seal End Seal {100 + i} x 30"})
+        products.append({'id': 300 + i, 'default_code': f"SDS{2700 + i}", 'name': f"Foam Seal {100 + i} x 30"})
+    return products
+
+
+def _make_finetuner(tmp_dir, products, seed=42):
+    path = os.path.join(tmp_dir, 'products.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(products, f)
+    return BERTFineTuner(path, output_model_path=os.path.join(tmp_dir, 'model'),
+                         use_cuda_for_training=False, seed=seed, cache_dir=tmp_dir)
+
+
+def test_training_pairs():
+    """Positive pairs satisfy the similarity rules, hard negatives cross categories, seeded"""
+    print("=" * 80)
+    print("TEST: BERTFineTuner training pairs")
+    print("=" * 80)
+
+    products = _make_products()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        finetuner = _make_finetuner(tmp_dir, products)
+        features = {f['full_text']: f for f in finetuner._get_features()}
+
+        positives, negatives = finetuner._generate_training_pairs()
+        assert positives and negatives
+        for example in positives:
+            feat1, feat2 = features[example.texts[0]], features[example.texts[1]]
+            assert finetuner._are_similar_features(feat1, feat2), example.texts
+            assert 0.8 <= example.label <= 1.0
+        # At most 3 positive pairs per product
+        assert len(positives) <= 3 * len(products)
+
+        # Same seed, same pairs (catalog products are not shuffled in place)
+        again = _make_finetuner(tmp_dir, products)._generate_training_pairs()
+        assert [e.texts for e in again[0]] == [e.texts for e in positives]
+        assert [(e.texts, e.label) for e in again[1]] == [(e.texts, e.label) for e in negatives]
+        assert finetuner.products == products
+
+        # Hard negatives: nearest neighbour in embedding space with a different category
+        rng = np.random.default_rng(0)
+        embeddings = rng.standard_normal((len(products), 16)).astype(np.float32)
+        embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+        hard_positives, hard_negatives = finetuner._generate_training_pairs(embeddings)
+        assert [e.texts for e in hard_positives] == [e.texts for e in positives]
+        # (seal sub-type negatives are appended after the mined ones)
+        seal_count = len(finetuner._generate_seal_negatives(random.Random(0)))
+        mined = hard_negatives[:len(hard_negatives) - seal_count]
+        assert mined
+        for example in mined:
+            feat1, feat2 = features[example.texts[0]], features[example.texts[1]]
+            assert feat1['category'] != feat2['category']
+            assert 0.0 <= example.label <= 0.3
+
+    print(f"OK {len(positives)} positive / {len(negatives)} negative pairs")
+
+
+def test_training_pair_cache():
+    """Pairs are generated once per catalog; a changed catalog gets new pairs"""
+    print("=" * 80)
+    print("TEST: BERTFineTuner training pair cache")
+    print("=" * 80)
+
+    products = _make_products()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        finetuner = _make_finetuner(tmp_dir, products)
+        positives, negatives, augmented = finetuner.load_training_pairs()
+        pairs_path = finetuner._get_pairs_path()
+        assert pairs_path.exists()
+
+        # Same catalog: loaded from disk, not generated
+        cached = _make_finetuner(tmp_dir, products)
+
+        def fail(*args, **kwargs):
+            raise AssertionError("pairs generated again")
+        cached._generate_training_pairs = fail
+        loaded = cached.load_training_pairs()
+        for original, restored in zip((positives, negatives, augmented), loaded):
+            assert [(e.texts, e.label) for e in original] == [(e.texts, e.label) for e in restored]
+
+        # Catalog changed: new pairs file, the old one is removed
+        changed = _make_finetuner(tmp_dir, products + [{'id': 999, 'default_code': 'G999', 'name': 'Gold Blade 40x0.20'}])
+        assert changed.get_catalog_hash() != finetuner.get_catalog_hash()
+        changed.load_training_pairs()
+        assert changed._get_pairs_path().exists() and not pairs_path.exists()
+
+        # No published model yet
+        assert not changed.output_model_path.exists() and not changed.is_up_to_date()
+
+    print("OK Training pairs cached per catalog")
+
+
+if __name__ == "__main__":
+    test_training_pairs()
+    test_training_pair_cache()
@@ -0,0 +1,199 @@
+"""
+Test catalog indexes return exactly what a linear scan returns
+"""
+
+import os
+import sys
+import json
+import random
+import tempfile
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from retriever_module.vector_store import VectorStore
+from retriever_module.token_matcher import TokenMatcher
+from retriever_module.catalog_index import FuzzyCodeIndex, NameSimilarityIndex, SubstringIndex
+from utils.product_validator import is_valid_product_code
+
+
+def _linear_fuzzy_scan(codes, query, threshold, scorer):
+    """Old Level 2 loop used as reference"""
+    matches = []
+    for idx, db_code in enumerate(codes):
+        if db_code and len(db_code) > 2:
+            score = scorer(query, db_code)
+            if score >= threshold:
+                matches.append((idx, score, db_code))
+    matches.sort(key=lambda match: match[1], reverse=True)
+    return matches
+
+
+def test_fuzzy_code_index():
+    """FuzzyCodeIndex matches the linear SequenceMatcher scan for all thresholds"""
+    print("=" * 80)
+    print("TEST: FuzzyCodeIndex vs linear scan")
+    print("=" * 80)
+
+    store = VectorStore.__new__(VectorStore)
+    scorer = store._calculate_similarity_safe
+
+    rng = random.Random(7)
+    alphabet = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
+    codes = ['SDS025', 'SDS025A', 'SDS025B', 'L1520685', 'L1320685', 'E1015', 'E1015', '3M94', 'AB', '']
+    codes += [''.join(rng.choice(alphabet) for _ in range(rng.randint(3, 10))) for _ in range(300)]
+
+    index = FuzzyCodeIndex(codes, scorer)
+
+    queries = ['SDS025', 'SDS02', 'SDS0255', 'L152O685', 'E1015', 'E101', '3M9', 'X', '']
+    queries += [rng.choice(codes[:8]) + rng.choice(alphabet) for _ in range(50)]
+
+    failures = 0
+    for threshold in [0.0, 0.5, 0.7, 0.85, 0.9, 1.0]:
+        for query in queries:
+            expected = _linear_fuzzy_scan(codes, query, threshold, scorer)
+            actual = index.search(query, threshold)
+            if actual != expected:
+                failures += 1
+                print(f"X FAIL: '{query}' @ {threshold}: {len(actual)} vs {len(expected)} matches")
+
+    assert failures == 0, f"{failures} fuzzy code searches differ from the linear scan"
+    print("OK FuzzyCodeIndex identical to linear scan")
+
+
+def test_name_similarity_index():
+    """NameSimilarityIndex search/top_k match a full SequenceMatcher scan"""
+    print("=" * 80)
+    print("TEST: NameSimilarityIndex vs linear scan")
+    print("=" * 80)
+
+    store = VectorStore.__new__(VectorStore)
+    scorer = store._calculate_similarity_safe
+
+    names = [
+        'Duro Seal Bobst 20SIX Grey',
+        'Duro Seal Bobst 16S Black',
+        '3M Cushion Mount Plus E1015 457mm x 23m',
+        '3M Cushion Mount Plus E1015 685mm x 23m',
+        'Doctor Blade Gold 35x0,20 RPE',
+        'Rakelmesser Edelstahl Gold 35x0,20 RPE Länge 1335mm',
+        'SDS Print Services GmbH',
+        'Druckerei Müller GmbH & Co. KG',
+        '',
+        None,
+        'Doctor Blade Gold 35x0,20 RPE',
+    ]
+    index = NameSimilarityIndex(names, scorer)
+
+    queries = ['Duro Seal Bobst Grey', 'cushion mount e1015 685', 'Doctor Blade Gold 35x0.20',
+               'SDS Print Services', 'Druckerei Mueller', 'x', '']
+
+    failures = 0
+    for threshold in [0.0, 0.5, 0.6, 0.85, 0.9]:
+        for query in queries:
+            expected = []
+            for idx, name in enumerate(names):
+                if name:
+                    score = scorer(query, name)
+                    if score >= threshold:
+                        expected.append((idx, score))
+            expected.sort(key=lambda match: match[1], reverse=True)
+            if not query:
+                expected = []
+
+            if index.search(query, threshold) != expected:
+                failures += 1
+                print(f"X FAIL search: '{query}' @ {threshold}")
+            for k in (1, 3):
+                if index.top_k(query, k, threshold) != expected[:k]:
+                    failures += 1
+                    print(f"X FAIL top_k({k}): '{query}' @ {threshold}")
+
+    assert failures == 0, f"{failures} name searches differ from the linear scan"
+    print("OK NameSimilarityIndex identical to linear scan")
+
+
+def test_substring_index():
+    """SubstringIndex returns the same products as an `in` scan"""
+    print("=" * 80)
+    print("TEST: SubstringIndex vs linear scan")
+    print("=" * 80)
+
+    texts = [name.upper() for name in [
+        'Duro Seal W&H Miraflex SDS006A', '3M904-12-44 Scotch ATG 904 12mm x 44m',
+        'Doctor Blade 40x0.20 RPE', 'Doctor Blade 40x0.20 2°', '', 'E1015 Cushion Mount 457mm',
+    ]]
+    index = SubstringIndex(texts)
+
+    failures = 0
+    for pattern in ['', 'M', '12', 'MM', '904', 'MIRAFLEX', '40X0.20', 'BLADE 40', 'ZZZ', '457MM', 'SCOTCH ATG 9']:
+        expected = [idx for idx, text in enumerate(texts) if pattern in text]
+        if index.search(pattern) != expected:
+            failures += 1
+            print(f"X FAIL: '{pattern}'")
+
+    assert failures == 0, f"{failures} substring searches differ from the linear scan"
+    print("OK SubstringIndex identical to linear scan")
+
+
+def test_token_index():
+    """TokenMatcher.search over the token index scores like the nested token loop"""
+    print("=" * 80)
+    print("TEST: TokenMatcher token index vs linear scan")
+    print("=" * 80)
+
+    products = [
+        {'id': 1, 'default_code': 'E1015-457', 'name': '3M Cushion Mount Plus E1015 457mm x 23m'},
+        {'id': 2, 'default_code': 'E1015-685', 'name': '3M Cushion Mount Plus E1015 685mm x 23m'},
+        {'id': 3, 'default_code': 'L1520', 'name': 'Lohmann DuploFLEX 1.2 mm 450'},
+        {'id': 4, 'default_code': 'RPR-123965', 'name': 'Doctor Blade Gold 35x0,20 RPE 1335mm'},
+        {'id': 5, 'default_code': 'SDS025', 'name': 'Duro Seal Bobst 16S Grey', 'display_name': '[SDS025] Duro Seal'},
+        {'id': 6, 'default_code': 'SDS025A', 'name': 'Duro Seal Bobst 16S Gry 12'},
+        {'id': 7, 'default_code': '', 'name': ''},
+        {'id': 8, 'default_code': 'X120', 'name': 'Tape 120 blk'},
+    ]
+
+    with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False, encoding='utf-8') as f:
+        json.dump(products, f)
+    try:
+        matcher = TokenMatcher(f.name)
+    finally:
+        os.unlink(f.name)
+
+    def linear_search(query, top_k, min_score):
+        if not is_valid_product_code(query)[0]:
+            return []
+        query_tokens = matcher._tokenize(query)
+        scored = []
+        for product in matcher.products:
+            product_tokens = matcher._tokenize(matcher._get_product_text(product))
+            score = matcher._calculate_token_overlap(query_tokens, product_tokens)
+            if score >= min_score:
+                scored.append((score, product['id']))
+        scored.sort(reverse=True, key=lambda match: match[0])
+        return scored[:top_k]
+
+    queries = ['E1015 457 x 23', 'cushion mount 685mm', 'Lohmann 12 mm 45', 'doctor blade 35x0.20 1335',
+               'SDS025 grey', 'Duro Seal Bobst gray', 'tape 12 black', 'blade 0,2 rpr 123965']
+
+    failures = 0
+    for min_score in [0.0, 0.4, 0.75, 1.5]:
+        for query in queries:
+            for top_k in (1, 5, 20):
+                expected = linear_search(query, top_k, min_score)
+                actual = [(match['similarity_score'], match['id'])
+                          for match in matcher.search(query, top_k=top_k, min_score=min_score)]
+                if actual != expected:
+                    failures += 1
+                    print(f"X FAIL: '{query}' top_k={top_k} @ {min_score}: {actual} vs {expected}")
+
+    assert failures == 0, f"{failures} token searches differ from the linear scan"
+    print("OK TokenMatcher token index identical to linear scan")
+
+
+if __name__ == "__main__":
+    test_fuzzy_code_index()
+    test_name_similarity_index()
+    test_substring_index()
+    test_token_index()
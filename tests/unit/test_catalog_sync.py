@@ -0,0 +1,119 @@
+"""
+Test the incremental write_date sync of the customers/products JSON files
+"""
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from retriever_module.catalog_sync import sync_catalog, format_product
+
+
+class FakeTemplates:
+    """In-memory product.template answering execute(model, method, args, kwargs)"""
+
+    def __init__(self, count):
+        self.records = [
+            {'id': i, 'name': f"Product {i}", 'default_code': f"P{i:04d}", 'list_price': float(i),
+             'standard_price': 1.0, 'type': 'consu', 'categ_id': [1, 'Goods'], 'description': False,
+             'active': True, 'write_date': '2025-01-01 08:00:00'}
+            for i in range(1, count + 1)
+        ]
+        self.calls = []
+
+    def _matches(self, record, condition):
+        field, operator, value = condition
+        if operator == '>':
+            return record[field] > value
+        if operator == '>=':
+            return record[field] >= value
+        return record[field] == value
+
+    def execute(self, model, method, args, kwargs):
+        assert model == 'product.template'
+        self.calls.append(method)
+        records = [r for r in self.records if r['active'] and all(self._matches(r, c) for c in args[0])]
+        if method == 'search':
+            return [r['id'] for r in sorted(records, key=lambda r: (r['name'], r['id']))]  # default order
+        records.sort(key=lambda r: r['id'])
+        fields = set(kwargs['fields'])
+        return [{k: v for k, v in r.items() if k in fields} for r in records[:kwargs['limit']]]
+
+
+def test_catalog_sync():
+    """Full first sync, then only changed records; unchanged files are not rewritten"""
+    odoo = FakeTemplates(25)
+    default_order = sorted(odoo.records, key=lambda r: (r['name'], r['id']))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "odoo_products.json")
+        state_path = os.path.join(tmp, "sync_state.json")
+
+        def sync(**kwargs):
+            odoo.calls.clear()
+            return sync_catalog(odoo.execute, 'products', path, state_path, batch_size=10, **kwargs)
+
+        summary = sync()
+        assert summary['mode'] == 'full' and summary['added'] == 25 and summary['written']
+        assert odoo.calls == ['search_read'] * 3 + ['search']  # pages of 10, then the default order
+        with open(path, encoding='utf-8') as f:
+            assert json.load(f) == [format_product(r) for r in default_order]  # like a full export
+        with open(state_path, encoding='utf-8') as f:
+            assert json.load(f)['products']['watermark'] == '2025-01-01 08:00:00'
+
+        # Nothing changed: file left untouched
+        os.utime(path, ns=(1, 1))
+        summary = sync()
+        assert summary['mode'] == 'incremental' and not summary['written']
+        assert summary['added'] == summary['updated'] == summary['removed'] == 0
+        assert os.stat(path).st_mtime_ns == 1
+
+        # Edit, archive, delete and add products (the rest keeps an old write_date)
+        for record in odoo.records:
+            record['write_date'] = '2024-12-01 08:00:00'
+        odoo.records[2].update({'name': 'Product 3 renamed', 'write_date': '2025-02-01 09:00:00'})
+        odoo.records[4].update({'active': False, 'write_date': '2025-02-01 09:00:00'})
+        del odoo.records[6]
+        odoo.records.append({'id': 30, 'name': 'Product 30', 'default_code': 'P0030', 'list_price': 30.0,
+                             'standard_price': 1.0, 'type': 'consu', 'categ_id': False, 'description': False,
+                             'active': True, 'write_date': '2025-02-01 09:30:00'})
+
+        summary = sync(dry_run=True)
+        assert (summary['added'], summary['updated'], summary['removed']) == (1, 1, 2)
+        assert summary['fetched'] == 2 and not summary['written']
+        assert os.stat(path).st_mtime_ns == 1
+        assert odoo.calls == ['search_read', 'search']
+
+        summary = sync(backup=True)
+        assert summary['written'] and summary['total'] == 24
+        with open(path, encoding='utf-8') as f:
+            products = json.load(f)
+        assert [p['id'] for p in products] == [r['id'] for r in default_order if r['id'] not in (5, 7)] + [30]
+        assert products[[p['id'] for p in products].index(3)]['name'] == 'Product 3 renamed'
+        assert products[-1]['category'] == ''
+        assert os.path.exists(path + ".backup")
+        with open(state_path, encoding='utf-8') as f:
+            assert json.load(f)['products']['watermark'] == '2025-02-01 09:30:00'
+
+        # A full sync finds nothing else to change
+        summary = sync(full=True)
+        assert summary['mode'] == 'full' and not summary['written'] and summary['total'] == 24
+
+        # The watermark belongs to its file: another output path gets a full sync
+        other_path = os.path.join(tmp, "products_copy.json")
+        shutil.copy(path, other_path)
+        summary = sync_catalog(odoo.execute, 'products', other_path, state_path, batch_size=10)
+        assert summary['mode'] == 'full' and not summary['written']
+        summary = sync()
+        assert summary['mode'] == 'full'
+        assert sync()['mode'] == 'incremental'
+
+
+if __name__ == "__main__":
+    test_catalog_sync()
+    print("[OK] Catalog sync tests passed")
@@ -0,0 +1,124 @@
+"""
+Test the batched customer lookup in OdooConnector against one query per strategy
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from retriever_module import odoo_connector
+from retriever_module.odoo_connector import OdooConnector
+
+
+class FakePartners:
+    """In-memory res.partner with prefix-notation domains and Odoo's default order"""
+
+    def __init__(self, partners):
+        self.partners = partners
+        self.calls = 0
+
+    def _condition(self, partner, condition):
+        field, operator, value = condition
+        actual = partner.get(field)
+        if operator == '=':
+            return actual == value
+        if operator == 'ilike':
+            return bool(actual) and str(value).lower() in str(actual).lower()
+        raise ValueError(operator)
+
+    def _evaluate(self, domain, partner):
+        def node(i):
+            operator = domain[i]
+            if operator in ('|', '&'):
+                left, i = node(i + 1)
+                right, i = node(i)
+                return (left or right) if operator == '|' else (left and right), i
+            return self._condition(partner, domain[i]), i + 1
+
+        i, result = 0, True
+        while i < len(domain):
+            value, i = node(i)
+            result = result and value
+        return result
+
+    def execute_kw(self, db, uid, password, model, method, args, kwargs=None):
+        self.calls += 1
+        assert model == 'res.partner' and method == 'search_read'
+        kwargs = kwargs or {}
+        # res.partner _order: complete_name ASC, id DESC
+        found = sorted((p for p in self.partners if self._evaluate(args[0], p)),
+                       key=lambda p: p['id'], reverse=True)
+        found.sort(key=lambda p: p['name'])
+        if kwargs.get('limit'):
+            found = found[:kwargs['limit']]
+        fields = set(kwargs.get('fields', [])) | {'id'}
+        return [{k: v for k, v in p.items() if k in fields} for p in found]
+
+
+PARTNERS = [
+    {'id': 1, 'name': 'Müller Druck GmbH', 'email': 'info@mueller-druck.de', 'phone': '+49 711 1234567',
+     'street': 'Industriestraße 5', 'city': 'Stuttgart', 'zip': '70565', 'country_id': [57, 'Germany'], 'is_company': True},
+    {'id': 2, 'name': 'Hans Müller', 'email': 'hans@mueller-druck.de', 'phone': '0711 1234568',
+     'street': False, 'city': False, 'zip': False, 'country_id': False, 'is_company': False},
+    {'id': 3, 'name': 'Flexo Pack AG', 'email': 'order@flexopack.ch', 'phone': '+41 44 5556677',
+     'street': 'Hauptstrasse 12', 'city': 'Zürich', 'zip': '8004', 'country_id': [43, 'Switzerland'], 'is_company': True},
+    {'id': 4, 'name': 'Etiketten Werk 70565', 'email': False, 'phone': False,
+     'street': 'Industriestraße 9', 'city': 'Stuttgart', 'zip': '70565', 'country_id': [57, 'Germany'], 'is_company': True},
+    {'id': 5, 'name': '3M9353R Tapes', 'email': 'sales@tapes.example', 'phone': '030 99887766',
+     'street': 'Am Markt 1', 'city': 'Berlin', 'zip': '10115', 'country_id': [57, 'Germany'], 'is_company': True},
+    {'id': 6, 'name': 'Flexo Pack AG', 'email': 'billing@flexopack.ch', 'phone': False,
+     'street': 'Hauptstrasse 12', 'city': 'Zürich', 'zip': '8004', 'country_id': [43, 'Switzerland'], 'is_company': True},
+]
+
+QUERIES = [
+    {'customer_id': 3},
+    {'customer_id': 99, 'email': 'info@mueller-druck.de'},
+    {'company_name': 'Müller Druck', 'phone': '+49 711 1234567'},
+    {'company_name': 'Unknown', 'phone': '(0711) 1234568'},
+    {'company_name': 'Müller Druck GmbH', 'zip_code': '70565', 'address': 'Industriestraße 5, 70565 Stuttgart'},
+    {'company_name': 'Nobody', 'zip_code': '70565'},
+    {'company_name': 'Flexo Pack'},
+    {'company_name': '3M 9353R'},
+    {'customer_name': 'hans'},
+    {'company_name': 'Nobody', 'email': 'sales@tapes.example'},
+    {'company_name': 'Nobody', 'zip_code': '99999', 'phone': '12'},
+    {},
+]
+
+
+def _make_connector():
+    connector = OdooConnector.__new__(OdooConnector)
+    connector.db, connector.uid, connector.password = 'db', 1, 'pw'
+    connector.mirror = None
+    connector.models = FakePartners([dict(p) for p in PARTNERS])
+    return connector
+
+
+def test_customer_lookup():
+    """One search_read per lookup, same customer as querying each strategy in turn"""
+    batched = _make_connector()
+    sequential = _make_connector()
+
+    for query in QUERIES:
+        batched.models.calls = 0
+        expected_limit = odoo_connector.CUSTOMER_CANDIDATE_LIMIT
+        odoo_connector.CUSTOMER_CANDIDATE_LIMIT = 0  # every lookup falls back to one query per strategy
+        try:
+            expected = sequential.query_customer_info(**query)
+        finally:
+            odoo_connector.CUSTOMER_CANDIDATE_LIMIT = expected_limit
+
+        result = batched.query_customer_info(**query)
+        assert result == expected, f"{query}: {result} != {expected}"
+        assert batched.models.calls <= 1, f"{query}: {batched.models.calls} calls"
+
+    assert _make_connector().query_customer_info(company_name='Flexo Pack')['id'] == 6
+    assert _make_connector().query_customer_info(company_name='Müller Druck GmbH', zip_code='70565')['id'] == 1
+    assert 'is_company' not in _make_connector().query_customer_info(customer_id=3)
+
+
+if __name__ == "__main__":
+    test_customer_lookup()
+    print("[OK] Customer lookup tests passed")
@@ -0,0 +1,85 @@
+"""
+Test vectorized dimension re-ranking matches the per-candidate computation
+"""
+
+import os
+import sys
+import json
+import random
+import tempfile
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from retriever_module.hybrid_matcher import HybridMatcher
+from retriever_module.match_result import MatchResult
+
+
+def _reference_rerank(matcher, query, candidates, top_k):
+    """Old _token_rerank loop (regexes on every candidate) used as reference"""
+    results = []
+    for product, bert_score in candidates:
+        bonus = matcher._calculate_dimension_bonus(query, matcher._get_product_text(product))
+        results.append((product.get('default_code'), bert_score * (1.0 + bonus * 0.5), bonus))
+    results.sort(key=lambda r: r[1], reverse=True)
+    return results[:top_k]
+
+
+def test_dimension_rerank():
+    """DimensionIndex bonuses equal the regex-per-candidate bonuses, same order"""
+    print("=" * 80)
+    print("TEST: Vectorized dimension re-ranking")
+    print("=" * 80)
+
+    rng = random.Random(11)
+    products = [
+        {'id': 1, 'default_code': 'OPP310', 'name': 'OPP Klischeeklebeband 310 x 25'},
+        {'id': 2, 'default_code': 'FS120', 'name': 'Foam Seal 120 x 31'},
+        {'id': 3, 'default_code': 'RPE1335', 'name': 'Rakelmesser Gold 35x0,20 Länge 1335mm'},
+        {'id': 4, 'product_code': 'L1520', 'product_name': 'DuploFLEX 685mm x 23m'},
+        {'id': 5, 'default_code': 'E1015', 'name': '3M Cushion Mount Plus E1015'},
+    ]
+    widths = [120, 310, 457, 685, 1335, 25, 31, 35]
+    for i in range(300):
+        products.append({
+            'id': 100 + i,
+            'default_code': f"P{i:04d}",
+            'name': f"Tape {rng.choice(widths)} x {rng.choice(widths)} {rng.choice(['', '1335mm', 'L 457mm'])}"
+        })
+
+    queries = ['OPP Klischeeklebeband 310 x 25', 'Rakelmesser 35x0.20 Länge 1335mm', 'Foam Seal 120x31',
+               'DuploFLEX 685mm', '3M Cushion Mount', 'Tape 457 x 25 1335mm', '']
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        products_path = os.path.join(tmp_dir, 'products.json')
+        with open(products_path, 'w', encoding='utf-8') as f:
+            json.dump(products, f)
+        matcher = HybridMatcher(products_path, use_bert=False)
+
+        for query in queries:
+            for _ in range(20):
+                rows = rng.sample(range(len(products)), 25)
+                candidates = [(dict(products[row]), round(rng.uniform(0.6, 0.9), 2)) for row in rows]
+
+                expected = _reference_rerank(matcher, query, candidates, 5)
+                # Mix of known rows, unknown rows and products missing from the catalog
+                results = matcher._token_rerank(query, [
+                    MatchResult(product, score, row if n % 3 else None, {'bert_score': score})
+                    for n, (row, (product, score)) in enumerate(zip(rows, candidates))
+                ], top_k=5)
+
+                actual = [(r.product.get('default_code'), r.score, r.fields['dimension_bonus']) for r in results]
+                assert [a[0] for a in actual] == [e[0] for e in expected], query
+                assert all(abs(a[1] - e[1]) < 1e-12 and abs(a[2] - e[2]) < 1e-12
+                           for a, e in zip(actual, expected)), query
+
+        # Products not in the catalog fall back to extracting their dimensions
+        stray = MatchResult({'id': 999, 'product_code': 'X1', 'product_name': 'Seal 310 x 25'}, 0.8, None, {'bert_score': 0.8})
+        assert matcher._token_rerank('Seal 310x25', [stray])[0].fields['dimension_bonus'] == 0.4
+
+    print("OK Vectorized dimension re-ranking matches reference")
+
+
+if __name__ == "__main__":
+    test_dimension_rerank()
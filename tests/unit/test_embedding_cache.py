@@ -0,0 +1,86 @@
+"""
+Test the content-addressed BERT embedding cache
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from retriever_module.embedding_cache import EmbeddingCache
+
+
+class FakeEncoder:
+    """Deterministic text -> unit vector encoder that records what it encoded"""
+
+    def __init__(self, dimension=8):
+        self.dimension = dimension
+        self.encoded = []
+
+    def __call__(self, texts):
+        self.encoded.extend(texts)
+        vectors = []
+        for text in texts:
+            rng = np.random.default_rng(sum(text.encode('utf-8')) + len(text))
+            vector = rng.standard_normal(self.dimension).astype(np.float32)
+            vectors.append(vector / np.linalg.norm(vector))
+        return np.array(vectors, dtype=np.float32)
+
+
+def test_embedding_cache_incremental():
+    """Only new or edited products are encoded; cached matrices are memory-mapped"""
+    print("=" * 80)
+    print("TEST: EmbeddingCache incremental updates")
+    print("=" * 80)
+
+    texts = ['SDS025 Duro Seal Bobst', 'E1015 Cushion Mount 457mm', 'L1520 DuploFLEX', 'E1015 Cushion Mount 457mm']
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        encoder = FakeEncoder()
+        cache = EmbeddingCache(cache_dir, 'test/model')
+
+        embeddings, path = cache.load(texts, encoder)
+        assert encoder.encoded == texts[:3]  # duplicate text encoded once
+        assert isinstance(embeddings, np.memmap)
+        assert np.allclose(embeddings, FakeEncoder()(texts))
+
+        # Same catalog (e.g. file rewritten by a sync): nothing to encode
+        encoder.encoded = []
+        embeddings, same_path = cache.load(list(texts), encoder)
+        assert encoder.encoded == [] and same_path == path
+
+        # One product edited, one added: only those two are encoded
+        edited = [texts[0], 'E1015 Cushion Mount 685mm', texts[2], texts[3], 'RPR-123965 Doctor Blade']
+        embeddings, new_path = cache.load(edited, encoder)
+        assert encoder.encoded == ['E1015 Cushion Mount 685mm', 'RPR-123965 Doctor Blade']
+        assert new_path != path and not path.exists()
+        assert np.allclose(embeddings, FakeEncoder()(edited))
+
+        # A different model never reuses these vectors
+        other = FakeEncoder()
+        EmbeddingCache(cache_dir, 'other-model').load(texts, other)
+        assert other.encoded == texts[:3]
+
+        # Models whose name extends another's ("test/model" -> "test/model_v2") keep their files
+        _, v2_path = EmbeddingCache(cache_dir, 'test/model_v2').load(texts, FakeEncoder())
+        embeddings, new_path = cache.load(edited + ['Foam Seal 120x31'], FakeEncoder())
+        assert v2_path.exists()
+        assert EmbeddingCache(cache_dir, 'test/model_v2')._previous_caches(v2_path) == []
+
+        # Same model re-trained in place (new version): all encoded again, old matrix removed
+        retrained = FakeEncoder()
+        _, retrained_path = EmbeddingCache(cache_dir, 'test/model', 'test/model@2').load(edited, retrained)
+        assert retrained.encoded == edited
+        assert not new_path.exists() and retrained_path.exists()
+        assert EmbeddingCache(cache_dir, 'test/model', 'test/model@2').lookup(edited) is not None
+        assert EmbeddingCache(cache_dir, 'test/model').lookup(edited) is None
+
+    print("OK EmbeddingCache reuses unchanged products")
+
+
+if __name__ == "__main__":
+    test_embedding_cache_incremental()
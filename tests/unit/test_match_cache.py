@@ -0,0 +1,108 @@
+"""
+Test the end-to-end product match cache in ContextRetriever
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from orchestrator.context_retriever import ContextRetriever
+from retriever_module.match_cache import MatchCache, MISS
+
+
+class FakeHybridMatcher:
+    """Matcher double that counts the searches it runs"""
+
+    def __init__(self, products_json_path):
+        self.products_json_path = products_json_path
+        self.signature = 'bert=True|model-a'
+        self.searched = []
+        self.code_lookups = []
+
+    def search_by_code(self, product_code):
+        self.code_lookups.append(product_code)
+        if product_code == 'SDS025':
+            return {'id': 1, 'default_code': 'SDS025', 'name': 'Duro Seal Bobst'}
+        return None
+
+    def search_many(self, queries, top_k=1, min_score=0.6):
+        self.searched.extend(queries)
+        return [
+            [{'id': 2, 'default_code': 'E1015', 'name': 'Cushion Mount 457mm', 'final_score': 0.9}]
+            if 'Cushion' in query else []
+            for query in queries
+        ]
+
+    def get_config_signature(self):
+        return self.signature
+
+
+def test_match_cache():
+    """Recurring lines skip matching; catalog or model changes invalidate"""
+    print("=" * 80)
+    print("TEST: Match cache")
+    print("=" * 80)
+
+    cache = MatchCache(max_entries=2)
+    assert cache.make_key('E1015', ' Cushion  Mount ') == cache.make_key('E1015', 'Cushion Mount')
+    assert cache.get(cache.make_key(None, 'x')) is MISS
+    cache.put('a', None)
+    cache.put('b', {'id': 1})
+    cache.put('c', {'id': 2})
+    assert cache.get('a') is MISS and cache.get('c') == {'id': 2}
+
+    entities = {
+        'product_names': ['Duro Seal Bobst', 'Cushion Mount 457mm', 'Unknown widget'],
+        'product_codes': ['SDS025', 'E1015', 'WIDGET99'],
+    }
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        products_path = os.path.join(tmp_dir, 'products.json')
+        with open(products_path, 'w', encoding='utf-8') as f:
+            json.dump([], f)
+
+        matcher = FakeHybridMatcher(products_path)
+        retriever = ContextRetriever(vector_store=None, hybrid_matcher=matcher)
+
+        first = retriever.retrieve_order_context_json(entities)['products']
+        assert [p['default_code'] for p in first] == ['SDS025', 'E1015']
+        assert not any(p['match_cache_hit'] for p in first)
+        assert len(matcher.searched) == 2
+
+        # Same lines again: nothing is looked up or searched, hits are flagged
+        matcher.searched, matcher.code_lookups = [], []
+        second = retriever.retrieve_order_context_json(entities)['products']
+        assert [p['default_code'] for p in second] == ['SDS025', 'E1015']
+        assert all(p['match_cache_hit'] for p in second)
+        assert second[0]['match_method'] == 'exact_code' and second[1]['match_method'] == 'hybrid_bert_token'
+        assert matcher.searched == [] and matcher.code_lookups == []
+
+        # Callers may modify returned matches without affecting the cache
+        second[1]['match_score'] = 0.0
+        assert retriever.retrieve_order_context_json(entities)['products'][1]['match_score'] == 0.9
+
+        # New embedding model: cache dropped
+        matcher.signature = 'bert=True|model-b'
+        retriever.retrieve_order_context_json(entities)
+        assert len(matcher.searched) == 2
+
+        # Catalog rewritten (sync): cache dropped
+        matcher.searched = []
+        time.sleep(0.01)
+        with open(products_path, 'w', encoding='utf-8') as f:
+            json.dump([{'id': 1}], f)
+        retriever.retrieve_order_context_json(entities)
+        assert len(matcher.searched) == 2
+        assert retriever.match_cache.stats()['invalidations'] == 2
+
+    print("OK match cache reuses recurring lines and invalidates on changes")
+
+
+if __name__ == "__main__":
+    test_match_cache()
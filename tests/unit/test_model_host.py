@@ -0,0 +1,182 @@
+"""
+Test lazy BERT loading and the shared model host (fake matcher, no model download)
+"""
+
+import os
+import sys
+import json
+import tempfile
+import threading
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from retriever_module.match_result import MatchResult
+from retriever_module.model_host import ModelHost, RemoteBertMatcher, parse_address
+from retriever_module.hybrid_matcher import HybridMatcher
+
+PRODUCTS = [
+    {'id': 1, 'default_code': 'SDS025', 'name': 'Duro Seal Bobst 16S Grey'},
+    {'id': 2, 'default_code': 'E1015', 'name': '3M Cushion Mount Plus E1015 457mm x 23m'},
+]
+
+
+class FakeBertMatcher:
+    """Scores products by shared words, like a (very) small semantic model"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def search_results_many(self, queries, top_k=20, min_score=0.60):
+        self.calls += 1
+        all_results = []
+        for query in queries:
+            words = set(query.lower().split())
+            results = []
+            for idx, product in enumerate(PRODUCTS):
+                score = len(words & set(product['name'].lower().split())) / max(len(words), 1)
+                if score >= min_score:
+                    results.append(MatchResult(product, score, idx, {'bert_score': score}))
+            all_results.append(sorted(results, key=lambda r: r.score, reverse=True)[:top_k])
+        return all_results
+
+    def get_embedding(self, text):
+        return [0.0]
+
+    def get_stats(self):
+        return {'bert_model': 'fake-model', 'bert_device': 'cpu'}
+
+
+class FileBertMatcher(FakeBertMatcher):
+    """Fake matcher built from a products file and a local model directory"""
+
+    def __init__(self, products_json_path, model_name):
+        super().__init__()
+        from retriever_module.bert_semantic_matcher import get_model_version
+        self.products_json_path = products_json_path
+        self.model_name = model_name
+        self.model_version = get_model_version(model_name)
+        with open(products_json_path, encoding='utf-8') as f:
+            self.products = json.load(f)
+
+    def search_results_many(self, queries, top_k=20, min_score=0.60):
+        return [[MatchResult(product, 1.0, idx, {'bert_score': 1.0}) for idx, product in enumerate(self.products)
+                 if product['default_code'] in query] for query in queries]
+
+    def get_stats(self):
+        return {'bert_model': self.model_name, 'bert_model_version': self.model_version, 'bert_device': 'cpu'}
+
+
+def test_model_host():
+    """Workers get the host's results; HybridMatcher loads BERT only on first query"""
+    print("=" * 80)
+    print("TEST: Model host + lazy BERT loading")
+    print("=" * 80)
+
+    assert parse_address("127.0.0.1:6011") == ("127.0.0.1", 6011)
+    assert parse_address(":7000") == ("127.0.0.1", 7000)
+
+    fake = FakeBertMatcher()
+
+    # No shared secret configured: neither side starts
+    key = os.environ.pop('BERT_MODEL_HOST_KEY', None)
+    for start in (lambda: ModelHost(fake, "127.0.0.1:0"), lambda: RemoteBertMatcher("127.0.0.1:1")):
+        try:
+            start()
+            assert False, "started without BERT_MODEL_HOST_KEY"
+        except ValueError as e:
+            assert 'BERT_MODEL_HOST_KEY' in str(e)
+    os.environ['BERT_MODEL_HOST_KEY'] = key or 'test-model-host-key'
+
+    host = ModelHost(fake, "127.0.0.1:0")
+    threading.Thread(target=host.serve_forever, daemon=True).start()
+
+    try:
+        remote = RemoteBertMatcher(host.address)
+        assert remote.model_name == 'fake-model'
+
+        results = remote.search_results_many(['duro seal', 'cushion mount 457mm', 'nothing'], top_k=5, min_score=0.5)
+        assert [[r.product['default_code'] for r in rs] for rs in results] == [['SDS025'], ['E1015'], []]
+        assert remote.search('duro seal grey', min_score=0.5)[0]['bert_score'] == 1.0
+        assert remote.get_stats()['bert_model_host'] == host.address
+        remote.close()
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            products_path = os.path.join(tmp_dir, 'products.json')
+            with open(products_path, 'w', encoding='utf-8') as f:
+                json.dump(PRODUCTS, f)
+
+            os.environ['BERT_MODEL_HOST'] = host.address
+            try:
+                matcher = HybridMatcher(products_path, use_bert=True)
+                assert matcher.get_stats()['bert_loaded'] is False
+                calls = fake.calls
+
+                results = matcher.search('Duro Seal Bobst', top_k=1, min_score=0.1)
+                assert results and results[0]['default_code'] == 'SDS025'
+                assert fake.calls == calls + 1
+                assert matcher.get_stats()['bert_loaded'] is True
+            finally:
+                del os.environ['BERT_MODEL_HOST']
+    finally:
+        host.close()
+        if key is None:
+            del os.environ['BERT_MODEL_HOST_KEY']
+
+    print("OK model host serves worker searches, BERT loaded lazily")
+
+
+def test_model_host_reload():
+    """The host rebuilds its matcher after a catalog sync or a re-trained model"""
+    key = os.environ.get('BERT_MODEL_HOST_KEY')
+    os.environ['BERT_MODEL_HOST_KEY'] = key or 'test-model-host-key'
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        products_path = os.path.join(tmp_dir, 'products.json')
+        model_dir = os.path.join(tmp_dir, 'model')
+        os.makedirs(model_dir)
+        with open(os.path.join(model_dir, 'weights.bin'), 'w') as f:
+            f.write('v1')
+        with open(products_path, 'w', encoding='utf-8') as f:
+            json.dump(PRODUCTS, f)
+
+        loader = lambda: FileBertMatcher(products_path, model_dir)
+        host = ModelHost(loader(), "127.0.0.1:0", loader=loader)
+        threading.Thread(target=host.serve_forever, daemon=True).start()
+        try:
+            remote = RemoteBertMatcher(host.address)
+            version = remote.model_version
+            assert remote.search('SDS025', min_score=0.5)[0]['name'] == 'Duro Seal Bobst 16S Grey'
+
+            # Catalog sync rewrites the products file
+            renamed = [dict(PRODUCTS[0], name='Duro Seal Bobst 16S Black'), PRODUCTS[1]]
+            with open(products_path, 'w', encoding='utf-8') as f:
+                json.dump(renamed, f)
+            stat = os.stat(products_path)
+            os.utime(products_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+            assert remote.search('SDS025', min_score=0.5)[0]['name'] == 'Duro Seal Bobst 16S Black'
+            assert host.reloads == 1 and remote.model_version == version
+
+            # Re-trained model published in place: workers see the new version
+            weights = os.path.join(model_dir, 'weights.bin')
+            stat = os.stat(weights)
+            os.utime(weights, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+            stats = remote.get_stats()
+            assert stats['bert_model_host_reloads'] == 2
+            assert remote.model_version == stats['bert_model_version'] != version
+
+            # Nothing changed: no reload
+            remote.search('E1015')
+            assert host.reloads == 2
+            remote.close()
+        finally:
+            host.close()
+            if key is None:
+                del os.environ['BERT_MODEL_HOST_KEY']
+
+    print("OK model host reloads changed catalogs and models")
+
+
+if __name__ == "__main__":
+    test_model_host()
+    test_model_host_reload()
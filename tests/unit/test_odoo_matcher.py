@@ -0,0 +1,168 @@
+"""
+Test batched product verification in OdooMatcher against the per-line lookups
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from orchestrator.odoo_matcher import OdooMatcher
+from retriever_module.odoo_connector import OdooConnector
+
+
+class FakeModels:
+    """In-memory product.product with the search_read domains OdooConnector uses"""
+
+    def __init__(self, products, templates=()):
+        self.products = products
+        self.templates = {p['product_tmpl_id'][0] for p in products} | set(templates)
+        self.calls = 0
+
+    def _matches(self, product, condition):
+        field, operator, value = condition
+        actual = product.get(field)
+        if field == 'product_tmpl_id':
+            actual = actual[0]
+        if operator == '=':
+            return actual == value
+        if operator == 'in':
+            return actual in value
+        if operator == 'ilike':
+            return bool(actual) and str(value).lower() in str(actual).lower()
+        raise ValueError(operator)
+
+    def _filter(self, domain):
+        if domain and domain[0] == '|':
+            return [p for p in self.products if self._matches(p, domain[1]) or self._matches(p, domain[2])]
+        return [p for p in self.products if all(self._matches(p, c) for c in domain)]
+
+    def execute_kw(self, db, uid, password, model, method, args, kwargs=None):
+        self.calls += 1
+        assert model == 'product.product'
+        if method == 'create':
+            if args[0]['product_tmpl_id'] not in self.templates:
+                raise ValueError("Missing required product template")
+            new_id = max(p['id'] for p in self.products) + 1
+            self.products.append({'id': new_id, 'name': f"Variant {new_id}", 'default_code': False,
+                                  'product_tmpl_id': [args[0]['product_tmpl_id'], 'Template']})
+            return new_id
+        found = sorted(self._filter(args[0]), key=lambda p: (p.get('default_code') or '', p['name'], p['id']))
+        limit = (kwargs or {}).get('limit')
+        return [dict(p) for p in (found[:limit] if limit else found)]
+
+
+def _make_connector(products, templates=()):
+    connector = OdooConnector.__new__(OdooConnector)
+    connector.db, connector.uid, connector.password = 'db', 1, 'pw'
+    connector.mirror = None
+    connector.models = FakeModels(products, templates)
+    return connector
+
+
+def _reference_products(odoo, json_products):
+    """Old match_in_odoo product loop (one lookup per line) used as reference"""
+    matches = []
+    for json_product in json_products:
+        json_odoo_id = json_product.get('id')
+        name = json_product.get('name', 'Unknown')[:50]
+        code = json_product.get('default_code', 'N/A')
+        steps = [('json_id_verified', {'product_id': json_odoo_id}),
+                 ('code_fallback', {'product_code': code}),
+                 ('name_fallback', {'product_name': name})] if json_odoo_id else \
+                [('code_no_json_id', {'product_code': code if code and code != 'N/A' else None}),
+                 ('name_no_json_id', {'product_name': name})]
+        match = None
+        for method, kwargs in steps:
+            if not any(kwargs.values()):
+                continue
+            results = odoo.query_products(**kwargs)
+            if results:
+                match = {'found': True, 'id': results[0].get('id'), 'name': results[0].get('name'),
+                         'code': results[0].get('default_code'), 'match_method': method,
+                         'json_match_score': json_product.get('match_score', 'N/A')}
+                break
+        matches.append(match or {'found': False, 'id': None, 'name': name, 'code': code,
+                                 'match_method': 'not_found',
+                                 'json_match_score': json_product.get('match_score', 'N/A')})
+    return matches
+
+
+def _catalog():
+    return [
+        {'id': 11, 'name': 'Doctor Blade Gold 35x0.20', 'default_code': 'L1335', 'product_tmpl_id': [1, 'L1335']},
+        {'id': 12, 'name': 'Cushion Mount 457mm', 'default_code': 'E1015', 'product_tmpl_id': [2, 'E1015']},
+        {'id': 13, 'name': 'Cushion Mount 457mm blue', 'default_code': 'E1015-B', 'product_tmpl_id': [2, 'E1015']},
+        {'id': 14, 'name': 'Duro Seal Bobst', 'default_code': 'SDS025', 'product_tmpl_id': [3, 'SDS025']},
+        {'id': 15, 'name': 'Foam Seal 120x31', 'default_code': 'SDS2601', 'product_tmpl_id': [4, 'SDS2601']},
+    ]
+
+
+def _run_both(json_products, templates=()):
+    """Per-line reference and batched OdooMatcher on the same fake connector (reset in between)"""
+    odoo = _make_connector(_catalog(), templates)
+    catalog = [dict(p) for p in odoo.models.products]
+
+    expected = _reference_products(odoo, json_products)
+    reference_calls = odoo.models.calls
+
+    odoo.models.products = [dict(p) for p in catalog]
+    odoo.models.calls = 0
+    result = OdooMatcher(odoo).match_in_odoo({'json_data': {'products': json_products}}, {})
+    assert result['products'] == expected
+    return result, reference_calls, odoo.models.calls
+
+
+def test_batched_product_matching():
+    """Batched lookups give the per-line results with far fewer Odoo calls"""
+    print("=" * 80)
+    print("TEST: OdooMatcher batched product verification")
+    print("=" * 80)
+
+    json_products = [
+        {'id': 1, 'name': 'Doctor Blade Gold 35x0.20', 'default_code': 'L1335', 'match_score': 0.97},
+        {'id': 2, 'name': 'Cushion Mount 457mm', 'default_code': 'E1015', 'match_score': 0.91},
+        {'id': 99, 'name': 'Duro Seal Bobst', 'default_code': 'SDS025', 'match_score': 0.88},  # stale ID
+        {'id': 98, 'name': 'Foam Seal 120x31', 'default_code': 'SDS9999'},  # stale ID and code
+        {'name': 'Duro Seal Bobst', 'default_code': 'SDS025'},  # no ID
+        {'name': 'Foam Seal', 'default_code': 'N/A'},  # no ID, no code
+        {'id': 97, 'name': 'Unknown Widget', 'default_code': 'X-1'},  # not found
+        {'id': 1, 'name': 'Doctor Blade Gold 35x0.20', 'default_code': 'L1335'},  # repeated line
+        {'id': 96, 'name': 'Cushion Mount', 'default_code': 'E1015-'},  # stale ID
+        {'name': 'Duro Seal', 'default_code': 'SDS025X'},  # no ID
+    ]
+    result, reference_calls, calls = _run_both(json_products)
+    # query_products(product_code=...) currently finds nothing (it calls the undefined
+    # _normalize_product_code), so lines not verified by ID are matched by name
+    assert [p['match_method'] for p in result['products']] == [
+        'json_id_verified', 'json_id_verified', 'name_fallback', 'name_fallback',
+        'name_no_json_id', 'name_no_json_id', 'not_found', 'json_id_verified',
+        'name_fallback', 'name_no_json_id']
+    assert [p['id'] for p in result['products']][-2:] == [12, 14]
+    assert result['match_summary'] == {'customer_matched': False, 'products_matched': 9, 'products_total': 10}
+    assert calls < reference_calls
+
+    # All lines verified by ID: a single Odoo call
+    verified_only = [p for p in json_products if p.get('id') in (1, 2)] * 5
+    result, _, calls = _run_both(verified_only)
+    assert calls == 1
+
+    # Template without variant: the lookup creates it, and lines after it find the
+    # new variant (by code and by name) exactly like per-line lookups
+    created = [
+        {'id': 95, 'name': 'Variant', 'default_code': 'N/A'},  # before the variant exists: not found
+        {'id': 5, 'name': 'Tmpl'},
+        {'name': 'Variant', 'default_code': 'N/A'},
+        {'id': 5, 'name': 'Tmpl'},
+    ]
+    result, _, _ = _run_both(created, templates=[5])
+    assert [p['match_method'] for p in result['products']] == [
+        'not_found', 'json_id_verified', 'name_no_json_id', 'json_id_verified']
+    assert result['products'][1]['id'] == result['products'][2]['id'] == 16
+
+    print(f"OK Batched product matching ({calls} calls)")
+
+
+if __name__ == "__main__":
+    test_batched_product_matching()
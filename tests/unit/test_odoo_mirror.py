@@ -0,0 +1,307 @@
+"""
+Test the local Odoo mirror: searches against Odoo's answers, write_date syncs and persistence
+"""
+
+import sys
+import time
+import tempfile
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from retriever_module.odoo_connector import OdooConnector, PRODUCT_FIELDS, PARTNER_FIELDS
+from retriever_module.odoo_mirror import OdooMirror
+
+
+def _order(model):
+    if model == 'res.partner':
+        return lambda r: ((r.get('complete_name') or '').lower(), -r['id'])
+    return lambda r: (not r.get('is_favorite'), not r.get('default_code'), r.get('default_code') or '', r.get('name') or '',
+                      r['id'])
+
+
+class FakeOdoo:
+    """In-memory Odoo models answering execute(model, method, args, kwargs)"""
+
+    def __init__(self):
+        self.records = {
+            'res.partner': [
+                {'id': 1, 'name': 'Müller Druck GmbH', 'complete_name': 'Müller Druck GmbH', 'email': 'info@mueller.de',
+                 'phone': '+49 711 1234567', 'street': 'Industriestraße 5', 'city': 'Stuttgart', 'zip': '70565',
+                 'country_id': [57, 'Germany'], 'is_company': True},
+                {'id': 2, 'name': 'Hans Müller', 'complete_name': 'Müller Druck GmbH, Hans Müller',
+                 'email': 'hans@mueller.de', 'phone': False, 'street': False, 'city': False, 'zip': False,
+                 'country_id': False, 'is_company': False},
+                {'id': 3, 'name': 'Flexo Pack AG', 'complete_name': 'Flexo Pack AG', 'email': 'order@flexopack.ch',
+                 'phone': '+41 44 5556677', 'street': 'Hauptstrasse 12', 'city': 'Zürich', 'zip': '8004',
+                 'country_id': [43, 'Switzerland'], 'is_company': True},
+                {'id': 4, 'name': 'Flexo Pack AG', 'complete_name': 'Flexo Pack AG', 'email': False,
+                 'phone': False, 'street': 'Hauptstrasse 12', 'city': 'Zürich', 'zip': '8004',
+                 'country_id': [43, 'Switzerland'], 'is_company': True},
+            ],
+            'product.product': [
+                {'id': 10, 'name': 'Doctor Blade Gold 35x0.20', 'default_code': 'G-35-20-RPE-L1335',
+                 'lst_price': 12.5, 'standard_price': 6.0, 'product_tmpl_id': [110, 'Doctor Blade Gold']},
+                {'id': 11, 'name': 'Foam Seal 120x31', 'default_code': 'SDS2601',
+                 'lst_price': 3.0, 'standard_price': 1.0, 'product_tmpl_id': [111, 'Foam Seal']},
+                {'id': 12, 'name': 'Foam Seal 120x31 black', 'default_code': 'SDS2601B',
+                 'lst_price': 3.2, 'standard_price': 1.1, 'product_tmpl_id': [112, 'Foam Seal black']},
+                {'id': 13, 'name': 'Mounting Tape 3M 9353R', 'default_code': False,
+                 'lst_price': 40.0, 'standard_price': 20.0, 'product_tmpl_id': [113, 'Mounting Tape']},
+                {'id': 14, 'name': 'Doctor Blade Carbon 40x0.20', 'default_code': 'C-40-20-RPE-L1335',
+                 'lst_price': 9.0, 'standard_price': 4.0, 'product_tmpl_id': [114, 'Doctor Blade Carbon']},
+            ],
+        }
+        for model, records in self.records.items():
+            for record in records:
+                record.update({'active': True, 'write_date': f"2025-01-{record['id']:02d} 08:00:00"})
+                if model == 'product.product':
+                    record['is_favorite'] = record['id'] == 14  # listed first by Odoo
+        # product.template write_date by template ID
+        self.template_write_dates = {}
+        self.calls = []
+        self.down = False
+
+    def _condition(self, record, condition):
+        field, operator, value = condition
+        if field == 'product_tmpl_id.write_date':
+            template_id = record['product_tmpl_id'][0]
+            actual = self.template_write_dates.get(template_id, '2025-01-01 08:00:00')
+        else:
+            actual = record.get(field)
+        if isinstance(actual, list):
+            actual = actual[0] if operator != 'ilike' else actual[1]
+        if operator == '=':
+            return actual == value
+        if operator == 'in':
+            return actual in value
+        if operator == 'ilike':
+            return bool(actual) and str(value).lower() in str(actual).lower()
+        if operator == '>':
+            return actual > value
+        if operator == '>=':
+            return actual >= value
+        raise ValueError(operator)
+
+    def _evaluate(self, domain, record):
+        def node(i):
+            if domain[i] in ('|', '&'):
+                left, j = node(i + 1)
+                right, j = node(j)
+                return (left or right) if domain[i] == '|' else (left and right), j
+            return self._condition(record, domain[i]), i + 1
+
+        i, result = 0, True
+        while i < len(domain):
+            value, i = node(i)
+            result = result and value
+        return result
+
+    def execute(self, model, method, args, kwargs):
+        self.calls.append((model, method))
+        if self.down:
+            raise ConnectionError("Odoo unavailable")
+        records = [r for r in self.records[model] if r['active'] and self._evaluate(args[0], r)]
+        if method == 'search':
+            return [r['id'] for r in records]
+        order = kwargs.get('order')
+        records.sort(key=(lambda r: r['id']) if order == 'id' else _order(model))
+        if kwargs.get('limit'):
+            records = records[:kwargs['limit']]
+        fields = set(kwargs.get('fields') or []) | {'id'}
+        return [{k: v for k, v in r.items() if k in fields} for r in records]
+
+    def execute_kw(self, db, uid, password, model, method, args, kwargs=None):
+        return self.execute(model, method, args, kwargs or {})
+
+
+DOMAINS = [
+    ('product.product', [['default_code', '=', 'SDS2601']], PRODUCT_FIELDS, 20),
+    ('product.product', [['default_code', 'ilike', 'sds26']], PRODUCT_FIELDS, 20),
+    ('product.product', [['name', 'ilike', 'doctor blade']], PRODUCT_FIELDS, 1),
+    ('product.product', ['|', ['name', 'ilike', '9353r'], ['default_code', 'ilike', '9353r']], PRODUCT_FIELDS, 20),
+    ('product.product', [['product_tmpl_id', 'in', [110, 112, 999]]], PRODUCT_FIELDS, None),
+    ('product.product', [['product_tmpl_id', '=', 113]], PRODUCT_FIELDS, 20),
+    ('res.partner', [['name', 'ilike', 'flexo'], ['is_company', '=', True]], PARTNER_FIELDS, 5),
+    ('res.partner', ['|', '|', ['zip', '=', '70565'], ['email', '=', 'hans@mueller.de'],
+                     ['name', 'ilike', 'MÜLLER']], PARTNER_FIELDS + ['is_company'], None),
+    ('res.partner', [['id', '=', 3]], PARTNER_FIELDS, 1),
+    ('res.partner', [['phone', 'ilike', '1234567']], PARTNER_FIELDS, 5),
+]
+
+
+def test_mirror_search():
+    """Mirror answers equal Odoo's, without calling Odoo once loaded"""
+    odoo = FakeOdoo()
+    mirror = OdooMirror(None, odoo.execute, ttl=300)
+
+    for model, domain, fields, limit in DOMAINS:
+        kwargs = {'fields': fields, 'limit': limit} if limit else {'fields': fields}
+        expected = odoo.execute(model, 'search_read', [domain], kwargs)
+        calls = len(odoo.calls)
+        assert mirror.search_read(model, domain, fields, limit) == expected, domain
+        assert all(call == (model, 'search_read') for call in odoo.calls[calls:])
+
+    # One full load per model, then local answers only
+    assert len([call for call in odoo.calls if call[1] == 'search_read']) == len(DOMAINS) + 2
+    assert mirror.stats()['local_hits'] == len(DOMAINS)
+
+    # Not mirrored: fields, operators, wildcards, models
+    assert mirror.search_read('product.product', [], ['id', 'barcode']) is None
+    assert mirror.search_read('product.product', [['name', 'not ilike', 'x']], PRODUCT_FIELDS) is None
+    assert mirror.search_read('product.product', [['name', 'ilike', '100%']], PRODUCT_FIELDS) is None
+    assert mirror.search_read('sale.order', [], ['id']) is None
+
+
+def test_mirror_order():
+    """Favourites first; hits ordered by how text collates go to Odoo"""
+    odoo = FakeOdoo()
+    mirror = OdooMirror(None, odoo.execute, ttl=300)
+    domain = [['name', 'ilike', 'doctor blade']]
+    assert [p['id'] for p in mirror.search_read('product.product', domain, ['id'])] == [14, 10]
+    assert mirror.search_read('product.product', domain, ['id'], 1) == [{'id': 14}]
+
+    # 'sds-2601' / 'SDS2601': case and punctuation decide, PostgreSQL's collation may differ
+    odoo.records['product.product'].append({
+        'id': 16, 'name': 'Foam Seal 120x31', 'default_code': 'sds-2601', 'lst_price': 3.0, 'standard_price': 1.0,
+        'product_tmpl_id': [116, 'Foam Seal'], 'is_favorite': False, 'active': True,
+        'write_date': time.strftime('%Y-%m-%d %H:%M:%S')
+    })
+    mirror.ttl = 0
+    assert mirror.sync('product.product')
+    mirror.ttl = 300
+    fallbacks = mirror.stats()['fallbacks']
+    assert mirror.search_read('product.product', [['default_code', 'ilike', '2601']], ['id']) is None
+    assert mirror.search_read('product.product', [['name', 'ilike', 'foam seal']], ['id']) is None
+    assert mirror.stats()['fallbacks'] == fallbacks + 2
+    # One hit, or hits whose order does not depend on the collation: answered locally
+    assert mirror.search_read('product.product', [['default_code', '=', 'sds-2601']], ['id']) == [{'id': 16}]
+    assert mirror.search_read('product.product', [['product_tmpl_id', 'in', [110, 116]]], ['id']) == \
+        [{'id': 10}, {'id': 16}]
+
+
+def test_mirror_sync():
+    """write_date syncs in pages pick up changes, archivals and deletions"""
+    odoo = FakeOdoo()
+    mirror = OdooMirror(None, odoo.execute, ttl=300, max_stale=0, batch_size=2)
+    fields = ['id', 'name', 'default_code']
+
+    assert len(mirror.search_read('product.product', [], fields)) == 5
+    assert odoo.calls.count(('product.product', 'search_read')) == 3  # 5 records, pages of 2
+
+    products = {p['id']: p for p in odoo.records['product.product']}
+    products[11].update({'name': 'Foam Seal 120x31 grey', 'write_date': '2025-03-01 09:00:00'})
+    products[12].update({'active': False, 'write_date': '2025-03-01 09:00:00'})
+    odoo.records['product.product'].remove(products[13])
+    odoo.records['product.product'].append({
+        'id': 15, 'name': 'Doctor Blade Gold 25x0.20', 'default_code': 'G-25-20-RPE-L1020', 'lst_price': 11.0,
+        'standard_price': 5.0, 'product_tmpl_id': [115, 'Doctor Blade Gold 25'], 'active': True,
+        'write_date': '2025-03-01 09:05:00'
+    })
+
+    # Still fresh: old answer without calling Odoo
+    calls = len(odoo.calls)
+    assert mirror.search_read('product.product', [['id', '=', 13]], fields)
+    assert len(odoo.calls) == calls
+
+    mirror.ttl = 0
+    found = mirror.search_read('product.product', [], fields)
+    assert found == odoo.execute('product.product', 'search_read', [[]], {'fields': fields})
+    # Records written since the watermark (14, 11, 15) in two pages, then the active IDs
+    assert odoo.calls[calls:calls + 3] == [('product.product', 'search_read')] * 2 + [('product.product', 'search')]
+    assert mirror._watermarks['product.product'] == '2025-03-01 09:05:00'
+
+    # Odoo down and mirror too stale: not answered (connector asks Odoo)
+    odoo.down = True
+    assert mirror.search_read('product.product', [], fields) is None
+
+    # Stale within max_stale: answered locally while a background sync runs
+    mirror.max_stale = 3600
+    assert len(mirror.search_read('product.product', [], fields)) == 4
+
+
+def test_mirror_template_change():
+    """Variants are re-fetched when only their template was written"""
+    odoo = FakeOdoo()
+    mirror = OdooMirror(None, odoo.execute, ttl=0, max_stale=0)
+    fields = ['id', 'name', 'lst_price']
+    assert mirror.search_read('product.product', [['id', '=', 11]], fields)[0]['name'] == 'Foam Seal 120x31'
+
+    # Template renamed and repriced: the variant's own write_date stays the same
+    products = {p['id']: p for p in odoo.records['product.product']}
+    products[11].update({'name': 'Foam Seal 120x31 v2', 'lst_price': 3.5})
+    odoo.template_write_dates[111] = '2025-03-01 09:00:00'
+
+    odoo.calls.clear()
+    assert mirror.search_read('product.product', [['id', '=', 11]], fields) == \
+        [{'id': 11, 'name': 'Foam Seal 120x31 v2', 'lst_price': 3.5}]
+    assert odoo.calls == [('product.product', 'search_read'), ('product.product', 'search')]
+    assert mirror.search_read('product.product', [['name', 'ilike', 'v2']], ['id']) == [{'id': 11}]
+
+
+def test_mirror_persistence():
+    """A new process answers from the SQLite file while it is fresh"""
+    odoo = FakeOdoo()
+    with tempfile.TemporaryDirectory() as cache_dir:
+        db_path = str(Path(cache_dir) / "odoo_mirror.sqlite")
+        mirror = OdooMirror(db_path, odoo.execute, ttl=300)
+        expected = mirror.search_read('res.partner', [['name', 'ilike', 'flexo']], PARTNER_FIELDS)
+        mirror.close()
+
+        odoo.down = True
+        restarted = OdooMirror(db_path, odoo.execute, ttl=300)
+        assert restarted.search_read('res.partner', [['name', 'ilike', 'flexo']], PARTNER_FIELDS) == expected
+        assert restarted.stats()['syncs'] == 0
+
+        # Expired: a write_date sync (not a full load) brings it up to date
+        odoo.down = False
+        odoo.calls.clear()
+        restarted.ttl = 0
+        restarted.max_stale = 0
+        assert restarted.search_read('res.partner', [['id', '=', 1]], PARTNER_FIELDS)
+        assert odoo.calls == [('res.partner', 'search_read'), ('res.partner', 'search')]
+        restarted.close()
+
+
+def test_connector_mirror():
+    """OdooConnector product and customer queries are answered from the mirror"""
+    odoo = FakeOdoo()
+    connector = OdooConnector.__new__(OdooConnector)
+    connector.db, connector.uid, connector.password = 'db', 1, 'pw'
+    connector.models = odoo
+    connector.mirror = OdooMirror(None, odoo.execute, ttl=300)
+
+    live = OdooConnector.__new__(OdooConnector)
+    live.db, live.uid, live.password, live.models, live.mirror = 'db', 1, 'pw', odoo, None
+
+    # Load both models, then count Odoo calls
+    connector.mirror.sync('res.partner')
+    connector.mirror.sync('product.product')
+    odoo.calls.clear()
+
+    for kwargs in [{'product_code': 'SDS2601'}, {'product_name': 'Doctor Blade'}, {'product_id': 110}]:
+        assert connector.query_products(**kwargs) == live.query_products(**kwargs), kwargs
+    for kwargs in [{'company_name': 'Flexo Pack'}, {'company_name': 'Nobody', 'zip_code': '70565'},
+                   {'customer_name': 'hans', 'email': 'hans@mueller.de'}]:
+        assert connector.query_customer_info(**kwargs) == live.query_customer_info(**kwargs), kwargs
+    # live answers only (the product_code lookup fails before searching: no _normalize_product_code)
+    assert odoo.calls.count(('product.product', 'search_read')) == 2
+    assert odoo.calls.count(('res.partner', 'search_read')) == 3
+
+    # A template without variant in the mirror is checked in Odoo before creating one
+    odoo.records['product.product'].append({
+        'id': 16, 'name': 'New Blade', 'default_code': 'N-1', 'lst_price': 1.0, 'standard_price': 1.0,
+        'product_tmpl_id': [116, 'New Blade'], 'active': True, 'write_date': time.strftime('%Y-%m-%d %H:%M:%S')
+    })
+    assert connector.query_products(product_id=116)[0]['id'] == 16
+
+
+if __name__ == "__main__":
+    test_mirror_search()
+    test_mirror_order()
+    test_mirror_sync()
+    test_mirror_template_change()
+    test_mirror_persistence()
+    test_connector_mirror()
+    print("[OK] Odoo mirror tests passed")
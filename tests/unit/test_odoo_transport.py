@@ -0,0 +1,179 @@
+"""
+Test the keep-alive XML-RPC transport and OdooConnector reconnects against a stub server
+"""
+
+import sys
+import threading
+import xmlrpc.client
+from pathlib import Path
+from socketserver import ThreadingMixIn
+from xmlrpc.server import SimpleXMLRPCServer, SimpleXMLRPCRequestHandler
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from retriever_module.odoo_connector import OdooConnector
+from retriever_module.odoo_transport import ConnectionPool, PooledTransport
+
+
+class StubOdoo(ThreadingMixIn, SimpleXMLRPCServer):
+    """Odoo XML-RPC stub counting connections; uid changes on every authenticate"""
+
+    daemon_threads = True
+
+    def __init__(self, requests_per_connection=None):
+        server = self
+        self.connections = 0
+        self.authentications = 0
+
+        class Handler(SimpleXMLRPCRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            rpc_paths = ('/xmlrpc/2/common', '/xmlrpc/2/object')
+
+            def setup(self):
+                super().setup()
+                server.connections += 1
+                self.served = 0
+
+            def handle_one_request(self):
+                super().handle_one_request()
+                self.served += 1
+                if requests_per_connection and self.served >= requests_per_connection:
+                    # Drop the connection without telling the client (idle timeout on the server)
+                    self.close_connection = True
+
+            def log_message(self, *args):
+                pass
+
+        super().__init__(('127.0.0.1', 0), requestHandler=Handler, logRequests=False, allow_none=True)
+        self.register_function(self.authenticate, 'authenticate')
+        self.register_function(self.execute_kw, 'execute_kw')
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        return f"http://{self.server_address[0]}:{self.server_address[1]}"
+
+    def authenticate(self, db, login, password, context):
+        self.authentications += 1
+        return 100 + self.authentications
+
+    def execute_kw(self, db, uid, password, model, method, args, kwargs=None):
+        if uid != 100 + self.authentications:
+            raise xmlrpc.client.Fault(3, "odoo.exceptions.AccessDenied: Access Denied")
+        if method == 'fail':
+            raise xmlrpc.client.Fault(1, "ValueError: bad domain")
+        return [{'id': 1, 'model': model, 'method': method}]
+
+
+def _proxy(server, transport):
+    return xmlrpc.client.ServerProxy(f"{server.url}/xmlrpc/2/object", transport=transport)
+
+
+def test_pooled_transport():
+    """Calls share keep-alive connections; dropped connections are retried"""
+    print("=" * 80)
+    print("TEST: PooledTransport keep-alive")
+    print("=" * 80)
+
+    server = StubOdoo()
+    try:
+        pool = ConnectionPool(pool_size=2)
+        transport = PooledTransport(pool)
+        uid = xmlrpc.client.ServerProxy(f"{server.url}/xmlrpc/2/common", transport=transport).authenticate('db', 'u', 'p', {})
+        models = _proxy(server, transport)
+        for _ in range(20):
+            assert models.execute_kw('db', uid, 'p', 'res.partner', 'search_read', [[]])[0]['model'] == 'res.partner'
+        # A fault is a complete response: the connection stays in the pool
+        try:
+            models.execute_kw('db', uid, 'p', 'res.partner', 'fail', [[]])
+            assert False, "Fault expected"
+        except xmlrpc.client.Fault:
+            pass
+        models.execute_kw('db', uid, 'p', 'res.partner', 'search_read', [[]])
+        assert server.connections == 1
+        assert pool.stats() == {'created': 1, 'reused': 22, 'idle': 1}
+
+        # Threads share the pool (at most pool_size idle connections are kept)
+        errors = []
+
+        def worker():
+            try:
+                for _ in range(10):
+                    _proxy(server, transport).execute_kw('db', uid, 'p', 'product.product', 'search_read', [[]])
+            except Exception as e:
+                errors.append(e)
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not errors and pool.stats()['idle'] <= 2
+
+        # Idle timeout: expired connections are not reused
+        expiring = ConnectionPool(idle_timeout=-1)
+        models = _proxy(server, PooledTransport(expiring))
+        for _ in range(3):
+            models.execute_kw('db', uid, 'p', 'res.partner', 'search_read', [[]])
+        assert expiring.stats()['created'] == 3 and expiring.stats()['reused'] == 0
+        pool.close()
+        assert pool.stats()['idle'] == 0
+    finally:
+        server.shutdown()
+
+    # Server drops every connection after one request: the reused connection fails, retried on a new one
+    server = StubOdoo(requests_per_connection=1)
+    try:
+        pool = ConnectionPool()
+        models = _proxy(server, PooledTransport(pool))
+        uid = 100
+        for _ in range(5):
+            assert models.execute_kw('db', uid, 'p', 'res.partner', 'search_read', [[]])
+        assert server.connections == 5
+    finally:
+        server.shutdown()
+
+    print("OK PooledTransport keeps connections alive")
+
+
+def test_connector_reconnect():
+    """OdooConnector re-authenticates and repeats the call after AccessDenied"""
+    print("=" * 80)
+    print("TEST: OdooConnector reconnect")
+    print("=" * 80)
+
+    server = StubOdoo()
+    try:
+        connector = OdooConnector.__new__(OdooConnector)
+        connector.config = {}
+        connector.url, connector.db, connector.username, connector.password = server.url, 'db', 'u', 'p'
+        connector.pool = ConnectionPool()
+        connector.mirror = None
+        connector._reconnect_lock = threading.Lock()
+        connector._connect()
+        assert connector.uid == 101
+
+        # Session lost on the server (e.g. Odoo restarted): the next call re-authenticates
+        server.authentications += 1
+        result = connector.execute_custom_query('res.partner', [], ['id'])
+        assert result and result[0]['model'] == 'res.partner'
+        assert connector.uid == 103 and server.authentications == 3
+
+        # Other faults are not retried
+        try:
+            connector.models.execute_kw(connector.db, connector.uid, connector.password, 'res.partner', 'fail', [[]])
+            assert False, "Fault expected"
+        except xmlrpc.client.Fault:
+            assert server.authentications == 3
+
+        connector.close()
+        assert connector.pool.stats()['idle'] == 0
+    finally:
+        server.shutdown()
+
+    print("OK OdooConnector reconnects")
+
+
+if __name__ == "__main__":
+    test_pooled_transport()
+    test_connector_reconnect()
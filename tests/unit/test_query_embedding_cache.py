@@ -0,0 +1,70 @@
+"""
+Test the persistent BERT query embedding cache
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from retriever_module.query_embedding_cache import QueryEmbeddingCache, normalize_query
+
+
+def make_vectors(count, dimension=8, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((count, dimension)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_query_embedding_cache():
+    """LRU front, SQLite store across restarts, size-based eviction, counters"""
+    print("=" * 80)
+    print("TEST: QueryEmbeddingCache")
+    print("=" * 80)
+
+    assert normalize_query("  Doctor   Blade\t25x0.20 ") == "Doctor Blade 25x0.20"
+
+    queries = ['Doctor Blade 25x0.20', 'SDS025 Duro Seal', 'E1015 Cushion Mount 457mm']
+    vectors = make_vectors(len(queries))
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache_path = str(Path(cache_dir) / "query_embeddings.sqlite")
+
+        cache = QueryEmbeddingCache(cache_path, 'test/model', max_memory_entries=2)
+        assert cache.get_many(queries) == [None, None, None]
+        cache.put_many(queries, vectors)
+
+        # Memory LRU holds the two most recent queries, the first comes from disk
+        found = cache.get_many(queries)
+        assert all(np.array_equal(a, b) for a, b in zip(found, vectors))
+        stats = cache.stats()
+        assert stats['misses'] == 3 and stats['hits'] + stats['disk_hits'] == 3
+        assert stats['disk_hits'] >= 1 and stats['disk_entries'] == 3
+
+        # New process: everything served from disk
+        restarted = QueryEmbeddingCache(cache_path, 'test/model')
+        found = restarted.get_many(queries)
+        assert all(np.array_equal(a, b) for a, b in zip(found, vectors))
+        assert restarted.stats()['disk_hits'] == 3
+
+        # Other model never sees these vectors
+        assert QueryEmbeddingCache(cache_path, 'other-model').get_many(queries) == [None, None, None]
+
+        # Disk store keeps only the most recently used rows
+        bounded = QueryEmbeddingCache(cache_path, 'test/model', max_disk_entries=3)
+        bounded.get_many(queries[:1])
+        bounded.put_many(['L1520 DuploFLEX'], make_vectors(1, seed=1))
+        assert bounded.stats()['disk_entries'] == 3
+        fresh = QueryEmbeddingCache(cache_path, 'test/model')
+        assert fresh.get_many([queries[0]])[0] is not None
+        assert fresh.get_many(['L1520 DuploFLEX'])[0] is not None
+
+    print("OK QueryEmbeddingCache")
+
+
+if __name__ == "__main__":
+    test_query_embedding_cache()
@@ -0,0 +1,109 @@
+"""
+Test BERT vector index backends against brute force
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from retriever_module.vector_index import ExactIndex, IVFIndex, QuantizedIndex, create_vector_index
+
+
+def _embeddings(rng, count, dim=32):
+    vectors = rng.standard_normal((count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_exact_index():
+    """ExactIndex returns the full-sort top-k"""
+    print("=" * 80)
+    print("TEST: ExactIndex vs full sort")
+    print("=" * 80)
+
+    rng = np.random.default_rng(3)
+    embeddings = _embeddings(rng, 500)
+    queries = _embeddings(rng, 20)
+    index = ExactIndex(embeddings)
+
+    for top_k in (1, 20, 600):
+        for query, (indices, scores) in zip(queries, index.search(queries, top_k)):
+            similarities = embeddings @ query
+            expected = np.argsort(-similarities, kind='stable')[:top_k]
+            assert indices.tolist() == expected.tolist()
+            assert np.allclose(scores, similarities[expected], atol=1e-6)
+
+    print("OK ExactIndex identical to full sort")
+
+
+def test_ivf_index():
+    """IVF probing every cell is exact; the persisted index is reused"""
+    print("=" * 80)
+    print("TEST: IVFIndex")
+    print("=" * 80)
+
+    rng = np.random.default_rng(5)
+    embeddings = _embeddings(rng, 800)
+    queries = _embeddings(rng, 20)
+
+    exact = ExactIndex(embeddings).search(queries, 20)
+    ivf = IVFIndex(embeddings, nlist=16, nprobe=16)
+    ivf.build()
+    for (exact_ids, _), (ivf_ids, _) in zip(exact, ivf.search(queries, 20)):
+        assert ivf_ids.tolist() == exact_ids.tolist()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache_path = Path(cache_dir) / "embeddings_test_1.npy"
+        built = create_vector_index(embeddings, 'ivf', cache_path=cache_path, nlist=16, nprobe=4)
+        assert cache_path.with_suffix('.ivf.npz').exists()
+
+        loaded = create_vector_index(embeddings, 'ivf', cache_path=cache_path, nlist=16, nprobe=4)
+        assert np.array_equal(loaded.centroids, built.centroids)
+        assert np.array_equal(loaded.list_ids, built.list_ids)
+
+        # Different catalog size: stale index is rebuilt
+        rebuilt = create_vector_index(embeddings[:700], 'ivf', cache_path=cache_path, nlist=16)
+        assert rebuilt.list_ids.shape == (700,)
+
+    assert isinstance(create_vector_index(embeddings, 'unknown'), ExactIndex)
+    print("OK IVFIndex exact with full probing, cache reused")
+
+
+def test_quantized_index():
+    """int8/float16 scans with float32 re-scoring return the exact top-k and scores"""
+    print("=" * 80)
+    print("TEST: QuantizedIndex vs exact")
+    print("=" * 80)
+
+    rng = np.random.default_rng(9)
+    embeddings = _embeddings(rng, 1000, dim=64)
+    queries = _embeddings(rng, 20, dim=64)
+    exact = ExactIndex(embeddings).search(queries, 20)
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache_path = Path(cache_dir) / "embeddings_test_1.npy"
+        for dtype in ('int8', 'float16'):
+            index = create_vector_index(embeddings, 'exact', cache_path=cache_path, dtype=dtype)
+            assert isinstance(index, QuantizedIndex) and index.codes.dtype == np.dtype(dtype)
+            for (exact_ids, exact_scores), (ids, scores) in zip(exact, index.search(queries, 20)):
+                assert ids.tolist() == exact_ids.tolist()
+                assert np.allclose(scores, exact_scores, atol=1e-6)
+
+            # Second start memory-maps the persisted quantized matrix
+            loaded = create_vector_index(embeddings, 'exact', cache_path=cache_path, dtype=dtype)
+            assert isinstance(loaded.codes, np.memmap)
+            assert np.array_equal(loaded.codes, index.codes)
+
+    # Quantized storage only applies to the exact backend
+    assert isinstance(create_vector_index(embeddings, 'ivf', dtype='int8', nlist=4), IVFIndex)
+    print("OK QuantizedIndex identical to exact search")
+
+
+if __name__ == "__main__":
+    test_exact_index()
+    test_ivf_index()
+    test_quantized_index()
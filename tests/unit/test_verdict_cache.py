@@ -0,0 +1,138 @@
+"""
+Test the Level 5 AI verdict cache (TTL, LRU, persistence) and its use in VectorStore
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from retriever_module.verdict_cache import AIVerdictCache, NO_MATCH
+from retriever_module.vector_store import VectorStore
+
+
+CANDIDATES = [
+    {'id': 1, 'default_code': 'SDS025', 'name': 'Duro Seal Bobst'},
+    {'id': 2, 'default_code': 'E1015', 'name': 'Cushion Mount 457mm'},
+]
+
+
+class FakeAIMatcher:
+    """AI matcher double returning scripted replies"""
+
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.calls = 0
+        self.last_response_valid = False
+
+    def match_product(self, search_product, candidates):
+        self.calls += 1
+        reply = self.replies.pop(0)
+        self.last_response_valid = reply != 'invalid'
+        if reply in ('invalid', NO_MATCH):
+            return None
+        return {'product': candidates[reply], 'confidence': 0.8, 'reasoning': 'same part',
+                'requires_review': False}
+
+
+def test_verdict_cache():
+    """Verdicts expire, are evicted LRU and survive a reload from disk"""
+    print("=" * 80)
+    print("TEST: AI verdict cache")
+    print("=" * 80)
+
+    key = AIVerdictCache.make_key(' Duro  Seal ', 'sds-025', CANDIDATES)
+    assert key == AIVerdictCache.make_key('duro seal', 'SDS025', list(reversed(CANDIDATES)))
+    # A catalog edit to a shown candidate's code or name is a different question
+    renamed = [CANDIDATES[0], dict(CANDIDATES[1], name='Cushion Mount 600mm')]
+    recoded = [CANDIDATES[0], dict(CANDIDATES[1], default_code='E1020')]
+    assert len({key, AIVerdictCache.make_key('duro seal', 'SDS025', renamed),
+                AIVerdictCache.make_key('duro seal', 'SDS025', recoded)}) == 3
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache_path = os.path.join(tmp_dir, 'verdicts.json')
+
+        # TTL: expired verdicts are misses
+        cache = AIVerdictCache(cache_path=None, ttl_seconds=0.05)
+        cache.put('a', 1)
+        assert cache.get('a')['product_id'] == 1
+        time.sleep(0.1)
+        assert cache.get('a') is None
+        assert cache.stats() == {'entries': 0, 'hits': 1, 'misses': 1}
+
+        # LRU: reading 'a' keeps it, 'b' is evicted
+        cache = AIVerdictCache(cache_path=cache_path, max_entries=2)
+        cache.put('a', 1, 0.9, 'same part', False)
+        cache.put('b', NO_MATCH)
+        assert cache.get('a') is not None
+        cache.put('c', None)
+        assert cache.get('b') is None and cache.get('c') is not None
+
+        # Reload: entries, the no-match marker and a matched ID of None survive
+        cache.put('d', NO_MATCH)
+        reloaded = AIVerdictCache(cache_path=cache_path, max_entries=2)
+        assert reloaded.stats()['entries'] == 2
+        assert reloaded.get('a') is None
+        assert reloaded.get('c')['product_id'] is None
+        assert reloaded.get('d')['product_id'] == NO_MATCH
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            assert json.load(f)['d']['product_id'] == NO_MATCH
+
+        # Expired entries are dropped on load
+        expired = AIVerdictCache(cache_path=cache_path, ttl_seconds=0)
+        assert expired.stats()['entries'] == 0
+
+    print("OK verdicts expire, evict LRU and reload from disk")
+
+
+def test_vector_store_verdicts():
+    """Only real verdicts are cached; cached matches and no-matches skip the model"""
+    print("=" * 80)
+    print("TEST: VectorStore AI verdict caching")
+    print("=" * 80)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = VectorStore(customers_json=os.path.join(tmp_dir, 'customers.json'),
+                            products_json=os.path.join(tmp_dir, 'products.json'))
+        store._ai_verdict_cache = AIVerdictCache(cache_path=None)
+
+        # Invalid replies (API/parse failures) are not cached
+        matcher = FakeAIMatcher(['invalid', 1, NO_MATCH])
+        assert store._ai_match(matcher, 'Cushion Mount', 'E1015', CANDIDATES) is None
+        assert store._ai_verdict_cache.stats()['entries'] == 0
+
+        result = store._ai_match(matcher, 'Cushion Mount', 'E1015', CANDIDATES)
+        assert result['product']['id'] == 2 and matcher.calls == 2
+        cached = store._ai_match(matcher, 'Cushion Mount', 'E1015', CANDIDATES)
+        assert cached['product']['id'] == 2 and cached['confidence'] == 0.8
+        assert matcher.calls == 2
+
+        assert store._ai_match(matcher, 'Widget', 'W99', CANDIDATES) is None
+        assert store._ai_match(matcher, 'Widget', 'W99', CANDIDATES) is None
+        assert matcher.calls == 3
+        assert store._ai_verdict_cache.stats()['entries'] == 2
+
+        # A renamed candidate is a new question, even with the same IDs
+        renamed = [CANDIDATES[0], dict(CANDIDATES[1], name='Cushion Mount 600mm')]
+        matcher.replies = [1]
+        assert store._ai_match(matcher, 'Cushion Mount', 'E1015', renamed)['product'] is renamed[1]
+        assert matcher.calls == 4
+
+        # A cached match on a candidate without an ID is not read back as no match
+        unsaved = [CANDIDATES[0], dict(CANDIDATES[1], id=None)]
+        matcher.replies = [1]
+        assert store._ai_match(matcher, 'Cushion Mount', 'E1015', unsaved)['product'] is unsaved[1]
+        assert store._ai_match(matcher, 'Cushion Mount', 'E1015', unsaved)['product'] is unsaved[1]
+        assert matcher.calls == 5
+
+    print("OK only real verdicts are cached and reused")
+
+
+if __name__ == "__main__":
+    test_verdict_cache()
+    test_vector_store_verdicts()
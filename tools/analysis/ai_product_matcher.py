@@ -22,6 +22,10 @@ class AIProductMatcher:
         self.client = Mistral(api_key=os.getenv('MISTRAL_API_KEY'))
         self.model = "mistral-small-latest"
 
+        # True when the last match_product call got a parseable verdict
+        # (match or NO_MATCH), False on API/parse errors - used for caching
+        self.last_response_valid = False
+
     def match_product(self, search_product: Dict, candidates: List[Dict]) -> Optional[Dict]:
         """
         Use AI to match a product against candidates
@@ -33,6 +37,8 @@ class AIProductMatcher:
         Returns:
             Best match with confidence score or None
         """
+        self.last_response_valid = False
+
         if not candidates:
             return None
 
@@ -126,8 +132,14 @@ Your response (JSON only):"""
             confidence = result.get('confidence', 0) / 100.0  # Convert to 0-1
             reasoning = result.get('reasoning', '')
 
-            # Validate
-            if match_index == 0 or match_index > len(candidates):
+            # Validate (anything but 0 or a candidate number is not a verdict)
+            if isinstance(match_index, bool) or not isinstance(match_index, int) \
+                    or not 0 <= match_index <= len(candidates):
+                logger.warning(f"   [AI] Invalid match_index {match_index!r} for {len(candidates)} candidates")
+                return None
+
+            self.last_response_valid = True
+            if match_index == 0:
                 logger.info(f"   [AI] No match found. Reasoning: {reasoning}")
                 return None
 
@@ -144,7 +156,7 @@ Your response (JSON only):"""
                 'requires_review': confidence < 0.8
             }
 
-        except (json.JSONDecodeError, KeyError) as e:
+        except (json.JSONDecodeError, KeyError, TypeError, AttributeError) as e:
             logger.error(f"Failed to parse AI response: {e}")
             logger.debug(f"Response was: {response_text}")
             return None
@@ -196,36 +208,37 @@ Your response (JSON only):"""
             matches = re.findall(pattern, product_name, re.IGNORECASE)
             dimensions.extend([str(m) if isinstance(m, str) else 'x'.join(m) for m in matches])
 
+        # Substring lookups go through VectorStore's inverted indexes, which
+        # return matching products in catalog order (same as scanning products_data)
+        products = vector_store.products_data
+
         # Search by brands/key identifiers
         if brands:
             for brand, tag in brands:
-                for product in vector_store.products_data:
+                # Normalize brand for matching (remove spaces, case insensitive)
+                brand_normalized = brand.upper().replace(' ', '').replace('&', '')
+                for idx in vector_store.find_products_containing('brand', brand_normalized):
+                    product = products[idx]
                     if product.get('id') in seen_ids:
                         continue
-                    product_text = f"{product.get('name', '')} {product.get('default_code', '')}".upper()
-                    # Normalize brand for matching (remove spaces, case insensitive)
-                    brand_normalized = brand.upper().replace(' ', '').replace('&', '')
-                    product_normalized = product_text.replace(' ', '').replace('&', '')
-                    if brand_normalized in product_normalized:
-                        candidates.append(product)
-                        seen_ids.add(product.get('id'))
-                        if len(candidates) >= max_candidates * 2:  # Get more candidates if we have multiple brand keywords
-                            break
+                    candidates.append(product)
+                    seen_ids.add(product.get('id'))
+                    if len(candidates) >= max_candidates * 2:  # Get more candidates if we have multiple brand keywords
+                        break
                 if len(candidates) >= max_candidates * 2:
                     break
 
         # Search by dimensions if brand didn't yield enough
         if len(candidates) < max_candidates and dimensions:
             for dim in dimensions:
-                for product in vector_store.products_data:
+                for idx in vector_store.find_products_containing('text', dim.upper()):
+                    product = products[idx]
                     if product.get('id') in seen_ids:
                         continue
-                    product_text = f"{product.get('name', '')} {product.get('default_code', '')}".upper()
-                    if dim.upper() in product_text:
-                        candidates.append(product)
-                        seen_ids.add(product.get('id'))
-                        if len(candidates) >= max_candidates:
-                            break
+                    candidates.append(product)
+                    seen_ids.add(product.get('id'))
+                    if len(candidates) >= max_candidates:
+                        break
                 if len(candidates) >= max_candidates:
                     break
 
@@ -235,15 +248,14 @@ Your response (JSON only):"""
             code_numbers = re.findall(r'\d+', product_code)
             for num in code_numbers:
                 if len(num) >= 3:  # Only use meaningful numbers
-                    for product in vector_store.products_data:
+                    for idx in vector_store.find_products_containing('code', num):
+                        product = products[idx]
                         if product.get('id') in seen_ids:
                             continue
-                        db_code = str(product.get('default_code', ''))
-                        if num in db_code:
-                            candidates.append(product)
-                            seen_ids.add(product.get('id'))
-                            if len(candidates) >= max_candidates:
-                                break
+                        candidates.append(product)
+                        seen_ids.add(product.get('id'))
+                        if len(candidates) >= max_candidates:
+                            break
                 if len(candidates) >= max_candidates:
                     break
 
@@ -252,15 +264,14 @@ Your response (JSON only):"""
             key_words = [w for w in re.findall(r'\b\w{4,}\b', product_name)
                         if w.lower() not in ['with', 'from', 'tape', 'seal', 'blade']]
             for word in key_words[:3]:  # Top 3 key words
-                for product in vector_store.products_data:
+                for idx in vector_store.find_products_containing('name', word.upper()):
+                    product = products[idx]
                     if product.get('id') in seen_ids:
                         continue
-                    product_text = f"{product.get('name', '')}".upper()
-                    if word.upper() in product_text:
-                        candidates.append(product)
-                        seen_ids.add(product.get('id'))
-                        if len(candidates) >= max_candidates:
-                            break
+                    candidates.append(product)
+                    seen_ids.add(product.get('id'))
+                    if len(candidates) >= max_candidates:
+                        break
                 if len(candidates) >= max_candidates:
                     break
 
@@ -0,0 +1,106 @@
+"""
+Benchmark the Level 2 fuzzy code index against the old linear scan
+
+Builds synthetic catalogs of 2k / 20k / 200k codes from the real product codes
+(random substitutions, insertions and deletions), then runs the same queries
+through a full SequenceMatcher scan and through FuzzyCodeIndex, checking that
+both return identical results.
+
+Usage:
+    python tools/analysis/benchmark_fuzzy_code_index.py [--sizes 2000 20000 200000] [--queries 200]
+"""
+
+import sys
+import os
+import json
+import time
+import random
+import argparse
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from retriever_module.vector_store import VectorStore
+from retriever_module.catalog_index import FuzzyCodeIndex
+
+ALPHABET = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
+
+
+def mutate(code: str, rng: random.Random, max_edits: int = 2) -> str:
+    """Apply up to max_edits random character edits to a code"""
+    chars = list(code)
+    for _ in range(rng.randint(1, max_edits)):
+        op = rng.random()
+        if op < 0.4 and chars:
+            chars[rng.randrange(len(chars))] = rng.choice(ALPHABET)
+        elif op < 0.7:
+            chars.insert(rng.randint(0, len(chars)), rng.choice(ALPHABET))
+        elif len(chars) > 1:
+            del chars[rng.randrange(len(chars))]
+    return ''.join(chars)
+
+
+def linear_scan(codes, query, threshold, scorer):
+    """Reference implementation: the old Level 2 loop"""
+    matches = []
+    for idx, db_code in enumerate(codes):
+        if db_code and len(db_code) > 2:
+            score = scorer(query, db_code)
+            if score >= threshold:
+                matches.append((idx, score, db_code))
+    matches.sort(key=lambda match: match[1], reverse=True)
+    return matches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark FuzzyCodeIndex vs linear scan")
+    parser.add_argument('--products', default='odoo_database/odoo_products.json')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[2000, 20000, 200000])
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--threshold', type=float, default=float(os.getenv('PRODUCT_CODE_FUZZY_THRESHOLD', '0.90')))
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    rng = random.Random(42)
+
+    with open(args.products, 'r', encoding='utf-8') as f:
+        products = json.load(f)
+
+    # Scorer and normalization exactly as used by VectorStore Level 2
+    store = VectorStore.__new__(VectorStore)
+    scorer = store._calculate_similarity_safe
+    seed_codes = [store.normalize_code(p.get('default_code', '')) for p in products]
+    seed_codes = [code for code in seed_codes if code]
+
+    print("=" * 80)
+    print(f"FUZZY CODE INDEX BENCHMARK (threshold {args.threshold:.2f}, {args.queries} queries)")
+    print("=" * 80)
+    print(f"{'products':>10} {'build':>9} {'scan/query':>12} {'index/query':>12} {'speedup':>9}  results")
+
+    for size in args.sizes:
+        codes = list(seed_codes[:size])
+        while len(codes) < size:
+            codes.append(mutate(rng.choice(seed_codes), rng))
+
+        queries = [mutate(rng.choice(codes), rng) if rng.random() < 0.7 else rng.choice(codes)
+                   for _ in range(args.queries)]
+
+        start = time.perf_counter()
+        index = FuzzyCodeIndex(codes, scorer)
+        build_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        expected = [linear_scan(codes, query, args.threshold, scorer) for query in queries]
+        scan_time = (time.perf_counter() - start) / len(queries)
+
+        start = time.perf_counter()
+        actual = [index.search(query, args.threshold) for query in queries]
+        index_time = (time.perf_counter() - start) / len(queries)
+
+        status = "identical" if actual == expected else "MISMATCH"
+        print(f"{size:>10} {build_time:>8.2f}s {scan_time * 1000:>10.2f}ms {index_time * 1000:>10.3f}ms "
+              f"{scan_time / index_time:>8.0f}x  {status}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Benchmark Odoo XML-RPC transports against a local stub Odoo server
+
+The stub serves /xmlrpc/2/common (authenticate) and /xmlrpc/2/object
+(execute_kw returning fake records) over HTTP/1.1. Every new TCP connection
+waits --connect-ms before it is served, to stand in for the TCP + TLS
+handshake to a remote Odoo (1-3 round trips), and every request waits
+--rtt-ms (one network round trip).
+
+Clients (the call pattern of one email: authenticate + N execute_kw):
+  per-call     new ServerProxy per call - a new connection every time, as when
+               the server or a proxy in between does not keep connections alive
+  stdlib       one ServerProxy per endpoint with xmlrpc.client's Transport
+  pooled       OdooConnector's PooledTransport (one pool for both endpoints)
+  threads      --threads workers sharing one pooled transport (the stdlib
+               Transport cannot be shared between threads)
+
+Usage:
+    python tools/analysis/benchmark_odoo_transport.py [--calls 40] [--connect-ms 30] [--rtt-ms 5] [--threads 4]
+"""
+
+import sys
+import os
+import time
+import argparse
+import threading
+import xmlrpc.client
+from socketserver import ThreadingMixIn
+from xmlrpc.server import SimpleXMLRPCServer, SimpleXMLRPCRequestHandler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from retriever_module.odoo_transport import ConnectionPool, PooledTransport
+
+
+class StubOdooServer(ThreadingMixIn, SimpleXMLRPCServer):
+    """Minimal Odoo XML-RPC API (authenticate, execute_kw) with simulated latency"""
+
+    daemon_threads = True
+
+    def __init__(self, connect_delay: float = 0.0, request_delay: float = 0.0):
+        server = self
+        self.connect_delay = connect_delay
+        self.request_delay = request_delay
+        self.connections = 0
+        self._lock = threading.Lock()
+
+        class Handler(SimpleXMLRPCRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            rpc_paths = ('/xmlrpc/2/common', '/xmlrpc/2/object')
+
+            def setup(self):
+                super().setup()
+                with server._lock:
+                    server.connections += 1
+                time.sleep(server.connect_delay)
+
+            def log_message(self, *args):
+                pass
+
+        super().__init__(('127.0.0.1', 0), requestHandler=Handler, logRequests=False, allow_none=True)
+        self.register_function(self.authenticate, 'authenticate')
+        self.register_function(self.execute_kw, 'execute_kw')
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address
+        return f"http://{host}:{port}"
+
+    def authenticate(self, db, login, password, context):
+        time.sleep(self.request_delay)
+        return 2
+
+    def execute_kw(self, db, uid, password, model, method, args, kwargs=None):
+        time.sleep(self.request_delay)
+        limit = (kwargs or {}).get('limit') or 5
+        return [{'id': i, 'name': f"{model} {i}", 'default_code': f"C{i}"} for i in range(min(limit, 20))]
+
+
+def run_calls(common, models, calls: int):
+    """Call pattern of one email: authenticate, then sequential search_reads"""
+    uid = common.authenticate('db', 'user', 'pw', {'lang': 'en_US'})
+    for i in range(calls):
+        models.execute_kw('db', uid, 'pw', 'res.partner', 'search_read',
+                          [[['name', 'ilike', f"customer {i}"]]], {'fields': ['id', 'name'], 'limit': 5})
+
+
+def measure(server: StubOdooServer, name: str, fn, calls: int):
+    server.connections = 0
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"  {name:<34} {elapsed * 1000:8.1f} ms  {elapsed * 1000 / (calls + 1):6.2f} ms/call  "
+          f"{server.connections:4d} connections")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Odoo XML-RPC transport round trips against a stub server")
+    parser.add_argument('--calls', type=int, default=40, help="execute_kw calls per email")
+    parser.add_argument('--connect-ms', type=float, default=30.0, help="simulated connection setup (TCP + TLS)")
+    parser.add_argument('--rtt-ms', type=float, default=5.0, help="simulated round trip per request")
+    parser.add_argument('--threads', type=int, default=4, help="workers sharing one pooled transport")
+    args = parser.parse_args()
+
+    server = StubOdooServer(args.connect_ms / 1000.0, args.rtt_ms / 1000.0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = server.url
+    calls = args.calls
+
+    print(f"Stub Odoo at {url}: {calls} execute_kw calls + authenticate, "
+          f"connect {args.connect_ms:.0f} ms, round trip {args.rtt_ms:.0f} ms\n")
+
+    class PerCallProxy:
+        """New ServerProxy (and connection) for every call"""
+        def __init__(self, endpoint):
+            self.endpoint = endpoint
+
+        def __getattr__(self, name):
+            def call(*call_args):
+                with xmlrpc.client.ServerProxy(self.endpoint) as proxy:
+                    return getattr(proxy, name)(*call_args)
+            return call
+
+    per_call = measure(server, "per-call connection", lambda: run_calls(
+        PerCallProxy(f"{url}/xmlrpc/2/common"), PerCallProxy(f"{url}/xmlrpc/2/object"), calls), calls)
+
+    stdlib = measure(server, "stdlib Transport", lambda: run_calls(
+        xmlrpc.client.ServerProxy(f"{url}/xmlrpc/2/common"),
+        xmlrpc.client.ServerProxy(f"{url}/xmlrpc/2/object"), calls), calls)
+
+    pool = ConnectionPool(pool_size=args.threads)
+    transport = PooledTransport(pool)
+    pooled = measure(server, "pooled (cold)", lambda: run_calls(
+        xmlrpc.client.ServerProxy(f"{url}/xmlrpc/2/common", transport=transport),
+        xmlrpc.client.ServerProxy(f"{url}/xmlrpc/2/object", transport=transport), calls), calls)
+    warm = measure(server, "pooled (warm, next email)", lambda: run_calls(
+        xmlrpc.client.ServerProxy(f"{url}/xmlrpc/2/common", transport=transport),
+        xmlrpc.client.ServerProxy(f"{url}/xmlrpc/2/object", transport=transport), calls), calls)
+
+    def threaded():
+        workers = [
+            threading.Thread(target=run_calls, args=(
+                xmlrpc.client.ServerProxy(f"{url}/xmlrpc/2/common", transport=transport),
+                xmlrpc.client.ServerProxy(f"{url}/xmlrpc/2/object", transport=transport),
+                calls))
+            for _ in range(args.threads)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+    threads = measure(server, f"pooled, {args.threads} threads x 1 email", threaded, calls * args.threads)
+
+    print(f"\n  pooled vs per-call: {per_call / pooled:.1f}x (cold), {per_call / warm:.1f}x (warm)")
+    print(f"  pooled vs stdlib:   {stdlib / pooled:.2f}x (cold), {stdlib / warm:.2f}x (warm)")
+    print(f"  {args.threads} threads: {threads * 1000:.1f} ms for {args.threads} emails "
+          f"({threads * 1000 / args.threads:.1f} ms per email)")
+    print(f"  pool: {pool.stats()}")
+
+    pool.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Benchmark query encoding: PyTorch vs ONNX Runtime (float32 and dynamic int8)
+
+Encodes sample order lines with every backend and reports p50/p95 latency of a
+single-query encode (one email line at a time), the latency of a batched encode
+of all lines, and top-k agreement: the fraction of the PyTorch top 20 products
+that the ONNX query embeddings also return, scored against the same PyTorch
+product matrix.
+
+Usage:
+    python tools/analysis/benchmark_query_encoding.py [--products odoo_database/odoo_products.json]
+        [--model Alibaba-NLP/gte-modernbert-base] [--runs 50] [--threads N] [--cache-dir .bert_cache]
+"""
+
+import sys
+import os
+import time
+import json
+import argparse
+import logging
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sentence_transformers import SentenceTransformer
+from retriever_module.onnx_encoder import load_onnx_model
+
+TOP_K = 20
+
+SAMPLE_QUERIES = [
+    "3M Cushion Mount Plus E1015 457mm x 23m",
+    "Doctor Blade Gold 25x0.20 RPR-123965",
+    "Duro Seal Bobst 16S Grey SDS025",
+    "L1520 DuploFLEX plate mounting tape 685mm",
+    "3M 9353R Cushion Mount 1.14mm",
+    "Seal for W&H Miraflex 300mm blue",
+    "Lohmann DuploFLEX 5.3 yellow 600mm x 25m",
+    "Ceramic anilox doctor blade 35x0.15x1.7mm",
+    "SDS1923 end seal Bobst M6",
+    "Tesa Softprint 52015 medium 457mm",
+]
+
+
+def build_product_texts(products_path: str) -> list:
+    """Product texts (code + name, a close approximation of the matcher text)"""
+    try:
+        with open(products_path, 'r', encoding='utf-8') as f:
+            products = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Could not load products ({e}), using sample queries as catalog")
+        return list(SAMPLE_QUERIES)
+    return [f"{p.get('default_code') or ''} {p.get('name') or ''}".strip() for p in products]
+
+
+def encode_latencies(model, queries: list, runs: int):
+    """(p50 ms, p95 ms) of single-query encodes, and ms for one batched encode"""
+    model.encode(queries[:2], convert_to_numpy=True, normalize_embeddings=True)  # warm-up
+
+    timings = []
+    for run in range(runs):
+        query = queries[run % len(queries)]
+        start = time.perf_counter()
+        model.encode(query, convert_to_numpy=True, normalize_embeddings=True)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    model.encode(queries, batch_size=32, convert_to_numpy=True, normalize_embeddings=True)
+    batch_ms = (time.perf_counter() - start) * 1000
+    return float(np.percentile(timings, 50)), float(np.percentile(timings, 95)), batch_ms
+
+
+def top_k_ids(query_embeddings: np.ndarray, product_embeddings: np.ndarray, top_k: int) -> list:
+    """Top-k product rows per query (cosine on normalized vectors)"""
+    scores = query_embeddings @ product_embeddings.T
+    top_k = min(top_k, scores.shape[1])
+    return [set(np.argsort(-row)[:top_k].tolist()) for row in scores]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency and top-k agreement of BERT inference backends")
+    parser.add_argument('--products', default='odoo_database/odoo_products.json')
+    parser.add_argument('--model', default='Alibaba-NLP/gte-modernbert-base')
+    parser.add_argument('--runs', type=int, default=50)
+    parser.add_argument('--threads', type=int, default=None)
+    parser.add_argument('--cache-dir', default='.bert_cache')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    queries = (SAMPLE_QUERIES * 5)[:50]
+    product_texts = build_product_texts(args.products)
+
+    print(f"Loading models ({args.model})...")
+    backends = {'torch': SentenceTransformer(args.model, device='cpu')}
+    for label, quantize in (('onnx', False), ('onnx-qint8', True)):
+        try:
+            backends[label] = load_onnx_model(args.model, args.cache_dir, quantize=quantize,
+                                              num_threads=args.threads)
+        except Exception as e:
+            print(f"  {label}: unavailable ({e})")
+
+    torch_model = backends['torch']
+    product_embeddings = torch_model.encode(product_texts, batch_size=32, convert_to_numpy=True,
+                                            normalize_embeddings=True)
+    reference = top_k_ids(torch_model.encode(queries, convert_to_numpy=True, normalize_embeddings=True),
+                          product_embeddings, TOP_K)
+
+    print("=" * 80)
+    print(f"QUERY ENCODING BENCHMARK ({len(product_texts)} products, {args.runs} single-query runs)")
+    print("=" * 80)
+    print(f"{'backend':<12} {'p50 ms':>9} {'p95 ms':>9} {'batch ' + str(len(queries)) + ' ms':>13} "
+          f"{'top-' + str(TOP_K) + ' agree':>13}")
+
+    for label, model in backends.items():
+        p50, p95, batch_ms = encode_latencies(model, queries, args.runs)
+        embeddings = model.encode(queries, convert_to_numpy=True, normalize_embeddings=True)
+        found = top_k_ids(embeddings, product_embeddings, TOP_K)
+        agreement = np.mean([len(a & b) / max(len(a), 1) for a, b in zip(reference, found)])
+        print(f"{label:<12} {p50:>9.1f} {p95:>9.1f} {batch_ms:>13.1f} {agreement:>13.3f}")
+
+
+if __name__ == "__main__":
+    main()
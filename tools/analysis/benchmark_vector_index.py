@@ -0,0 +1,137 @@
+"""
+Benchmark the approximate BERT vector indexes against exact brute force
+
+Also covers the quantized exact scans (int8 / float16 + float32 re-scoring).
+
+Builds catalogs of 2k / 50k / 200k embeddings, seeded from the cached product
+embeddings in .bert_cache when available (otherwise clustered random vectors of
+the model dimension), with perturbed copies to reach the larger sizes. Queries
+are perturbed catalog vectors. For every backend the script reports build time,
+time per query and recall@20 against the exact top 20.
+
+Usage:
+    python tools/analysis/benchmark_vector_index.py [--sizes 2000 50000 200000] [--queries 200]
+        [--nprobe 8 16 32 64] [--cache-dir .bert_cache]
+"""
+
+import sys
+import os
+import glob
+import time
+import argparse
+import logging
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from retriever_module.vector_index import ExactIndex, IVFIndex, HNSWIndex, QuantizedIndex, faiss
+
+TOP_K = 20
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize rows"""
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def load_seed_embeddings(cache_dir: str, rng: np.random.Generator) -> np.ndarray:
+    """Newest cached product embeddings, or clustered random vectors"""
+    cached = [
+        path for path in glob.glob(os.path.join(cache_dir, 'embeddings_*.npy'))
+        if not path.endswith(('.int8.npy', '.float16.npy', '.scale.npy'))
+    ]
+    cached.sort(key=os.path.getmtime)
+    if cached:
+        print(f"Seed embeddings: {cached[-1]}")
+        return normalize(np.load(cached[-1]))
+
+    print("Seed embeddings: synthetic (no .bert_cache found)")
+    centers = normalize(rng.standard_normal((60, 768)))
+    labels = rng.integers(0, len(centers), 2000)
+    return normalize(centers[labels] + 0.08 * rng.standard_normal((2000, 768)))
+
+
+def build_catalog(seed: np.ndarray, size: int, rng: np.random.Generator) -> np.ndarray:
+    """Seed embeddings plus perturbed copies up to size"""
+    if size <= len(seed):
+        return seed[:size]
+    extra = seed[rng.integers(0, len(seed), size - len(seed))]
+    extra = normalize(extra + 0.02 * rng.standard_normal(extra.shape).astype(np.float32))
+    return np.vstack([seed, extra])
+
+
+def recall_at_k(exact_results, approx_results) -> float:
+    """Mean fraction of the exact top-k found by the approximate index"""
+    recalls = []
+    for (exact_ids, _), (approx_ids, _) in zip(exact_results, approx_results):
+        recalls.append(len(set(exact_ids.tolist()) & set(approx_ids.tolist())) / max(len(exact_ids), 1))
+    return float(np.mean(recalls))
+
+
+def timed_search(index, queries: np.ndarray):
+    """Search queries one at a time (as per email line) and return (results, ms/query)"""
+    start = time.perf_counter()
+    results = [index.search(query[np.newaxis, :], TOP_K)[0] for query in queries]
+    return results, (time.perf_counter() - start) * 1000 / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall@20 and speed of BERT vector indexes")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[2000, 50000, 200000])
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--nprobe', type=int, nargs='+', default=[8, 16, 32, 64])
+    parser.add_argument('--cache-dir', default='.bert_cache')
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    rng = np.random.default_rng(42)
+    seed = load_seed_embeddings(args.cache_dir, rng)
+
+    print("=" * 80)
+    print(f"VECTOR INDEX BENCHMARK (recall@{TOP_K} vs exact, {args.queries} queries)")
+    print("=" * 80)
+    print(f"{'products':>10} {'backend':<16} {'build':>9} {'ms/query':>10} {'recall@20':>10} {'scan MB':>9}")
+
+    for size in args.sizes:
+        embeddings = build_catalog(seed, size, rng)
+        picked = embeddings[rng.integers(0, size, args.queries)]
+        queries = normalize(picked + 0.05 * rng.standard_normal(picked.shape).astype(np.float32))
+
+        exact = ExactIndex(embeddings)
+        exact_results, exact_ms = timed_search(exact, queries)
+        print(f"{size:>10} {'exact':<16} {'-':>9} {exact_ms:>10.2f} {1.0:>10.3f} {embeddings.nbytes / 2**20:>9.1f}")
+
+        for dtype in ('int8', 'float16'):
+            start = time.perf_counter()
+            quantized = QuantizedIndex(embeddings, dtype=dtype)
+            quantized.build()
+            build_s = time.perf_counter() - start
+            results, ms = timed_search(quantized, queries)
+            scan_mb = (quantized.codes.nbytes + quantized.scales.nbytes) / 2**20
+            print(f"{'':>10} {'exact ' + dtype:<16} {build_s:>8.1f}s {ms:>10.2f} "
+                  f"{recall_at_k(exact_results, results):>10.3f} {scan_mb:>9.1f}")
+
+        start = time.perf_counter()
+        ivf = IVFIndex(embeddings)
+        ivf.build()
+        build_s = time.perf_counter() - start
+        for nprobe in args.nprobe:
+            ivf.nprobe = nprobe
+            results, ms = timed_search(ivf, queries)
+            label = f"ivf nprobe={nprobe}"
+            print(f"{'':>10} {label:<16} {build_s:>8.1f}s {ms:>10.2f} "
+                  f"{recall_at_k(exact_results, results):>10.3f} {embeddings.nbytes / 2**20:>9.1f}")
+
+        if faiss is not None:
+            start = time.perf_counter()
+            hnsw = HNSWIndex(embeddings)
+            hnsw.build()
+            build_s = time.perf_counter() - start
+            results, ms = timed_search(hnsw, queries)
+            print(f"{'':>10} {'hnsw':<16} {build_s:>8.1f}s {ms:>10.2f} "
+                  f"{recall_at_k(exact_results, results):>10.3f} {embeddings.nbytes / 2**20:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
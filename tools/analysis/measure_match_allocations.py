@@ -0,0 +1,97 @@
+"""
+Measure memory allocated while matching a 50-line order (tracemalloc)
+
+Runs the product matching paths used per email on a synthetic 50-line order
+built from the catalog (exact codes, mangled codes and name-only lines) and
+reports the peak traced memory of each phase (index building excluded).
+
+Usage:
+    python tools/analysis/measure_match_allocations.py [--root PATH] [--lines 50] [--bert]
+
+--root points at another checkout to compare before/after a change.
+"""
+
+import sys
+import os
+import gc
+import json
+import random
+import argparse
+import logging
+import tracemalloc
+
+DEFAULT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def build_order(products, lines: int, seed: int = 50):
+    """Build (names, codes) for a synthetic order"""
+    rng = random.Random(seed)
+    named = [p for p in products if p.get('name') and p.get('default_code')]
+    picked = rng.sample(named, min(lines, len(named)))
+
+    names, codes = [], []
+    for i, product in enumerate(picked):
+        names.append(product['name'])
+        code = product['default_code']
+        if i % 3 == 1:
+            code = code[:-1] + ('X' if code[-1] != 'X' else 'Y')  # typo
+        elif i % 3 == 2:
+            code = ''  # name-only line
+        codes.append(code)
+    return names, codes
+
+
+def measure(label: str, func):
+    """Run func under tracemalloc and print its peak allocation"""
+    gc.collect()
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    func()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:<45} peak {peak / 1024:>10.1f} KB   retained {current / 1024:>8.1f} KB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="tracemalloc allocations for a multi-line order")
+    parser.add_argument('--root', default=DEFAULT_ROOT, help="Project checkout to measure")
+    parser.add_argument('--lines', type=int, default=50)
+    parser.add_argument('--bert', action='store_true', help="Also measure HybridMatcher with BERT")
+    args = parser.parse_args()
+
+    sys.path.insert(0, args.root)
+    logging.disable(logging.CRITICAL)
+
+    from retriever_module.vector_store import VectorStore
+    from retriever_module.token_matcher import TokenMatcher
+
+    products_json = os.path.join(args.root, 'odoo_database', 'odoo_products.json')
+    customers_json = os.path.join(args.root, 'odoo_database', 'odoo_customers.json')
+    with open(products_json, 'r', encoding='utf-8') as f:
+        products = json.load(f)
+
+    names, codes = build_order(products, args.lines)
+    queries = [f"{code} {name}".strip() for name, code in zip(names, codes)]
+
+    print("=" * 80)
+    print(f"MATCH ALLOCATIONS - {len(names)}-line order ({args.root})")
+    print("=" * 80)
+
+    vector_store = VectorStore(customers_json, products_json)
+    measure("VectorStore.search_products_batch", lambda: vector_store.search_products_batch(names, codes))
+
+    token_matcher = TokenMatcher(products_json)
+    measure("TokenMatcher.search (top_k=1, min 0.4)",
+            lambda: [token_matcher.search(query, top_k=1) for query in queries])
+    measure("TokenMatcher.search (top_k=5, min 0.0)",
+            lambda: [token_matcher.search(query, top_k=5, min_score=0.0) for query in queries])
+
+    if args.bert:
+        from retriever_module.hybrid_matcher import HybridMatcher
+        hybrid = HybridMatcher(products_json, use_bert=True)
+        measure("HybridMatcher.search (top_k=1)",
+                lambda: [hybrid.search(query, top_k=1, min_score=0.60) for query in queries])
+
+
+if __name__ == "__main__":
+    main()
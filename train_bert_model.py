@@ -6,10 +6,18 @@ This will significantly improve matching accuracy.
 
 Usage:
     python train_bert_model.py
+    python train_bert_model.py --mode head          # CPU-friendly: projection head only
+    python train_bert_model.py --nightly            # unattended, after a catalog sync
+
+--nightly runs without prompting at low CPU priority, skips training when the
+model is already trained on the current catalog, continues from the current
+fine-tuned model and re-embeds the catalog so the next email run starts warm.
+An interrupted run resumes from its last checkpoint.
 
 The fine-tuned model will be saved to: models/finetuned-product-matcher
 """
 
+import argparse
 import logging
 import sys
 import os
@@ -28,8 +36,66 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Fine-tune BERT on the product catalog")
+    parser.add_argument('--mode', choices=['full', 'freeze', 'head'], default='full',
+                        help="full: all layers, freeze: lower layers frozen, head: projection head only")
+    parser.add_argument('--frozen-layers', type=int, default=6,
+                        help="Lower transformer layers frozen in --mode freeze (default: 6)")
+    parser.add_argument('--epochs', type=int, default=3)
+    parser.add_argument('--batch-size', type=int, default=16)
+    parser.add_argument('--warm-start', action='store_true',
+                        help="Continue from the current fine-tuned model instead of the base model")
+    parser.add_argument('--no-resume', action='store_true',
+                        help="Ignore checkpoints of an interrupted run")
+    parser.add_argument('--nightly', action='store_true',
+                        help="Unattended re-training (implies --yes and --warm-start)")
+    parser.add_argument('--force', action='store_true',
+                        help="With --nightly: train even if the catalog did not change")
+    parser.add_argument('--yes', '-y', action='store_true', help="Do not ask for confirmation")
+    return parser.parse_args()
+
+
+def run_nightly(args):
+    """Unattended re-training after a catalog sync (skipped if nothing changed)."""
+    # Leave the CPU to the email run if both overlap
+    if hasattr(os, 'nice'):
+        os.nice(10)
+
+    finetuner = BERTFineTuner(
+        products_json_path="odoo_database/odoo_products.json",
+        base_model="Alibaba-NLP/gte-modernbert-base",
+        output_model_path="models/finetuned-product-matcher",
+        use_cuda_for_training=True,
+        train_mode=args.mode,
+        frozen_layers=args.frozen_layers,
+        warm_start=True
+    )
+
+    if finetuner.is_up_to_date() and not args.force:
+        logger.info("Fine-tuned model is up to date with the product catalog, nothing to do")
+        return
+
+    finetuner.fine_tune(
+        epochs=args.epochs,
+        batch_size=args.batch_size,
+        resume=not args.no_resume
+    )
+    finetuner.refresh_embedding_cache()
+    logger.info("Nightly fine-tuning complete")
+
+
 def main():
     """Main training function."""
+    args = parse_args()
+
+    if args.nightly:
+        try:
+            run_nightly(args)
+        except Exception as e:
+            logger.error(f"Nightly fine-tuning failed: {e}", exc_info=True)
+            sys.exit(1)
+        return
 
     # Check if CUDA is available
     import torch
@@ -60,10 +126,11 @@ def main():
     """)
 
     # Confirm
-    response = input("Do you want to proceed with fine-tuning? (yes/no): ")
-    if response.lower() not in ['yes', 'y']:
-        print("Fine-tuning cancelled.")
-        return
+    if not args.yes:
+        response = input("Do you want to proceed with fine-tuning? (yes/no): ")
+        if response.lower() not in ['yes', 'y']:
+            print("Fine-tuning cancelled.")
+            return
 
     try:
         # Initialize fine-tuner
@@ -72,16 +139,21 @@ def main():
             products_json_path="odoo_database/odoo_products.json",
             base_model="Alibaba-NLP/gte-modernbert-base",
             output_model_path="models/finetuned-product-matcher",
-            use_cuda_for_training=True  # Use GPU if available (much faster!)
+            use_cuda_for_training=True,  # Use GPU if available (much faster!)
+            train_mode=args.mode,
+            frozen_layers=args.frozen_layers,
+            warm_start=args.warm_start
         )
 
         # Run fine-tuning
         logger.info("Starting fine-tuning process...")
         finetuner.fine_tune(
-            epochs=3,  # Number of training passes
-            batch_size=16,  # Batch size (reduce if out of memory)
-            warmup_steps=100
+            epochs=args.epochs,  # Number of training passes
+            batch_size=args.batch_size,  # Batch size (reduce if out of memory)
+            warmup_steps=100,
+            resume=not args.no_resume
         )
+        finetuner.refresh_embedding_cache()
 
         # Evaluate
         logger.info("Evaluating fine-tuned model...")
@@ -205,13 +205,16 @@ class StepLogger:
             },
             'product_matches': {
                 'total_matched': len(products),
+                'from_match_cache': sum(1 for p in products if p.get('match_cache_hit')),
                 'products': [
                     {
                         'product_code': p.get('default_code'),
                         'product_name': p.get('name'),
                         'match_score': f"{p.get('match_score', 0):.0%}",
                         'extracted_as': p.get('extracted_product_name'),
-                        'standard_price': p.get('standard_price')
+                        'standard_price': p.get('standard_price'),
+                        'match_method': p.get('match_method'),
+                        'from_match_cache': bool(p.get('match_cache_hit'))
                     }
                     for p in products
                 ]